@@ -0,0 +1,79 @@
+import zlib
+import base64
+import hashlib
+from collections import Counter
+
+# zlib은 압축 창(32KB) 끝부분의 문자열을 더 짧은 거리로 참조하므로 사전도 그 크기까지만 사용합니다.
+MAX_DICT_SIZE = 32 * 1024
+COMPRESSION_LEVEL = 9
+CODEC = "zlib"
+
+# 학습 데이터가 없어도 항상 들어가는 응답 형식 문자열 (프롬프트가 강제하는 태그)
+SEED = (
+    "##RANKINGS##\n1. **\n2. **\n3. **\n4. **\n5. **\n6. **\n7. **\n8. **\n9. **\n10. **\n"
+    "##ARTICLE_START##\n##TARGET_KR## \n##TARGET_EN## \n##HEADLINE## \n##CONTENT## \n##ARTICLE_END##\n\n"
+)
+
+def content_hash(text):
+    """원문(UTF-8) 기준 SHA-256. 같은 응답은 같은 키로 한 번만 저장됩니다."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def dictionary_id(dictionary):
+    return hashlib.sha256(dictionary).hexdigest()[:16]
+
+def train_dictionary(samples, size=MAX_DICT_SIZE):
+    """
+    [사전 학습] 과거 응답에서 여러 문서에 반복해서 나오는 줄을 모아 zlib 사전(zdict)을 만듭니다.
+    (반복 문서 수 × 길이)가 큰 줄일수록 사전 끝쪽(가까운 거리)에 배치합니다.
+    """
+    doc_freq = Counter()
+    for text in samples:
+        if not isinstance(text, str): continue
+        doc_freq.update({line.strip() for line in text.splitlines() if len(line.strip()) >= 4})
+
+    budget = size - len(SEED.encode("utf-8"))
+    chosen = []
+    for line, freq in sorted(doc_freq.items(), key=lambda kv: (-kv[1] * len(kv[0]), kv[0])):
+        if freq < 2: continue
+        encoded = (line + "\n").encode("utf-8")
+        if len(encoded) > budget: continue
+        chosen.append(encoded)
+        budget -= len(encoded)
+
+    # 가장 자주 나오는 줄이 마지막에 오도록 뒤집고, 형식 태그를 맨 끝에 둡니다.
+    return b"".join(reversed(chosen)) + SEED.encode("utf-8")
+
+def compress(text, dictionary=None):
+    """원문을 압축하여 base64 문자열로 반환합니다. (PostgREST JSON으로 그대로 전송 가능)"""
+    if dictionary:
+        comp = zlib.compressobj(COMPRESSION_LEVEL, zdict=dictionary)
+    else:
+        comp = zlib.compressobj(COMPRESSION_LEVEL)
+    data = comp.compress(text.encode("utf-8")) + comp.flush()
+    return base64.b64encode(data).decode("ascii")
+
+def decompress(payload, dictionary=None):
+    data = base64.b64decode(payload)
+    if dictionary:
+        decomp = zlib.decompressobj(zdict=dictionary)
+    else:
+        decomp = zlib.decompressobj()
+    return (decomp.decompress(data) + decomp.flush()).decode("utf-8")
+
+def encode_dictionary(dictionary):
+    return base64.b64encode(dictionary).decode("ascii")
+
+def decode_dictionary(payload):
+    return base64.b64decode(payload)
+
+def build_blob(text, dictionary=None, dict_id=None):
+    """archive_blobs 테이블에 저장할 행(dict)을 만듭니다."""
+    payload = compress(text, dictionary)
+    return {
+        "hash": content_hash(text),
+        "codec": CODEC,
+        "dict_id": dict_id if dictionary else None,
+        "raw_size": len(text.encode("utf-8")),
+        "stored_size": len(payload),
+        "data": payload,
+    }
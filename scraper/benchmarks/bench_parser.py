@@ -0,0 +1,120 @@
+"""
+[벤치마크] 기존 정규식 파싱 경로와 tag_parser 단일 패스 파서의 속도/결과 비교
+
+사용법 (scraper 폴더에서 실행):
+    python benchmarks/bench_parser.py                   # search_archive에서 최근 원문 500개 조회
+    python benchmarks/bench_parser.py --limit 2000
+    python benchmarks/bench_parser.py --corpus raw.jsonl  # {"raw_result": ...} 줄 단위 파일
+    python benchmarks/bench_parser.py --save raw.jsonl    # 조회한 원문을 파일로 보관
+"""
+import os
+import sys
+import re
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import tag_parser
+
+# ------------------------------------------------------------------
+# 기존 경로 (news_api.ask_news_ai + processor.run_category_process/parse_rankings)
+# ------------------------------------------------------------------
+def _legacy_extract_tag(tag, text):
+    pattern = rf"##{tag}##\s*(.*?)(?=\s*##|$)"
+    match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+def _legacy_parse_rankings(raw_rankings_text):
+    if not raw_rankings_text: return []
+    parsed = []
+    lines = raw_rankings_text.replace('*', '').strip().split('\n')
+    for i, line in enumerate(lines):
+        if i >= 10: break
+        line = re.sub(r'\[\d+\]', '', line).strip()
+        title = re.sub(r'^\d+[\.\)\s-]*', '', line).strip()
+        if title:
+            parsed.append((i + 1, title))
+    return parsed
+
+def legacy_parse(raw_text):
+    blocks = re.findall(r"##ARTICLE_START##(.*?)##ARTICLE_END##", raw_text, re.DOTALL | re.IGNORECASE)
+    articles = []
+    for block in blocks:
+        article_data = {
+            'target_kr': _legacy_extract_tag("TARGET_KR", block),
+            'target_en': _legacy_extract_tag("TARGET_EN", block),
+            'headline': _legacy_extract_tag("HEADLINE", block),
+            'content': _legacy_extract_tag("CONTENT", block)
+        }
+        if article_data['headline'] and article_data['content']:
+            articles.append(article_data)
+
+    # ask_news_ai 안에서 추출 후 버려지던 순위 탐색
+    re.search(r"##RANKINGS##\s*(.*)", raw_text, re.DOTALL | re.IGNORECASE)
+
+    rankings = []
+    rankings_match = re.search(r"##RANKINGS##(.*)", raw_text, re.S)
+    if rankings_match:
+        rankings = _legacy_parse_rankings(rankings_match.group(1))
+    return articles, rankings
+
+def new_parse(raw_text):
+    articles = tag_parser.parse(raw_text).articles
+    rankings = tag_parser.parse_ranking_lines(tag_parser.rankings_section(raw_text))
+    return articles, rankings
+
+# ------------------------------------------------------------------
+def load_corpus(args):
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            return [json.loads(line)["raw_result"] for line in f if line.strip()]
+
+    import database
+    if not database.supabase:
+        sys.exit("🚨 Supabase 연결 정보가 없습니다. --corpus 파일을 지정하세요.")
+    rows = database.fetch_search_archive(limit=args.limit)
+    return [row["raw_result"] for row in rows if isinstance(row.get("raw_result"), str)]
+
+def timed(fn, corpus, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw_text in corpus:
+            fn(raw_text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 응답 파서 벤치마크")
+    parser.add_argument("--corpus", help="raw_result JSONL 파일 경로")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="조회한 원문을 JSONL로 저장할 경로")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args)
+    if not corpus:
+        sys.exit("🚨 비교할 원문이 없습니다.")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            for raw_text in corpus:
+                f.write(json.dumps({"raw_result": raw_text}, ensure_ascii=False) + "\n")
+
+    mismatches = [i for i, raw_text in enumerate(corpus) if legacy_parse(raw_text) != new_parse(raw_text)]
+    legacy_sec = timed(legacy_parse, corpus, args.repeat)
+    new_sec = timed(new_parse, corpus, args.repeat)
+    total_bytes = sum(len(raw_text.encode("utf-8")) for raw_text in corpus)
+
+    print(f"📚 Corpus: {len(corpus)} responses, {total_bytes / 1024:.1f} KiB")
+    print(f"🐢 Legacy regex : {legacy_sec * 1000:.2f} ms")
+    print(f"⚡ tag_parser   : {new_sec * 1000:.2f} ms  (x{legacy_sec / new_sec:.2f})")
+    print(f"🔍 Output match : {len(corpus) - len(mismatches)}/{len(corpus)}")
+    for i in mismatches[:5]:
+        print(f"   ❌ #{i}: {corpus[i][:120]!r}")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
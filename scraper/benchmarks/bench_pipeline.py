@@ -0,0 +1,224 @@
+"""
+[오프라인 벤치마크] 로컬 대역 서버(Perplexity / Naver / 이미지 / PostgREST)로 스크래퍼 전체 또는 단계별 성능 측정
+
+실제 API 크레딧을 쓰지 않고 main.main()과 개별 단계를 반복 실행하여
+배치 전체 시간, 단계별 지연(p50/p95), 실행당 외부 호출 수를 보고합니다.
+
+사용법 (scraper 폴더에서 실행):
+    python benchmarks/bench_pipeline.py                          # 기본: 전체 배치 3회
+    python benchmarks/bench_pipeline.py --runs 5 --ai-latency 3 --error-rate 0.05
+    python benchmarks/bench_pipeline.py --stream                  # 스트리밍 모드
+    python benchmarks/bench_pipeline.py --stage image --iterations 50
+    python benchmarks/bench_pipeline.py --stage image --thumbs --dead-image-rate 0.3
+    python benchmarks/bench_pipeline.py --max-batch-sec 10        # 초과 시 종료 코드 1 (CI용)
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+from mock_servers import PerplexityMock, NaverMock, ImageMock, PostgrestMock
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="스크래퍼 오프라인 벤치마크")
+    parser.add_argument("--stage", choices=["pipeline", "ask", "parse", "image", "db"], default="pipeline")
+    parser.add_argument("--runs", type=int, default=3, help="pipeline: main.main() 반복 횟수")
+    parser.add_argument("--iterations", type=int, default=20, help="개별 단계 반복 횟수")
+    parser.add_argument("--ai-latency", type=float, default=1.0, help="Perplexity 응답 지연 (초)")
+    parser.add_argument("--naver-latency", type=float, default=0.08)
+    parser.add_argument("--db-latency", type=float, default=0.03)
+    parser.add_argument("--jitter", type=float, default=0.2, help="지연 시간 대비 지터 비율")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="모든 대역 서버의 503 주입 확률")
+    parser.add_argument("--empty-image-rate", type=float, default=0.0)
+    parser.add_argument("--image-latency", type=float, default=0.05)
+    parser.add_argument("--dead-image-rate", type=float, default=0.0, help="이미지 후보 중 404 링크 비율")
+    parser.add_argument("--thumbs", action="store_true", help="IMAGE_STORE=local로 WebP 썸네일 생성 (Pillow 필요)")
+    parser.add_argument("--stream", action="store_true", help="NEWS_AI_STREAM=1로 실행")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="스트리밍 청크 간 지연 (초)")
+    parser.add_argument("--stream-fixture", help="녹화된 SSE 파일 이름 (fixtures/ 기준)")
+    parser.add_argument("--rate-per-min", type=float, default=600.0)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--warm-cache", action="store_true", help="실행 간 조회/응답 캐시 유지")
+    parser.add_argument("--json", help="결과 리포트를 저장할 경로")
+    parser.add_argument("--max-batch-sec", type=float, help="배치 평균 시간 상한 (초과 시 실패)")
+    return parser.parse_args()
+
+def start_mocks(args):
+    def opts(latency):
+        return {"latency": latency, "jitter": latency * args.jitter, "error_rate": args.error_rate, "seed": 7}
+
+    images = ImageMock(dead_rate=args.dead_image_rate, **opts(args.image_latency)).start()
+    return {
+        "perplexity": PerplexityMock(chunk_delay=args.chunk_delay, stream_fixture=args.stream_fixture,
+                                     **opts(args.ai_latency)).start(),
+        "naver": NaverMock(empty_rate=args.empty_image_rate, image_base=images.url,
+                           **opts(args.naver_latency)).start(),
+        "images": images,
+        "supabase": PostgrestMock(**opts(args.db_latency)).start(),
+    }
+
+def configure_env(args, mocks, cache_dir):
+    """스크래퍼 모듈은 import 시점에 환경변수를 읽으므로 import 전에 설정합니다."""
+    os.environ.update({
+        "PERPLEXITY_API_KEY": "bench-key",
+        "PERPLEXITY_API_BASE": mocks["perplexity"].url,
+        "NAVER_CLIENT_ID": "bench-id",
+        "NAVER_CLIENT_SECRET": "bench-secret",
+        "NAVER_API_BASE": mocks["naver"].url,
+        "SUPABASE_URL": mocks["supabase"].url,
+        "SUPABASE_KEY": "bench-key",
+        "SUPABASE_SERVICE_KEY": "bench-service-key",
+        "SCRAPER_CACHE_DIR": cache_dir,
+        "SCRAPER_RATE_PER_MIN": str(args.rate_per_min),
+        "SCRAPER_RATE_BURST": str(args.concurrency),
+        "SCRAPER_CONCURRENCY": str(args.concurrency),
+        "SCRAPER_METRICS": "1",
+        "NEWS_AI_STREAM": "1" if args.stream else "0",
+        "NEWS_AI_CACHE_WINDOW_SEC": "1800" if args.warm_cache else "0",
+        "IMAGE_REQUIRE_HTTPS": "0",
+        "IMAGE_STORE": "local" if args.thumbs else "off",
+        "IMAGE_STORE_DIR": os.path.join(cache_dir, "images"),
+        "IMAGE_PUBLIC_BASE_URL": f"{mocks['images'].url}/thumbs",
+    })
+
+def reset_state(args, cache_dir, mocks):
+    """실행마다 같은 조건에서 시작하도록 캐시/인덱스/DB를 초기화합니다."""
+    import metrics
+    import keyword_index
+    import entity_index
+    import feed_snapshot
+    from lookup_cache import lookup_cache
+
+    metrics.reset()
+    keyword_index.recent_keywords._loaded = False
+    entity_index.entities.clear()
+    feed_snapshot._known.clear()
+    mocks["supabase"].tables.clear()
+    if not args.warm_cache:
+        lookup_cache.stats.clear()
+        with lookup_cache._lock:
+            if lookup_cache._conn is not None:
+                lookup_cache._conn.execute("DELETE FROM lookup_cache")
+                lookup_cache._conn.commit()
+
+def run_pipeline(args, mocks, cache_dir):
+    import main
+    import metrics
+
+    batch_times = []
+    reports = []
+    for run in range(args.runs):
+        reset_state(args, cache_dir, mocks)
+        os.environ["RUN_COUNT"] = str(run)
+        start = time.perf_counter()
+        try:
+            main.main()
+        except SystemExit:
+            pass
+        batch_times.append(time.perf_counter() - start)
+        reports.append(metrics.build_report())
+    return batch_times, reports
+
+def _time_loop(fn, iterations):
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def run_stage(args, mocks, cache_dir):
+    from mock_servers import load_completions
+    completions = load_completions()
+
+    if args.stage == "parse":
+        import tag_parser
+        return _time_loop(lambda i: tag_parser.parse(completions[i % len(completions)]), args.iterations)
+    if args.stage == "ask":
+        import news_api
+        return _time_loop(lambda i: news_api.ask_news_ai(f"bench prompt {i}"), args.iterations)
+    if args.stage == "image":
+        import naver_api
+        return _time_loop(lambda i: naver_api.get_target_image(f"bench target {i}"), args.iterations)
+    if args.stage == "db":
+        import database
+        item = {"category": "K-Pop", "keyword": "bench", "title": "t", "summary": "s", "image_url": "", "score": 100, "likes": 0}
+        return _time_loop(lambda i: database.save_news_to_live([dict(item, keyword=f"bench {i}")]), args.iterations)
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "n": len(samples),
+        "mean_sec": round(statistics.mean(samples), 4),
+        "min_sec": round(ordered[0], 4),
+        "p95_sec": round(p95, 4),
+        "max_sec": round(ordered[-1], 4),
+    }
+
+def merge_stage_stats(reports):
+    """여러 실행의 metrics 리포트를 단계별(카테고리 통합)로 합칩니다."""
+    merged = {}
+    for report in reports:
+        for s in report["stages"]:
+            m = merged.setdefault(s["stage"], {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "p95_ms": 0.0})
+            m["count"] += s["count"]
+            m["errors"] += s["errors"]
+            m["total_ms"] += s["total_ms"]
+            m["max_ms"] = max(m["max_ms"], s["max_ms"])
+            m["p95_ms"] = max(m["p95_ms"], s["p95_ms"])
+    for m in merged.values():
+        m["mean_ms"] = round(m["total_ms"] / m["count"], 1) if m["count"] else 0.0
+        m["total_ms"] = round(m["total_ms"], 1)
+    return merged
+
+def main():
+    args = parse_args()
+    mocks = start_mocks(args)
+    cache_dir = tempfile.mkdtemp(prefix="scraper-bench-")
+    configure_env(args, mocks, cache_dir)
+
+    result = {"stage": args.stage, "config": vars(args)}
+    try:
+        if args.stage == "pipeline":
+            batch_times, reports = run_pipeline(args, mocks, cache_dir)
+            result["batch"] = summarize(batch_times)
+            result["stages"] = merge_stage_stats(reports)
+            runs = args.runs
+        else:
+            result["batch"] = summarize(run_stage(args, mocks, cache_dir))
+            runs = args.iterations
+    finally:
+        for mock in mocks.values():
+            mock.stop()
+
+    result["calls_per_run"] = {
+        f"{name} {endpoint}": round(count / runs, 2)
+        for name, mock in mocks.items()
+        for endpoint, count in sorted(mock.calls.items())
+    }
+
+    print("\n" + "=" * 50)
+    print(f"⏱️ [Bench] {args.stage}: {json.dumps(result['batch'])}")
+    for stage, s in sorted(result.get("stages", {}).items()):
+        print(f"   {stage:<40} n={s['count']:<4} mean={s['mean_ms']:>9.1f}ms p95<={s['p95_ms']:>9.1f}ms err={s['errors']}")
+    print(f"📞 Calls per run:")
+    for endpoint, count in result["calls_per_run"].items():
+        print(f"   {endpoint:<50} {count}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.max_batch_sec is not None and result["batch"]["mean_sec"] > args.max_batch_sec:
+        print(f"🚨 [Bench] mean batch time {result['batch']['mean_sec']}s exceeds {args.max_batch_sec}s")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
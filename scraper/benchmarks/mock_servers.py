@@ -0,0 +1,442 @@
+"""
+[벤치마크용 로컬 서버] Perplexity / Naver / 이미지 호스트 / Supabase(PostgREST) 대역
+
+각 서버는 별도 스레드에서 실행되며 지연 시간(latency, jitter)과 오류율(error_rate)을 설정할 수 있습니다.
+오류는 503 + Retry-After: 0 응답으로 주입합니다. 호출 횟수는 calls 카운터에 경로별로 기록됩니다.
+"""
+import os
+import re
+import json
+import time
+import zlib
+import struct
+import random
+import hashlib
+import threading
+from collections import Counter
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load_completions():
+    """fixtures/completion_*.txt 에 보관된 AI 응답 원문 목록"""
+    names = sorted(n for n in os.listdir(FIXTURE_DIR) if n.startswith("completion_") and n.endswith(".txt"))
+    completions = []
+    for name in names:
+        with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+            completions.append(f.read())
+    return completions
+
+def load_stream(name="stream_01.sse"):
+    """녹화된 SSE 스트림 원본 (data: {...} 줄 단위)"""
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+class MockServer:
+    """공통: 스레드 실행, 지연/오류 주입, 호출 카운터"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = Counter()
+        # 요청을 보낸 클라이언트 (host, port). 연결 재사용 여부 확인용
+        self.peers = set()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with server._lock:
+                    server.calls[server.call_key(self.command, parts.path)] += 1
+                    server.peers.add(self.client_address)
+                    fail = server._rng.random() < server.error_rate
+                    delay = max(0.0, server.latency + server._rng.uniform(-server.jitter, server.jitter))
+                time.sleep(delay)
+                if fail:
+                    self.send_json(503, {"message": "injected fault"}, {"Retry-After": "0"})
+                    return
+                server.handle(self, parts.path, dict(parse_qsl(parts.query, keep_blank_values=True)),
+                              parse_qsl(parts.query, keep_blank_values=True), body)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = _dispatch
+
+            def send_json(self, status, obj, headers=None):
+                data = b"" if obj is None and status == 204 else json.dumps(obj, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(data)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def call_key(self, method, path):
+        return f"{method} {path}"
+
+    def handle(self, req, path, query, query_items, body):
+        raise NotImplementedError
+
+class PerplexityMock(MockServer):
+    """
+    POST /chat/completions — 고정 응답을 순환하며, stream=true이면 SSE로 전송
+    stream_fixture를 지정하면 녹화된 SSE 원본을 그대로 재생합니다.
+    cut_after를 지정하면 SSE 이벤트를 그 개수만 보내고 [DONE] 없이 연결을 끊습니다. (중단 재현용)
+    """
+
+    def __init__(self, completions=None, chunk_size=24, chunk_delay=0.0, stream_fixture=None, cut_after=None, **kwargs):
+        super().__init__(**kwargs)
+        self.cut_after = cut_after
+        self.completions = completions or load_completions()
+        self.stream_fixture = load_stream(stream_fixture) if stream_fixture else None
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self._index = 0
+
+    def _next_completion(self):
+        with self._lock:
+            text = self.completions[self._index % len(self.completions)]
+            self._index += 1
+        return text
+
+    def handle(self, req, path, query, query_items, body):
+        if path != "/chat/completions":
+            req.send_json(404, {"error": "not found"})
+            return
+        payload = json.loads(body or b"{}")
+        text = self._next_completion()
+        usage = {"prompt_tokens": 600, "completion_tokens": max(1, len(text) // 4), "total_tokens": 600 + len(text) // 4}
+
+        if not payload.get("stream"):
+            req.send_json(200, {
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            })
+            return
+
+        req.send_response(200)
+        req.send_header("Content-Type", "text/event-stream")
+        req.send_header("Connection", "close")
+        req.end_headers()
+        req.close_connection = True
+        if self.stream_fixture:
+            events = [event for event in self.stream_fixture.split("\n\n") if event.strip()]
+        else:
+            events = [
+                "data: " + json.dumps({"choices": [{"index": 0, "delta": {"content": text[i:i + self.chunk_size]}}]}, ensure_ascii=False)
+                for i in range(0, len(text), self.chunk_size)
+            ]
+            events += ["data: " + json.dumps({"choices": [], "usage": usage}), "data: [DONE]"]
+        if self.cut_after is not None:
+            events = events[:self.cut_after]
+
+        for event in events:
+            req.wfile.write(f"{event}\n\n".encode("utf-8"))
+            req.wfile.flush()
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+
+class NaverMock(MockServer):
+    """GET /v1/search/image, /v1/search/news.json — 검색어별로 결정적인 결과 반환"""
+
+    def __init__(self, empty_rate=0.0, image_base=None, **kwargs):
+        super().__init__(**kwargs)
+        self.empty_rate = empty_rate
+        self.image_base = image_base or "https://images.example.com"
+
+    def handle(self, req, path, query, query_items, body):
+        keyword = query.get("query", "")
+        digest = hashlib.sha1(keyword.encode("utf-8")).hexdigest()
+        display = int(query.get("display", "5"))
+        empty = int(digest[:4], 16) / 0xFFFF < self.empty_rate
+
+        if path == "/v1/search/image":
+            items = [] if empty else [
+                {
+                    "title": f"{keyword} {i}",
+                    "link": f"{self.image_base}/{digest}/{i}_{600 + 150 * i}x{800 + 100 * i}.png",
+                    "thumbnail": f"{self.image_base}/{digest}/{i}_thumb.png",
+                    "sizeheight": str(800 + 100 * i),
+                    "sizewidth": str(600 + 150 * i),
+                }
+                for i in range(display)
+            ]
+        elif path == "/v1/search/news.json":
+            items = [] if empty else [
+                {"title": f"{keyword} news {i}", "link": f"https://news.example.com/{digest}/{i}", "description": ""}
+                for i in range(display)
+            ]
+        else:
+            req.send_json(404, {"errorMessage": "not found"})
+            return
+        req.send_json(200, {"total": len(items), "start": 1, "display": len(items), "items": items})
+
+def solid_png(width, height, rgb=(200, 120, 160)):
+    """Pillow 없이 만드는 단색 PNG (이미지 대역 서버 응답용)"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    row = b"\x00" + bytes(rgb) * width
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(row * height, 6)) + chunk(b"IEND", b""))
+
+class ImageMock(MockServer):
+    """
+    GET/HEAD /<digest>/<i>_<w>x<h>.png — 요청한 크기의 PNG를 반환 (NaverMock의 image_base로 사용)
+    dead_rate 비율의 링크는 경로 해시에 따라 결정적으로 404를 반환합니다.
+    """
+
+    def __init__(self, dead_rate=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.dead_rate = dead_rate
+        self._images = {}
+
+    def call_key(self, method, path):
+        # 이미지 경로는 매번 달라지므로 메서드별로만 집계합니다.
+        return f"{method} /<image>"
+
+    def _image(self, width, height):
+        with self._lock:
+            if (width, height) not in self._images:
+                self._images[(width, height)] = solid_png(width, height)
+            return self._images[(width, height)]
+
+    def handle(self, req, path, query, query_items, body):
+        match = re.fullmatch(r"/\w+/\d+_(\d+)x(\d+)\.png", path)
+        dead = int(hashlib.sha1(path.encode("utf-8")).hexdigest()[:4], 16) / 0xFFFF < self.dead_rate
+        if not match or dead:
+            req.send_json(404, {"message": "not found"})
+            return
+        data = self._image(int(match.group(1)), int(match.group(2)))
+        req.send_response(200)
+        req.send_header("Content-Type", "image/png")
+        req.send_header("Content-Length", str(len(data)))
+        req.end_headers()
+        if req.command != "HEAD":
+            req.wfile.write(data)
+
+class PostgrestMock(MockServer):
+    """
+    /rest/v1/<table> 와 /rest/v1/rpc/<function> 의 최소 구현 (메모리 저장)
+    지원 필터: eq, neq, gt, gte, lt, lte, in, is, or / order / limit / select / Prefer: count=exact
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.tables = {}
+        self._next_id = 1
+        self.rpc_handlers = {
+            "trim_live_news": self._rpc_trim_live_news,
+            "trim_all_live_news": self._rpc_trim_all_live_news,
+            "apply_live_rankings_diff": self._rpc_apply_live_rankings_diff,
+            "publish_feed_snapshot": self._rpc_publish_feed_snapshot,
+        }
+
+    # ---------------- 필터/정렬 ----------------
+    @staticmethod
+    def _parse_in(value):
+        inner = value[1:-1] if value.startswith("(") and value.endswith(")") else value
+        return [v.strip().strip('"') for v in re.findall(r'"[^"]*"|[^,]+', inner)]
+
+    @staticmethod
+    def _compare(row_value, op, value):
+        if op == "is":
+            return row_value is None if value == "null" else str(row_value).lower() == value
+        if row_value is None:
+            return False
+        if op == "in":
+            return str(row_value) in PostgrestMock._parse_in(value)
+        a, b = str(row_value), value
+        try:
+            a, b = float(a), float(b)
+        except ValueError:
+            pass
+        return {
+            "eq": a == b, "neq": a != b, "gt": a > b, "gte": a >= b, "lt": a < b, "lte": a <= b,
+        }.get(op, True)
+
+    def _filter(self, rows, query_items):
+        reserved = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+        for column, expr in query_items:
+            if column in reserved: continue
+            if column == "or":
+                # or=(a.eq.1,b.is.null) 형태: 하나라도 맞으면 통과 (괄호 중첩은 지원하지 않음)
+                conditions = [c.partition(".") for c in expr.strip("()").split(",")]
+                rows = [r for r in rows if any(self._matches(r, col, cond) for col, _, cond in conditions)]
+                continue
+            rows = [r for r in rows if self._matches(r, column, expr)]
+        return rows
+
+    def _matches(self, row, column, expr):
+        negate = expr.startswith("not.")
+        if negate: expr = expr[4:]
+        op, _, value = expr.partition(".")
+        return self._compare(row.get(column), op, value) != negate
+
+    @staticmethod
+    def _order(rows, order):
+        for part in reversed([p for p in (order or "").split(",") if p]):
+            column, _, direction = part.partition(".")
+            desc = direction.startswith("desc")
+            rows = sorted(rows, key=lambda r: (r.get(column) is None, str(r.get(column))), reverse=desc)
+        return rows
+
+    @staticmethod
+    def _select(rows, select):
+        if not select or select.strip() == "*":
+            return rows
+        columns = [c.strip() for c in select.split(",")]
+        return [{c: r.get(c) for c in columns} for r in rows]
+
+    def _insert(self, table, records, upsert, key="id", ignore_duplicates=False):
+        rows = self.tables.setdefault(table, [])
+        inserted = []
+        for record in records:
+            record = dict(record)
+            if upsert and record.get(key) is not None:
+                existing = next((r for r in rows if r.get(key) == record[key]), None)
+                if existing:
+                    if not ignore_duplicates:
+                        existing.update(record)
+                        inserted.append(existing)
+                    continue
+            if record.get("id") is None:
+                record["id"] = self._next_id
+                self._next_id += 1
+            record.setdefault("created_at", time.strftime("%Y-%m-%dT%H:%M:%S"))
+            rows.append(record)
+            inserted.append(record)
+        return inserted
+
+    # ---------------- RPC ----------------
+    def _trim(self, category, max_rows):
+        rows = self.tables.setdefault("live_news", [])
+        cats = {category} if category else {r.get("category") for r in rows}
+        removed = 0
+        for cat in cats:
+            cat_rows = self._order([r for r in rows if r.get("category") == cat], "created_at.desc")
+            drop = {id(r) for r in cat_rows[max_rows:]}
+            removed += len(drop)
+            rows[:] = [r for r in rows if id(r) not in drop]
+        return removed
+
+    def _rpc_trim_live_news(self, args):
+        return self._trim(args["p_category"], int(args.get("p_max_rows", 30)))
+
+    def _rpc_trim_all_live_news(self, args):
+        return self._trim(None, int(args.get("p_max_rows", 30)))
+
+    def _rpc_apply_live_rankings_diff(self, args):
+        category = args["p_category"]
+        rows = self.tables.setdefault("live_rankings", [])
+        remove_ids = set(args.get("p_remove_ids") or [])
+        before = len(rows)
+        rows[:] = [r for r in rows if not (r.get("category") == category and r.get("id") in remove_ids)]
+        changed = before - len(rows)
+        for move in args.get("p_moves") or []:
+            for r in rows:
+                if r.get("id") == move["id"] and r.get("category") == category:
+                    r.update({k: v for k, v in move.items() if v is not None})
+                    changed += 1
+        new_rows = [dict(r, category=category) for r in args.get("p_inserts") or []]
+        changed += len(self._insert("live_rankings", new_rows, upsert=False))
+        self._insert("ranking_history", [dict(h, category=category) for h in args.get("p_history") or []], upsert=False)
+        applies = self.tables.setdefault("ranking_applies", [])
+        applies[:] = [a for a in applies if a.get("category") != category] + [{"category": category, "applied_at": time.time()}]
+        return changed
+
+    def _rpc_publish_feed_snapshot(self, args):
+        rows = self.tables.setdefault("feed_snapshots", [])
+        current = next((r for r in rows if r.get("category") == args["p_category"]), None)
+        record = {
+            "category": args["p_category"],
+            "version": (current or {}).get("version", 0) + 1,
+            "etag": args["p_etag"],
+            "payload": args["p_payload"],
+            "article_count": args.get("p_article_count") or 0,
+            "generated_at": args.get("p_generated_at"),
+        }
+        if current:
+            current.update(record)
+        else:
+            rows.append(record)
+        return record["version"]
+
+    # ---------------- 요청 처리 ----------------
+    def handle(self, req, path, query, query_items, body):
+        if not path.startswith("/rest/v1/"):
+            req.send_json(404, {"message": "not found"})
+            return
+        name = path[len("/rest/v1/"):]
+        prefer = req.headers.get("Prefer", "")
+
+        with self._lock:
+            if name.startswith("rpc/"):
+                handler = self.rpc_handlers.get(name[4:])
+                args = json.loads(body or b"{}")
+                result = handler(args) if handler else None
+                req.send_json(200, result)
+                return
+
+            rows = self.tables.setdefault(name, [])
+            if req.command in ("GET", "HEAD"):
+                matched = self._order(self._filter(rows, query_items), query.get("order"))
+                total = len(matched)
+                offset = int(query.get("offset", 0))
+                if "limit" in query:
+                    matched = matched[offset:offset + int(query["limit"])]
+                result = self._select(matched, query.get("select"))
+                headers = {}
+                if "count=" in prefer:
+                    end = offset + len(result) - 1
+                    headers["Content-Range"] = f"{offset}-{end}/{total}" if result else f"*/{total}"
+                req.send_json(200, result, headers)
+            elif req.command == "POST":
+                records = json.loads(body or b"[]")
+                if isinstance(records, dict):
+                    records = [records]
+                ignore = "ignore-duplicates" in prefer
+                inserted = self._insert(name, records, upsert=ignore or "merge-duplicates" in prefer,
+                                        key=query.get("on_conflict") or "id", ignore_duplicates=ignore)
+                req.send_json(201, inserted)
+            elif req.command == "PATCH":
+                patch = json.loads(body or b"{}")
+                matched = self._filter(rows, query_items)
+                for r in matched:
+                    r.update(patch)
+                req.send_json(200, matched)
+            elif req.command == "DELETE":
+                matched = self._filter(rows, query_items)
+                drop = {id(r) for r in matched}
+                rows[:] = [r for r in rows if id(r) not in drop]
+                req.send_json(200, matched)
@@ -0,0 +1,244 @@
+import os
+import config
+import json
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+import database
+
+# 모델별 요금 (USD, 100만 토큰당 / 요청 1건당). 요금이 바뀌면 AI_PRICING 환경변수(JSON)로 덮어씁니다.
+PRICING = {
+    "sonar-pro": {"input": 3.0, "output": 15.0, "request": 0.006},
+    "sonar": {"input": 1.0, "output": 1.0, "request": 0.005},
+}
+PRICING.update(json.loads(os.getenv("AI_PRICING", "{}")))
+
+PRIMARY_MODEL = os.getenv("AI_MODEL", "sonar-pro")
+FALLBACK_MODEL = os.getenv("AI_FALLBACK_MODEL", "sonar")
+
+# 지출 한도 (USD, 0이면 제한 없음)
+RUN_CAP_USD = float(os.getenv("AI_BUDGET_RUN_USD", "0.5"))
+DAY_CAP_USD = float(os.getenv("AI_BUDGET_DAY_USD", "10"))
+# 한도의 이 비율을 넘으면 저우선 프롬프트 버전은 건너뛰고 나머지는 저렴한 모델로 바꿉니다.
+SOFT_RATIO = float(os.getenv("AI_BUDGET_SOFT_RATIO", "0.8"))
+# PROMPT_VERSIONS의 인덱스 중 예산이 부족할 때 먼저 건너뛸 버전
+LOW_PRIORITY_VERSIONS = {int(v) for v in os.getenv("AI_LOW_PRIORITY_VERSIONS", "4,5").split(",") if v.strip()}
+
+# max_tokens = 카테고리별 관측 출력 토큰 p95 × 여유율 (표본이 적으면 기본값)
+MAX_TOKENS_DEFAULT = int(os.getenv("AI_MAX_TOKENS_DEFAULT", "2000"))
+MAX_TOKENS_MIN = int(os.getenv("AI_MAX_TOKENS_MIN", "800"))
+MAX_TOKENS_MAX = int(os.getenv("AI_MAX_TOKENS_MAX", "3000"))
+MAX_TOKENS_HEADROOM = float(os.getenv("AI_MAX_TOKENS_HEADROOM", "1.3"))
+MIN_SAMPLES = 5
+HISTORY_DAYS = 7
+
+class Plan:
+    """한 번의 AI 호출에 적용할 결정 (모델, 출력 토큰 상한, 예약한 예상 비용)"""
+    __slots__ = ("category", "version", "model", "max_tokens", "reserved", "downgraded")
+
+    def __init__(self, category, version, model, max_tokens, reserved, downgraded=False):
+        self.category = category
+        self.version = version
+        self.model = model
+        self.max_tokens = max_tokens
+        self.reserved = reserved
+        self.downgraded = downgraded
+
+def cost(model, prompt_tokens, completion_tokens):
+    price = PRICING.get(model) or PRICING[PRIMARY_MODEL]
+    return (prompt_tokens * price["input"] + completion_tokens * price["output"]) / 1_000_000 + price["request"]
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def _day_start(now=None):
+    now = now or datetime.now(timezone.utc)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+class BudgetManager:
+    """
+    [AI 비용 관리] Perplexity 호출마다 usage를 기록하고, 실행/일 단위 지출 한도를 지킵니다.
+    - plan(): 호출 전 모델과 max_tokens를 정하고 예상 비용을 예약합니다. 한도를 넘으면 None
+    - record(): 응답의 실제 usage로 예약을 정산하고 ai_usage 테이블에 남깁니다. (지연 쓰기)
+    - report()/stats(): 프롬프트 버전(카테고리#인덱스)별 호출 수, 지연, 토큰, 비용
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._output_tokens = {}
+        self._prompt_tokens = {}
+        self._day = _day_start()
+        self._day_spent = 0.0
+        self._run_spent = 0.0
+        self._reserved = 0.0
+        self._versions = {}
+
+    def load(self):
+        """최근 사용 기록으로 오늘 지출과 카테고리별 출력 크기를 불러옵니다."""
+        since = _day_start() - timedelta(days=HISTORY_DAYS - 1)
+        rows = database.fetch_ai_usage(since.isoformat())
+        with self._lock:
+            self._day = _day_start()
+            self._day_spent = 0.0
+            self._output_tokens = {}
+            self._prompt_tokens = {}
+            for row in rows:
+                try:
+                    created_at = datetime.fromisoformat(str(row["created_at"]).replace("Z", "+00:00"))
+                    if created_at.tzinfo is None:
+                        created_at = created_at.replace(tzinfo=timezone.utc)
+                    if created_at >= self._day:
+                        self._day_spent += float(row.get("cost_usd") or 0)
+                    self._output_tokens.setdefault(row["category"], []).append(int(row["completion_tokens"]))
+                    self._prompt_tokens.setdefault(row["category"], []).append(int(row["prompt_tokens"]))
+                except Exception:
+                    continue
+        print(f"💸 [Budget] Today ${self._day_spent:.4f} / ${DAY_CAP_USD:g} (run cap ${RUN_CAP_USD:g}), {len(rows)} usage rows loaded.")
+
+    def start_run(self):
+        """실행 단위 지출과 버전별 통계를 초기화합니다. (상주 모드에서는 리포트 주기마다 호출)"""
+        with self._lock:
+            self._run_spent = 0.0
+            self._versions = {}
+
+    def _roll_day(self):
+        today = _day_start()
+        if today != self._day:
+            self._day, self._day_spent = today, 0.0
+
+    def max_tokens_for(self, category):
+        samples = self._output_tokens.get(category, [])
+        if len(samples) < MIN_SAMPLES:
+            return MAX_TOKENS_DEFAULT
+        limit = math.ceil(_percentile(samples, 95) * MAX_TOKENS_HEADROOM)
+        return max(MAX_TOKENS_MIN, min(MAX_TOKENS_MAX, limit))
+
+    def _estimate(self, category, model, prompt, max_tokens):
+        prompts = self._prompt_tokens.get(category)
+        prompt_tokens = sum(prompts) / len(prompts) if prompts else len(prompt) / 2
+        return cost(model, prompt_tokens, max_tokens)
+
+    def _remaining(self):
+        caps = []
+        if RUN_CAP_USD > 0:
+            caps.append((RUN_CAP_USD - self._run_spent - self._reserved, RUN_CAP_USD))
+        if DAY_CAP_USD > 0:
+            caps.append((DAY_CAP_USD - self._day_spent - self._reserved, DAY_CAP_USD))
+        return caps
+
+    def plan(self, category, version, prompt):
+        """호출 전에 모델/max_tokens를 정합니다. 예산이 부족하면 None (호출 건너뜀)"""
+        with self._lock:
+            self._roll_day()
+            max_tokens = self.max_tokens_for(category)
+            caps = self._remaining()
+            soft = any(remaining < cap * (1 - SOFT_RATIO) for remaining, cap in caps)
+            stat = self._version(category, version)
+
+            if soft and version in LOW_PRIORITY_VERSIONS:
+                stat["skipped"] += 1
+                print(f"💸 [Budget] {category} v{version} skipped (low priority, budget over {SOFT_RATIO:.0%}).")
+                return None
+
+            for model in ([FALLBACK_MODEL] if soft else [PRIMARY_MODEL, FALLBACK_MODEL]):
+                estimate = self._estimate(category, model, prompt, max_tokens)
+                if all(remaining >= estimate for remaining, _ in caps):
+                    self._reserved += estimate
+                    downgraded = model != PRIMARY_MODEL
+                    if downgraded:
+                        stat["downgraded"] += 1
+                        print(f"💸 [Budget] {category} v{version} downgraded to {model}.")
+                    return Plan(category, version, model, max_tokens, estimate, downgraded)
+
+            stat["skipped"] += 1
+            print(f"💸 [Budget] {category} v{version} skipped (spend cap reached).")
+            return None
+
+    def _version(self, category, version):
+        return self._versions.setdefault(f"{category}#{version}", {
+            "calls": 0, "cache_hits": 0, "skipped": 0, "downgraded": 0, "errors": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+            "latency_ms": [],
+        })
+
+    def release(self, plan):
+        """호출하지 않고 끝난 계획(공유받은 실패 결과 등)의 예약만 해제합니다."""
+        if plan is None: return
+        with self._lock:
+            self._reserved = max(0.0, self._reserved - plan.reserved)
+            plan.reserved = 0.0
+
+    def record(self, plan, usage, latency_ms, cache_hit=False):
+        """응답 usage로 예약을 정산합니다. usage가 없으면(오류 등) 예약만 해제합니다."""
+        if plan is None: return
+        usage = usage or {}
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        spent = 0.0 if cache_hit or not usage else cost(plan.model, prompt_tokens, completion_tokens)
+
+        with self._lock:
+            self._roll_day()
+            self._reserved = max(0.0, self._reserved - plan.reserved)
+            plan.reserved = 0.0
+            self._run_spent += spent
+            self._day_spent += spent
+            stat = self._version(plan.category, plan.version)
+            if cache_hit:
+                stat["cache_hits"] += 1
+                return
+            stat["calls"] += 1
+            stat["errors"] += int(not usage)
+            stat["prompt_tokens"] += prompt_tokens
+            stat["completion_tokens"] += completion_tokens
+            stat["cost_usd"] += spent
+            stat["latency_ms"].append(latency_ms)
+            if usage:
+                self._output_tokens.setdefault(plan.category, []).append(completion_tokens)
+                self._prompt_tokens.setdefault(plan.category, []).append(prompt_tokens)
+
+        if usage:
+            database.save_ai_usage({
+                "category": plan.category,
+                "prompt_version": plan.version,
+                "model": plan.model,
+                "max_tokens": plan.max_tokens,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost_usd": round(spent, 6),
+                "latency_ms": round(latency_ms, 1),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            })
+
+    def stats(self):
+        """JSON 직렬화 가능한 실행 요약 (metrics 리포트용)"""
+        with self._lock:
+            versions = {}
+            for key, s in sorted(self._versions.items()):
+                latencies = s["latency_ms"]
+                versions[key] = {
+                    **{k: v for k, v in s.items() if k != "latency_ms"},
+                    "cost_usd": round(s["cost_usd"], 6),
+                    "mean_latency_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                    "max_latency_ms": round(max(latencies), 1) if latencies else 0.0,
+                }
+            return {
+                "run_spent_usd": round(self._run_spent, 6),
+                "day_spent_usd": round(self._day_spent, 6),
+                "run_cap_usd": RUN_CAP_USD,
+                "day_cap_usd": DAY_CAP_USD,
+                "versions": versions,
+            }
+
+    def report(self):
+        """실행 로그용 요약 문자열 (버전별: 호출 수, 평균 지연, 비용)"""
+        s = self.stats()
+        parts = [
+            f"{key} calls={v['calls']} hits={v['cache_hits']} skip={v['skipped']} "
+            f"{v['mean_latency_ms'] / 1000:.1f}s ${v['cost_usd']:.4f}"
+            for key, v in s["versions"].items()
+        ]
+        head = f"run ${s['run_spent_usd']:.4f} / day ${s['day_spent_usd']:.4f}"
+        return " | ".join([head] + parts)
+
+budget = BudgetManager()
@@ -0,0 +1,97 @@
+"""
+[일회성 이전 도구] search_archive에 원문 그대로 쌓인 raw_result를 archive_blobs로 옮깁니다.
+
+- 최근 원문으로 압축 사전을 학습하여 archive_dictionaries에 저장합니다. (이미 있으면 재사용)
+- 같은 원문은 내용 해시로 한 번만 저장하고, search_archive 행에는 raw_hash만 남깁니다.
+- 끝나면 절약한 바이트 수를 출력합니다.
+
+사용법 (scraper 폴더에서 실행):
+    python compact_archive.py --dry-run          # 저장 없이 절약량만 계산
+    python compact_archive.py                    # 실제 이전
+    python compact_archive.py --retrain          # 사전을 새로 학습한 뒤 이전
+"""
+import sys
+import argparse
+import config
+import database
+import archive_store
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="search_archive 원문 압축/중복 제거 이전")
+    parser.add_argument("--batch", type=int, default=200, help="한 번에 처리할 행 수")
+    parser.add_argument("--train-limit", type=int, default=500, help="사전 학습에 사용할 최근 원문 수")
+    parser.add_argument("--retrain", action="store_true", help="기존 사전이 있어도 새로 학습")
+    parser.add_argument("--dry-run", action="store_true", help="DB를 변경하지 않고 절약량만 계산")
+    return parser.parse_args()
+
+def prepare_dictionary(args):
+    dict_id, dictionary = (None, None) if args.retrain else database.get_archive_dictionary()
+    if dictionary:
+        print(f"📚 [Compact] Using existing dictionary {dict_id} ({len(dictionary)} bytes).")
+        return dict_id, dictionary
+
+    samples = [row["raw_result"] for row in database.fetch_search_archive(limit=args.train_limit)
+               if isinstance(row.get("raw_result"), str)]
+    if len(samples) < 2:
+        print("📚 [Compact] Not enough samples to train a dictionary, compressing without it.")
+        return None, None
+
+    dictionary = archive_store.train_dictionary(samples)
+    if args.dry_run:
+        dict_id = archive_store.dictionary_id(dictionary)
+    else:
+        dict_id = database.save_archive_dictionary(dictionary, len(samples))
+    print(f"📚 [Compact] Trained dictionary {dict_id} from {len(samples)} samples ({len(dictionary)} bytes).")
+    return dict_id, dictionary
+
+def main():
+    args = parse_args()
+    if not database.supabase:
+        sys.exit("🚨 Supabase 연결 정보가 없습니다.")
+
+    dict_id, dictionary = prepare_dictionary(args)
+    totals = {"rows": 0, "unique": 0, "before": 0, "after": 0}
+    seen = set()
+    last_id = 0
+
+    while True:
+        rows = database.fetch_uncompacted_archive(after_id=last_id, limit=args.batch)
+        if not rows: break
+        last_id = rows[-1]["id"]
+
+        ids_by_hash = {}
+        blobs = []
+        for row in rows:
+            raw_text = row["raw_result"]
+            if not isinstance(raw_text, str): continue
+            blob = archive_store.build_blob(raw_text, dictionary, dict_id)
+            ids_by_hash.setdefault(blob["hash"], []).append(row["id"])
+            totals["rows"] += 1
+            totals["before"] += blob["raw_size"]
+            if blob["hash"] not in seen:
+                seen.add(blob["hash"])
+                blobs.append(blob)
+                totals["unique"] += 1
+                totals["after"] += blob["stored_size"]
+
+        if not args.dry_run:
+            # 원문을 먼저 저장한 뒤에만 search_archive 행을 비웁니다.
+            if blobs and not database.save_archive_blobs(blobs):
+                sys.exit(f"🚨 [Compact] Stopped at id {rows[0]['id']}: failed to save blobs.")
+            for raw_hash, ids in ids_by_hash.items():
+                if not database.mark_archive_compacted(raw_hash, ids):
+                    sys.exit(f"🚨 [Compact] Stopped at id {ids[0]}: failed to update rows.")
+
+        print(f"🗜️ [Compact] ...id {last_id}: {totals['rows']} rows, {totals['unique']} unique payloads")
+
+    saved = totals["before"] - totals["after"]
+    ratio = (totals["after"] / totals["before"] * 100) if totals["before"] else 0.0
+    mode = " (dry run)" if args.dry_run else ""
+    print(f"\n" + "="*50)
+    print(f"🎉 Archive Compaction Completed{mode}.")
+    print(f"📊 Rows: {totals['rows']} | Unique payloads: {totals['unique']}")
+    print(f"💾 Bytes: {totals['before']:,} -> {totals['after']:,} ({ratio:.1f}%) | Saved: {saved:,}")
+    print(f"="*50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+from dotenv import load_dotenv
+
+# 상위 폴더의 .env를 프로세스에서 한 번만 로드합니다.
+# 환경변수를 읽는 모듈은 모두 이 모듈을 먼저 import 합니다.
+load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
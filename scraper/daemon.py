@@ -0,0 +1,202 @@
+import os
+import config
+import json
+import time
+import random
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import database
+import http_client
+import resilience
+import metrics
+from budget import budget
+from lookup_cache import lookup_cache, CACHE_DIR
+from keyword_index import recent_keywords
+from entity_index import entities
+from rate_limiter import TokenBucket
+from main import CATEGORIES, MAX_CONCURRENCY, RATE_LIMIT_PER_MIN, RATE_LIMIT_BURST, process_category
+
+# 카테고리별 실행 주기 (분). DAEMON_INTERVALS="K-Pop=20,K-Culture=60" 형태로 개별 지정할 수 있습니다.
+DEFAULT_INTERVAL_MIN = float(os.getenv("DAEMON_INTERVAL_MIN", "30"))
+# 여러 카테고리가 같은 시각에 몰리지 않도록 주기에 더하는 무작위 편차 (초, ±)
+JITTER_SEC = float(os.getenv("DAEMON_JITTER_SEC", "120"))
+# 도배 방지/인물 식별 인덱스를 DB에서 다시 불러오는 주기 (분)
+INDEX_RELOAD_MIN = float(os.getenv("DAEMON_INDEX_RELOAD_MIN", "60"))
+# 측정 리포트를 내보내고 초기화하는 주기 (분)
+REPORT_INTERVAL_MIN = float(os.getenv("DAEMON_REPORT_MIN", "60"))
+# 프롬프트 순환 카운터와 다음 실행 시각을 저장하는 파일
+STATE_PATH = os.getenv("SCRAPER_STATE_PATH", os.path.join(CACHE_DIR, "daemon_state.json"))
+TICK_SEC = 1.0
+
+def _parse_intervals(value):
+    intervals = {category: DEFAULT_INTERVAL_MIN for category in CATEGORIES}
+    for part in (value or "").split(","):
+        name, _, minutes = part.partition("=")
+        if name.strip() in intervals and minutes.strip():
+            try:
+                intervals[name.strip()] = float(minutes)
+            except ValueError:
+                print(f"⚠️ [Daemon] Invalid interval ignored: {part}")
+    return intervals
+
+INTERVALS_MIN = _parse_intervals(os.getenv("DAEMON_INTERVALS"))
+
+def load_state(path=STATE_PATH):
+    """
+    [지속 상태] 카테고리별 실행 횟수(run_count)와 다음 실행 시각을 불러옵니다.
+    파일이 없으면 RUN_COUNT 환경변수에서 시작합니다.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = {}
+    except Exception as e:
+        print(f"⚠️ [Daemon] State file unreadable, starting fresh: {e}")
+        state = {}
+
+    try:
+        base = int(os.getenv("RUN_COUNT", "0"))
+    except (ValueError, TypeError):
+        base = 0
+
+    run_counts = state.get("run_counts", {})
+    next_runs = state.get("next_runs", {})
+    return {
+        "run_counts": {c: int(run_counts.get(c, base)) for c in CATEGORIES},
+        "next_runs": {c: float(next_runs.get(c, 0)) for c in CATEGORIES},
+    }
+
+def save_state(state, path=STATE_PATH):
+    """임시 파일에 쓴 뒤 교체하여, 중간에 종료되어도 상태 파일이 깨지지 않게 합니다."""
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ [Daemon] Failed to save state: {e}")
+
+def _next_run_at(category, now):
+    jitter = random.uniform(-JITTER_SEC, JITTER_SEC)
+    return now + max(60.0, INTERVALS_MIN[category] * 60 + jitter)
+
+class Scheduler:
+    """
+    [상주 스케줄러] 클라이언트/캐시/도배 방지 인덱스를 메모리에 유지한 채
+    카테고리마다 자기 주기로 실행합니다.
+    - 다음 실행 시각은 실행을 시작할 때 정합니다. (주기는 시작 시각 기준)
+    - 같은 카테고리는 이전 실행이 끝나기 전에 다시 시작하지 않습니다.
+    - 실행이 끝날 때마다 run_count를 올리고 상태 파일에 저장합니다.
+    """
+
+    def __init__(self, state_path=STATE_PATH):
+        self.state_path = state_path
+        self.state = load_state(state_path)
+        self.limiter = TokenBucket(rate=RATE_LIMIT_PER_MIN / 60.0, capacity=RATE_LIMIT_BURST)
+        self.stop_event = threading.Event()
+        self.results = {"success": 0, "failed": 0, "skipped": 0}
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def stop(self, signum=None, frame=None):
+        if not self.stop_event.is_set():
+            print(f"\n🛑 [Daemon] Shutdown requested. Waiting for running categories: {sorted(self._running) or 'none'}")
+        self.stop_event.set()
+
+    def _run(self, category, run_count, idx):
+        try:
+            process_category(category, run_count, self.limiter, idx, len(CATEGORIES))
+            database.cleanup_old_data(category, max_limit=30)
+            print(f"✅ Success: {category}")
+            outcome = "success"
+        except Exception as e:
+            print(f"🚨 CRITICAL ERROR in {category}: {str(e)}")
+            outcome = "failed"
+
+        with self._lock:
+            self.results[outcome] += 1
+            # Actions의 run_number처럼 성공/실패와 관계없이 순환을 진행합니다.
+            self.state["run_counts"][category] = run_count + 1
+            self._running.discard(category)
+            save_state(self.state, self.state_path)
+
+    def _submit_due(self, pool, now):
+        for idx, category in enumerate(CATEGORIES):
+            with self._lock:
+                if now < self.state["next_runs"][category]:
+                    continue
+                # 다음 차례는 시작 시각 기준으로 미리 정해 둡니다.
+                self.state["next_runs"][category] = _next_run_at(category, now)
+                if category in self._running:
+                    # 실행 중에 새 차례가 돌아온 경우에만 건너뛴 것으로 셉니다.
+                    self.results["skipped"] += 1
+                    print(f"⏭️ [Daemon] {category} is still running, skipping this slot.")
+                    continue
+                self._running.add(category)
+                run_count = self.state["run_counts"][category]
+            pool.submit(self._run, category, run_count, idx)
+
+    def _report(self):
+        print(f"🗂️ Lookup Cache | {lookup_cache.report()}")
+        print(f"🛡️ Resilience | {resilience.report()}")
+        print(f"📂 Write-Behind | {database.archive_sink.report()}")
+        print(f"💸 AI Budget | {budget.report()}")
+        with self._lock:
+            results = dict(self.results)
+            run_counts = dict(self.state["run_counts"])
+        metrics.emit_report({"mode": "daemon", "run_counts": run_counts, "results": results, "resilience": resilience.stats(), "budget": budget.stats()})
+        metrics.reset()
+        # 상주 모드에서는 리포트 주기 하나를 실행 1회로 보고 실행 한도를 다시 채웁니다.
+        budget.start_run()
+
+    def run(self):
+        print(f"🤖 Scraper Daemon Started at {datetime.now()} (UTC)")
+        for category in CATEGORIES:
+            print(f"   📅 {category}: every {INTERVALS_MIN[category]:g} min (±{JITTER_SEC:g}s), run #{self.state['run_counts'][category]}")
+
+        entities.load()
+        recent_keywords.load()
+        database.replay_pending_writes()
+        budget.load()
+        last_reload = last_report = time.monotonic()
+        workers = max(1, min(MAX_CONCURRENCY, len(CATEGORIES)))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="category") as pool:
+            while not self.stop_event.is_set():
+                self._submit_due(pool, time.time())
+
+                mono = time.monotonic()
+                if mono - last_reload >= INDEX_RELOAD_MIN * 60:
+                    entities.load()
+                    recent_keywords.load()
+                    last_reload = mono
+                if mono - last_report >= REPORT_INTERVAL_MIN * 60:
+                    self._report()
+                    last_report = mono
+
+                self.stop_event.wait(TICK_SEC)
+            # with 블록을 벗어나면서 진행 중인 카테고리가 끝날 때까지 기다립니다.
+
+        database.flush_pending_writes()
+        http_client.close_all()
+        print(f"\n" + "="*50)
+        print(f"🎉 Daemon Stopped.")
+        print(f"📊 Summary | Success: {self.results['success']} | Failed: {self.results['failed']} | Skipped: {self.results['skipped']}")
+        self._report()
+        print(f"⏰ Finished at: {datetime.now()} (UTC)")
+        print(f"="*50)
+
+def main():
+    scheduler = Scheduler()
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    scheduler.run()
+
+if __name__ == "__main__":
+    main()
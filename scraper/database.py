@@ -1,13 +1,22 @@
 import os
+import threading
 from datetime import datetime, timedelta
 from supabase import create_client, Client
-from dotenv import load_dotenv
-
-# 상위 폴더의 .env 로드
-load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
+import config
+import resilience
+import metrics
+import archive_store
+import rankings_diff
+from write_behind import WriteBehindSink
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# anon 키로는 쓸 수 없는 경로(피드 스냅샷 발행, 썸네일 업로드)에만 사용하는 service_role 키. 웹에는 배포하지 않습니다.
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+# search_archive 원문을 archive_blobs에 압축/중복 제거하여 저장할지 여부
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "1") == "1"
+# 썸네일을 올릴 Supabase Storage 공개 버킷 (IMAGE_STORE=supabase)
+IMAGE_BUCKET = os.getenv("IMAGE_BUCKET", "thumbnails")
 
 supabase: Client = None
 try:
@@ -18,65 +27,306 @@ try:
 except Exception as e:
     print(f"🚨 Supabase Connection Error: {e}")
 
+service_supabase: Client = None
+try:
+    if SUPABASE_URL and SUPABASE_SERVICE_KEY:
+        service_supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+except Exception as e:
+    print(f"🚨 Supabase Service Connection Error: {e}")
+
+def _execute(query, op, idempotent=True):
+    """
+    Supabase 쿼리를 공용 재시도/차단기 정책으로 실행합니다. (op: 측정용 작업 이름)
+    insert처럼 두 번 보내면 중복이 생기는 쿼리는 idempotent=False로 호출합니다.
+    """
+    with metrics.span(f"supabase.{op}"):
+        return resilience.call("supabase", query.execute, idempotent=idempotent)
+
+def _insert_rows(table, rows):
+    """[지연 쓰기용] 여러 행을 한 번의 insert로 저장합니다. 실패하면 예외를 그대로 올립니다."""
+    if table == "archive_blobs":
+        # 같은 내용은 이미 저장되어 있으므로 충돌 시 무시합니다.
+        query = supabase.table(table).upsert(rows, on_conflict="hash", ignore_duplicates=True)
+        _execute(query, f"write_behind.{table}")
+    else:
+        _execute(supabase.table(table).insert(rows), f"write_behind.{table}", idempotent=False)
+
+def _should_spill(table, e):
+    """
+    [지연 쓰기] 실패한 행을 디스크에 남겨 다시 보낼지 판단합니다.
+    archive_blobs(upsert) 외에는 insert이므로, 서버에 닿지 않았음이 분명한 오류만 다시 보냅니다.
+    """
+    return resilience.is_transient_error(e, idempotent=(table == "archive_blobs"))
+
+# search_archive / error_logs 는 기사 발행 경로를 막지 않도록 모아서 저장합니다.
+archive_sink = WriteBehindSink(_insert_rows, should_spill=_should_spill)
+
 def save_error_log(error_data):
     """
-    [디버깅용] AI 파싱 실패 시 원문 및 에러 메시지를 error_logs 테이블에 저장
+    [디버깅용] AI 파싱 실패 시 원문 및 에러 메시지를 error_logs 테이블에 저장 (지연 쓰기)
     """
     if not supabase or not error_data: return
 
-    try:
-        supabase.table("error_logs").insert(error_data).execute()
-        print(f"📁 [Debug] AI Response raw data logged to 'error_logs'.")
-    except Exception as e:
-        print(f"🚨 [Debug Error] Failed to save error log: {e}")
+    archive_sink.enqueue("error_logs", [error_data])
+    print(f"📁 [Debug] AI Response raw data queued for 'error_logs'.")
 
 def save_search_archive(archive_data):
     """
-    [검색 기록용] AI가 검색한 원문 전체와 질문(Task)을 search_archive 테이블에 저장
+    [검색 기록용] AI가 검색한 원문 전체와 질문(Task)을 search_archive 테이블에 저장 (지연 쓰기)
     """
     if not supabase or not archive_data: return
 
+    raw_text = archive_data.get("raw_result")
+    if ARCHIVE_COMPRESSION and isinstance(raw_text, str) and raw_text:
+        # 원문은 archive_blobs에 압축해 한 번만 저장하고, search_archive에는 해시만 남깁니다.
+        raw_hash = _store_archive_blob(raw_text)
+        archive_data = dict(archive_data, raw_result=None, raw_hash=raw_hash)
+
+    # search_archive 테이블에 질문(query)과 원문(raw_result) 등을 저장합니다.
+    archive_sink.enqueue("search_archive", [archive_data])
+    print(f"📂 [Archive] Queued AI raw search result for 'search_archive'.")
+
+def save_ai_usage(usage_data):
+    """
+    [비용 관리용] AI 호출 1건의 토큰 사용량/비용/지연을 ai_usage 테이블에 저장 (지연 쓰기)
+    """
+    if not supabase or not usage_data: return
+
+    archive_sink.enqueue("ai_usage", [usage_data])
+
+_archive_lock = threading.Lock()
+_archive_dict = {"loaded": False, "id": None, "dictionary": None}
+_archive_dicts = {}
+_archive_hashes = set()
+
+def get_archive_dictionary():
+    """가장 최근에 학습된 압축 사전을 한 번만 조회해 재사용합니다. 없으면 (None, None)"""
+    with _archive_lock:
+        if not _archive_dict["loaded"]:
+            _archive_dict["loaded"] = True
+            try:
+                res = _execute(supabase.table("archive_dictionaries")\
+                    .select("id, dictionary")\
+                    .order("created_at", desc=True)\
+                    .limit(1), "fetch_archive_dictionary")
+                if res.data:
+                    row = res.data[0]
+                    _archive_dict["id"] = row["id"]
+                    _archive_dict["dictionary"] = archive_store.decode_dictionary(row["dictionary"])
+                    _archive_dicts[row["id"]] = _archive_dict["dictionary"]
+            except Exception as e:
+                print(f"    ⚠️ [Archive] Dictionary load failed, compressing without it: {e}")
+        return _archive_dict["id"], _archive_dict["dictionary"]
+
+def _store_archive_blob(raw_text):
+    """원문을 압축해 archive_blobs에 넣고(이번 실행에서 처음 본 내용만) 내용 해시를 반환합니다."""
+    raw_hash = archive_store.content_hash(raw_text)
+    with _archive_lock:
+        if raw_hash in _archive_hashes:
+            return raw_hash
+        _archive_hashes.add(raw_hash)
+
+    dict_id, dictionary = get_archive_dictionary()
+    archive_sink.enqueue("archive_blobs", [archive_store.build_blob(raw_text, dictionary, dict_id)])
+    return raw_hash
+
+def save_archive_dictionary(dictionary, sample_count):
+    """[압축 사전] 학습한 사전을 archive_dictionaries에 저장하고 id를 반환합니다."""
+    if not supabase: return None
+
+    dict_id = archive_store.dictionary_id(dictionary)
+    _execute(supabase.table("archive_dictionaries").upsert({
+        "id": dict_id,
+        "dictionary": archive_store.encode_dictionary(dictionary),
+        "sample_count": sample_count,
+    }, on_conflict="id", ignore_duplicates=True), "save_archive_dictionary")
+    with _archive_lock:
+        _archive_dicts[dict_id] = dictionary
+        _archive_dict.update({"loaded": True, "id": dict_id, "dictionary": dictionary})
+    return dict_id
+
+def _archive_dictionary(dict_id):
+    if not dict_id: return None
+    with _archive_lock:
+        if dict_id in _archive_dicts:
+            return _archive_dicts[dict_id]
+    res = _execute(supabase.table("archive_dictionaries")\
+        .select("dictionary")\
+        .eq("id", dict_id), "fetch_archive_dictionary")
+    if not res.data:
+        raise KeyError(f"archive dictionary {dict_id} not found")
+    dictionary = archive_store.decode_dictionary(res.data[0]["dictionary"])
+    with _archive_lock:
+        _archive_dicts[dict_id] = dictionary
+    return dictionary
+
+def fetch_archive_raw(hashes):
+    """[원문 조회] 내용 해시 목록을 받아 {hash: 원문} 을 반환합니다. (압축 해제 포함)"""
+    hashes = [h for h in set(hashes or []) if h]
+    if not supabase or not hashes: return {}
+
+    result = {}
     try:
-        # search_archive 테이블에 질문(query)과 원문(raw_result) 등을 저장합니다.
-        supabase.table("search_archive").insert(archive_data).execute()
-        print(f"📂 [Archive] Saved AI raw search result to 'search_archive'.")
+        for start in range(0, len(hashes), 100):
+            res = _execute(supabase.table("archive_blobs")\
+                .select("hash, dict_id, data")\
+                .in_("hash", hashes[start:start + 100]), "fetch_archive_raw")
+            for row in res.data or []:
+                result[row["hash"]] = archive_store.decompress(row["data"], _archive_dictionary(row.get("dict_id")))
     except Exception as e:
-        # 테이블 구조가 다르거나 컬럼이 없을 경우를 대비한 에러 메시지
-        print(f"⚠️ DB Save Error (search_archive): {e}")
+        print(f"    ⚠️ DB Read Error (archive_blobs): {e}")
+    return result
 
-def is_keyword_used_recently(category, keyword, hours=4):
+def resolve_archive_rows(rows):
     """
-    [도배 방지] 해당 카테고리에서 특정 키워드가 최근 N시간 내에 사용되었는지 확인
+    [원문 조회] search_archive 행 목록의 raw_result를 채워 반환합니다.
+    압축 저장된 행(raw_hash)과 예전 방식의 행(raw_result)을 모두 같은 모양으로 돌려줍니다.
     """
-    if not supabase: return False
-    
+    raw_by_hash = fetch_archive_raw([r.get("raw_hash") for r in rows if not r.get("raw_result")])
+    resolved = []
+    for row in rows:
+        if not row.get("raw_result") and row.get("raw_hash"):
+            row = dict(row, raw_result=raw_by_hash.get(row["raw_hash"]))
+        resolved.append(row)
+    return resolved
+
+def fetch_search_archive(limit=100, category=None):
+    """[원문 조회] 최근 search_archive 원문 기록을 압축 해제하여 반환합니다."""
+    if not supabase: return []
+
+    try:
+        query = supabase.table("search_archive")\
+            .select("id, category, query, raw_result, raw_hash, run_count, created_at")\
+            .or_("raw_result.not.is.null,raw_hash.not.is.null")
+        if category:
+            query = query.eq("category", category)
+        res = _execute(query.order("created_at", desc=True).limit(limit), "fetch_search_archive")
+        return resolve_archive_rows(res.data or [])
+    except Exception as e:
+        print(f"    ⚠️ DB Read Error (search_archive): {e}")
+        return []
+
+def fetch_uncompacted_archive(after_id=0, limit=200):
+    """[압축 이전용] 아직 raw_result 원문을 그대로 가진 search_archive 행을 id 순으로 조회"""
+    if not supabase: return []
+
+    try:
+        res = _execute(supabase.table("search_archive")\
+            .select("id, raw_result")\
+            .gt("id", after_id)\
+            .not_.is_("raw_result", "null")\
+            .is_("raw_hash", "null")\
+            .order("id")\
+            .limit(limit), "fetch_uncompacted_archive")
+        return res.data or []
+    except Exception as e:
+        print(f"    ⚠️ DB Read Error (search_archive): {e}")
+        return []
+
+def save_archive_blobs(blobs):
+    """[압축 이전용] archive_blobs를 바로 저장합니다. (지연 쓰기를 거치지 않음) 성공 여부를 반환"""
+    if not supabase or not blobs: return False
+
+    try:
+        _insert_rows("archive_blobs", blobs)
+        return True
+    except Exception as e:
+        print(f"    ⚠️ DB Save Error (archive_blobs): {e}")
+        return False
+
+def mark_archive_compacted(raw_hash, ids):
+    """[압축 이전용] 같은 원문을 가진 행들의 raw_result를 비우고 raw_hash로 연결합니다. 성공 여부를 반환"""
+    if not supabase or not ids: return False
+
+    try:
+        _execute(supabase.table("search_archive")\
+            .update({"raw_hash": raw_hash, "raw_result": None})\
+            .in_("id", list(ids)), "mark_archive_compacted")
+        return True
+    except Exception as e:
+        print(f"    ⚠️ DB Save Error (search_archive): {e}")
+        return False
+
+def replay_pending_writes():
+    """[지연 쓰기] 이전 실행에서 저장하지 못하고 디스크에 남긴 행을 다시 보냅니다."""
+    if not supabase: return
+
+    try:
+        archive_sink.replay()
+    except Exception as e:
+        print(f"⚠️ [Write-Behind] Replay Error: {e}")
+
+def flush_pending_writes():
+    """[지연 쓰기] 버퍼에 남은 행을 모두 저장합니다. 실행 종료 전에 호출합니다."""
+    archive_sink.close()
+
+def fetch_recent_keywords(hours=4):
+    """
+    [도배 방지 인덱스용] 최근 N시간 내 모든 카테고리의 (category, keyword, created_at)을 한 번에 조회
+    """
+    if not supabase: return []
+
     try:
         time_limit = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
-        
-        res = supabase.table("live_news")\
-            .select("id", count="exact")\
-            .eq("category", category)\
-            .eq("keyword", keyword)\
-            .gte("created_at", time_limit)\
-            .execute()
-            
-        return res.count > 0
+
+        res = _execute(supabase.table("live_news")\
+            .select("category, keyword, created_at")\
+            .gte("created_at", time_limit), "fetch_recent_keywords")
+
+        return res.data or []
     except Exception as e:
         print(f"    ⚠️ DB Check Error: {e}")
-        return False
+        return []
+
+def fetch_entity_history(limit=1000):
+    """
+    [인물 식별 인덱스용] live_news에 남아있는 (keyword, target_kr, entity_id)를 한 번에 조회
+    """
+    if not supabase: return []
+
+    try:
+        res = _execute(supabase.table("live_news")\
+            .select("keyword, target_kr, entity_id")\
+            .order("created_at", desc=True)\
+            .limit(limit), "fetch_entity_history")
+
+        return res.data or []
+    except Exception as e:
+        print(f"    ⚠️ DB Check Error: {e}")
+        return []
+
+def fetch_ai_usage(since):
+    """
+    [비용 관리용] since(ISO 시각) 이후의 AI 사용 기록을 조회 (오늘 지출과 카테고리별 출력 크기 계산용)
+    """
+    if not supabase: return []
+
+    try:
+        res = _execute(supabase.table("ai_usage")\
+            .select("category, prompt_tokens, completion_tokens, cost_usd, created_at")\
+            .gte("created_at", since)\
+            .order("created_at", desc=True)\
+            .limit(5000), "fetch_ai_usage")
+
+        return res.data or []
+    except Exception as e:
+        print(f"    ⚠️ DB Check Error: {e}")
+        return []
 
 def save_news_to_live(data_list):
-    """[메인 전시용] live_news 테이블에 저장"""
-    if not supabase or not data_list: return
+    """[메인 전시용] live_news 테이블에 저장 (여러 건은 한 번에 upsert). 성공 여부를 반환"""
+    if not supabase or not data_list: return False
 
     try:
-        supabase.table("live_news").upsert(data_list).execute()
+        _execute(supabase.table("live_news").upsert(data_list), "save_news_to_live", idempotent=False)
         print(f"    💾 [Live] Saved {len(data_list)} items to 'live_news'.")
+        return True
     except Exception as e:
         print(f"    ⚠️ DB Save Error (live_news): {e}")
+        return False
 
 def save_news_to_archive(data_list):
-    """[기사 보관용] 뉴스 기사 데이터를 search_archive 또는 별도 테이블에 복사 저장"""
+    """[기사 보관용] 뉴스 기사 데이터를 search_archive 또는 별도 테이블에 복사 저장 (지연 쓰기)"""
     if not supabase or not data_list: return
 
     try:
@@ -87,49 +337,171 @@ def save_news_to_archive(data_list):
                 del new_item['id']
             clean_data.append(new_item)
 
-        supabase.table("search_archive").insert(clean_data).execute()
-        print(f"    📦 [News Archive] Saved {len(clean_data)} items to 'search_archive'.")
+        archive_sink.enqueue("search_archive", clean_data)
+        print(f"    📦 [News Archive] Queued {len(clean_data)} items for 'search_archive'.")
     except Exception as e:
         print(f"    ⚠️ DB Save Error (news_to_archive): {e}")
 
+def fetch_live_rankings(category):
+    """[순위표] 한 카테고리의 현재 live_rankings 스냅샷 (변경분 계산용). 조회 실패 시 None"""
+    if not supabase: return []
+
+    try:
+        res = _execute(supabase.table("live_rankings")\
+            .select("id, category, rank, title_en, title_kr, title_key, score")\
+            .eq("category", category)\
+            .order("rank"), "fetch_live_rankings")
+
+        return res.data or []
+    except Exception as e:
+        print(f"    ⚠️ DB Check Error: {e}")
+        # 빈 목록으로 취급하면 기존 순위를 모두 새 항목으로 중복 삽입하게 됩니다.
+        return None
+
+def fetch_live_news_feed(category, limit=30):
+    """[피드 스냅샷] 웹 첫 화면과 같은 순서(score, 최신순)의 live_news. 조회 실패 시 None"""
+    if not supabase: return []
+
+    try:
+        res = _execute(supabase.table("live_news")\
+            .select("id, keyword, title, summary, link, image_url, score, created_at")\
+            .eq("category", category)\
+            .order("score", desc=True)\
+            .order("created_at", desc=True)\
+            .limit(limit), "fetch_live_news_feed")
+
+        return res.data or []
+    except Exception as e:
+        print(f"    ⚠️ DB Check Error: {e}")
+        return None
+
+def fetch_feed_snapshot_meta(category):
+    """[피드 스냅샷] 저장된 스냅샷의 (version, etag). 없으면 (0, None), 조회 실패 시 None"""
+    if not supabase: return None
+
+    try:
+        res = _execute(supabase.table("feed_snapshots")\
+            .select("version, etag")\
+            .eq("category", category)\
+            .limit(1), "fetch_feed_snapshot_meta")
+
+        if not res.data: return (0, None)
+        return (int(res.data[0].get("version") or 0), res.data[0].get("etag"))
+    except Exception as e:
+        print(f"    ⚠️ DB Check Error: {e}")
+        return None
+
+def save_feed_snapshot(snapshot):
+    """
+    [피드 스냅샷] publish_feed_snapshot RPC(service_role 전용)로 카테고리당 한 행을 저장합니다.
+    버전은 DB가 기존 값 + 1로 정하며, 저장된 버전을 반환합니다. (키가 없거나 실패하면 None)
+    """
+    if not snapshot: return None
+    if not service_supabase:
+        print(f"    ⚠️ [Feed Snapshot] SUPABASE_SERVICE_KEY missing, skipping publish.")
+        return None
+
+    try:
+        res = _execute(service_supabase.rpc("publish_feed_snapshot", {
+            "p_category": snapshot["category"],
+            "p_etag": snapshot["etag"],
+            "p_payload": snapshot["payload"],
+            "p_article_count": snapshot.get("article_count", 0),
+            "p_generated_at": snapshot.get("generated_at"),
+        }), "save_feed_snapshot")
+        return int(res.data) if res.data is not None else None
+    except Exception as e:
+        print(f"    ⚠️ DB Save Error (feed_snapshots): {e}")
+        return None
+
 def save_rankings_to_db(rank_list):
-    """[순위표] live_rankings 테이블에 저장 (기존 순위 삭제 후 갱신)"""
-    if not supabase or not rank_list: return
+    """
+    [순위표] live_rankings 테이블 갱신
+    현재 스냅샷과 비교해 진입/이동/이탈한 행만 apply_live_rankings_diff RPC로 한 번에 반영하고,
+    변동은 ranking_history에 남깁니다. 순위가 그대로면 아무것도 쓰지 않습니다.
+    순위표가 실제로 바뀌었는지를 반환합니다.
+    """
+    if not supabase or not rank_list: return False
 
     try:
         category = rank_list[0].get("category")
-        if category:
-            supabase.table("live_rankings").delete().eq("category", category).execute()
+        if not category: return False
 
-        supabase.table("live_rankings").insert(rank_list).execute()
-        print(f"    🏆 Updated rankings for {category}.")
+        current = fetch_live_rankings(category)
+        if current is None: return False
+        changes = rankings_diff.diff(current, rank_list)
+        if rankings_diff.is_empty(changes):
+            print(f"    🏆 Rankings unchanged for {category}.")
+            return False
+
+        _execute(supabase.rpc("apply_live_rankings_diff", {
+            "p_category": category,
+            "p_inserts": changes["inserts"],
+            "p_moves": changes["moves"],
+            "p_remove_ids": changes["removals"],
+            "p_history": [dict(h, category=category) for h in changes["history"]],
+        }), "save_rankings_to_db", idempotent=False)
+        print(f"    🏆 Updated rankings for {category} "
+              f"(+{len(changes['inserts'])} ~{len(changes['moves'])} -{len(changes['removals'])}).")
+        return True
         
     except Exception as e:
         print(f"    ⚠️ DB Save Error (live_rankings): {e}")
+        return False
 
 def cleanup_old_data(category, max_limit=30):
-    """[청소] live_news 테이블에서 오래된 데이터 삭제 (30개 유지)"""
+    """[청소] live_news 테이블에서 오래된 데이터 삭제 (30개 유지, trim_live_news RPC 1회 호출)"""
     if not supabase: return
 
     try:
-        res = supabase.table("live_news").select("id", count="exact").eq("category", category).execute()
-        count = res.count
-
-        if count > max_limit:
-            items_to_remove = count - max_limit
-            
-            old_rows = supabase.table("live_news")\
-                .select("id")\
-                .eq("category", category)\
-                .order("created_at", desc=False)\
-                .limit(items_to_remove)\
-                .execute()
-            
-            ids = [row['id'] for row in old_rows.data]
-            
-            if ids:
-                supabase.table("live_news").delete().in_("id", ids).execute()
-                print(f"    🧹 [Cleanup] Removed {len(ids)} old items from 'live_news'.")
+        res = _execute(supabase.rpc("trim_live_news", {"p_category": category, "p_max_rows": max_limit}), "cleanup_old_data")
+        if res.data:
+            print(f"    🧹 [Cleanup] Removed {res.data} old items from 'live_news'.")
                 
     except Exception as e:
         print(f"    ⚠️ Cleanup Error: {e}")
+
+def cleanup_all_old_data(max_limit=30):
+    """[청소] 모든 카테고리의 live_news를 한 번의 문장으로 정리 (trim_all_live_news RPC)"""
+    if not supabase: return
+
+    try:
+        res = _execute(supabase.rpc("trim_all_live_news", {"p_max_rows": max_limit}), "cleanup_all_old_data")
+        print(f"🧹 [Cleanup] Removed {res.data or 0} old items from 'live_news' (all categories).")
+
+    except Exception as e:
+        print(f"⚠️ Cleanup Error: {e}")
+
+def upload_image(name, data, content_type):
+    """
+    [썸네일] Storage 버킷에 파일을 올리고 공개 URL을 반환합니다. 이름이 내용 해시라 덮어써도 같습니다.
+    버킷 쓰기는 service_role에만 허용되므로 service 키 클라이언트로 올립니다.
+    """
+    if not service_supabase: return None
+
+    try:
+        bucket = service_supabase.storage.from_(IMAGE_BUCKET)
+        with metrics.span("supabase.upload_image"):
+            resilience.call("supabase", bucket.upload, name, data, {
+                "content-type": content_type,
+                "cache-control": "31536000",
+                "upsert": "true",
+            })
+        return bucket.get_public_url(name)
+    except Exception as e:
+        print(f"    ⚠️ Storage Upload Error ({name}): {e}")
+        return None
+
+def save_run_metrics(report):
+    """[실행 지표] 실행 종료 시 생성한 metrics 리포트를 run_metrics 테이블에 저장"""
+    if not supabase or not report: return
+
+    try:
+        _execute(supabase.table("run_metrics").insert({
+            "started_at": report.get("started_at"),
+            "duration_sec": report.get("duration_sec"),
+            "report": report
+        }), "save_run_metrics", idempotent=False)
+        print(f"📈 [Metrics] Saved run report to 'run_metrics'.")
+    except Exception as e:
+        print(f"⚠️ DB Save Error (run_metrics): {e}")
@@ -0,0 +1,156 @@
+import os
+import config
+import time
+import threading
+import database
+from keyword_index import normalize_keyword
+
+# 한 번 발행한 인물을 다른 카테고리에서 건너뛰는 시간 창 (초, 실행 1회 또는 상주 모드 한 주기)
+CLAIM_TTL_SEC = float(os.getenv("ENTITY_CLAIM_TTL_SEC", "1800"))
+# 0이면 카테고리 간 중복 발행을 허용하고 이미지 조회만 공유합니다.
+CROSS_CATEGORY_DEDUP = os.getenv("ENTITY_CROSS_CATEGORY_DEDUP", "1") == "1"
+
+class _Shared:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.created_at = time.time()
+
+class EntityIndex:
+    """
+    [인물 식별 인덱스] 한글 이름 ↔ 영문 이름 ↔ 로마자 변형을 하나의 인물 ID로 묶습니다.
+    - live_news 기록(keyword, target_kr, entity_id)으로 별칭을 미리 학습하고, 새 기사도 resolve()로 반영합니다.
+    - 같은 한글 이름으로 연결된 영문 표기들은 하나의 ID로 합쳐집니다. (union-find)
+    - 카테고리 간 발행 선점(claim)과 이미지 조회 결과 공유(shared)를 인물 ID 기준으로 처리합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._claims = {}
+        self._shared = {}
+        self._reset()
+
+    def _reset(self):
+        # 별칭 구조만 다시 만들고, 선점/공유 결과는 시간 창이 지난 것만 load()에서 정리합니다.
+        self._parent = {}
+        self._aliases = {}
+        self._members = {}
+
+    def clear(self):
+        """별칭/선점/공유 상태를 모두 비웁니다. (같은 프로세스에서 실행을 반복하는 벤치마크용)"""
+        with self._lock:
+            self._reset()
+            self._claims.clear()
+            self._shared.clear()
+
+    def load(self):
+        rows = database.fetch_entity_history()
+        now = time.time()
+        with self._lock:
+            self._reset()
+            self._claims = {k: v for k, v in self._claims.items() if now - v[1] < CLAIM_TTL_SEC}
+            self._shared = {k: v for k, v in self._shared.items() if now - v.created_at < CLAIM_TTL_SEC}
+            for row in rows:
+                self._link([row.get("keyword"), row.get("target_kr")], row.get("entity_id"))
+            count = len({self._find(e) for e in self._parent})
+        print(f"🧑‍🤝‍🧑 [Entity Index] Loaded {len(rows)} rows → {count} entities.")
+
+    def _find(self, entity_id):
+        root = entity_id
+        while self._parent.get(root, root) != root:
+            root = self._parent[root]
+        while entity_id != root:
+            self._parent[entity_id], entity_id = root, self._parent[entity_id]
+        return root
+
+    def _link(self, names, preferred_id=None):
+        keys = [k for k in (normalize_keyword(n) for n in names if n) if k]
+        if not keys and not preferred_id:
+            return ""
+
+        roots = {self._find(self._aliases[k]) for k in keys if k in self._aliases}
+        if preferred_id:
+            self._parent.setdefault(preferred_id, preferred_id)
+            roots.add(self._find(preferred_id))
+        # 이미 저장된 ID가 있으면 그대로 쓰고, 여러 개가 합쳐질 때는 가장 작은 값을 대표로 삼습니다.
+        canonical = min(roots) if roots else keys[0]
+        self._parent.setdefault(canonical, canonical)
+        members = self._members.setdefault(canonical, set())
+        for root in roots - {canonical}:
+            self._parent[root] = canonical
+            members |= self._members.pop(root, set())
+        for key in keys:
+            self._aliases[key] = canonical
+            members.add(key)
+        return canonical
+
+    def resolve(self, target_kr, target_en):
+        """한글/영문 이름을 인물 ID로 변환합니다. 처음 보는 인물이면 새 ID를 만듭니다."""
+        with self._lock:
+            return self._link([target_en, target_kr])
+
+    def aliases(self, entity_id):
+        """인물 ID에 연결된 모든 비교용 이름 키"""
+        with self._lock:
+            root = self._find(entity_id)
+            return set(self._members.get(root, ())) | {root}
+
+    def claim(self, entity_id, category):
+        """
+        [카테고리 간 중복 방지] 인물을 이 카테고리에서 발행하겠다고 선점합니다.
+        다른 카테고리가 이미 선점했다면 그 카테고리 이름을, 아니면 None을 반환합니다.
+        저장에 실패하면 release()로 선점을 풀어야 합니다.
+        """
+        if not CROSS_CATEGORY_DEDUP: return None
+        now = time.time()
+        with self._lock:
+            root = self._find(entity_id)
+            owner = self._claims.get(root)
+            if owner and owner[0] != category and now - owner[1] < CLAIM_TTL_SEC:
+                return owner[0]
+            self._claims[root] = (category, now)
+            return None
+
+    def release(self, entity_id, category):
+        """[선점 해제] 저장에 실패한 기사의 선점을 풀어 다른 카테고리가 발행할 수 있게 합니다."""
+        with self._lock:
+            root = self._find(entity_id)
+            owner = self._claims.get(root)
+            if owner and owner[0] == category:
+                del self._claims[root]
+
+    def shared(self, entity_id, kind, fetch):
+        """
+        [결과 공유] 같은 인물에 대한 조회(kind: "image" 등)를 시간 창 안에서 한 번만 실행합니다.
+        진행 중인 조회가 있으면 그 결과를 기다려 함께 사용합니다.
+        진행 중인 조회가 예외로 끝나면 기다리던 쪽에도 같은 예외가 발생합니다.
+        """
+        with self._lock:
+            key = (self._find(entity_id), kind)
+            entry = self._shared.get(key)
+            owner = entry is None or (entry.done.is_set() and time.time() - entry.created_at >= CLAIM_TTL_SEC)
+            if owner:
+                entry = _Shared()
+                self._shared[key] = entry
+
+        if not owner:
+            entry.done.wait()
+            if entry.error is not None:
+                raise entry.error
+            return entry.value
+
+        try:
+            entry.value = fetch()
+            return entry.value
+        except Exception as e:
+            # 이미 기다리던 쪽에는 예외를 전달하고, 이후 요청은 다시 시도하게 합니다.
+            entry.error = e
+            with self._lock:
+                if self._shared.get(key) is entry:
+                    del self._shared[key]
+            raise
+        finally:
+            entry.done.set()
+
+entities = EntityIndex()
@@ -0,0 +1,97 @@
+import os
+import config
+import json
+import hashlib
+import threading
+from datetime import datetime, timezone
+import database
+
+# 웹 첫 화면과 같은 개수 (HomeClient: score 내림차순 30개, Sidebar: 순위 10개)
+ARTICLE_LIMIT = int(os.getenv("FEED_ARTICLE_LIMIT", "30"))
+RANKING_LIMIT = 10
+SNAPSHOTS_ENABLED = os.getenv("FEED_SNAPSHOTS", "1") == "1"
+
+# 스크래퍼가 만든 필드만 담습니다. 좋아요처럼 사용자가 바꾸는 값은 웹이 get_feed_snapshot으로 합쳐 씁니다.
+ARTICLE_FIELDS = ("id", "keyword", "title", "summary", "link", "image_url", "score", "created_at")
+
+_lock = threading.Lock()
+# 카테고리별 마지막으로 확인한 (version, etag). 같은 프로세스에서는 DB 조회 없이 비교합니다.
+_known = {}
+
+def build(category, news_rows, ranking_rows):
+    """
+    [스냅샷 생성] 웹이 그대로 그릴 수 있는 형태로 정렬/필터링을 미리 끝낸 피드
+    http:// 이미지는 https://로 바꿔 둡니다. (HomeClient.filterSecureNews와 같은 규칙)
+    """
+    articles = []
+    for row in news_rows[:ARTICLE_LIMIT]:
+        article = {field: row.get(field) for field in ARTICLE_FIELDS if row.get(field) is not None}
+        if article.get("image_url"):
+            article["image_url"] = article["image_url"].replace("http://", "https://", 1)
+        articles.append(article)
+
+    rankings = [{
+        "id": row.get("id"),
+        "rank": row.get("rank"),
+        "title": row.get("title_en"),
+        "title_kr": row.get("title_kr"),
+        "score": row.get("score"),
+    } for row in ranking_rows[:RANKING_LIMIT]]
+
+    return {"category": category, "articles": articles, "rankings": rankings}
+
+def etag(payload):
+    """내용(정렬된 JSON) 기준 해시. 생성 시각이 달라도 내용이 같으면 같은 값입니다."""
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:20]
+
+def publish(category, changed=True):
+    """
+    [피드 스냅샷 발행] 카테고리 처리가 끝난 뒤 호출합니다.
+    - changed=False이고 이미 스냅샷이 있으면 아무것도 조회/저장하지 않습니다.
+    - 새로 만든 스냅샷의 ETag가 기존과 같으면 저장하지 않습니다.
+    발행한 버전 번호를 반환합니다. (건너뛰거나 실패하면 None)
+    """
+    if not SNAPSHOTS_ENABLED or not database.supabase: return None
+    if not database.service_supabase:
+        # 발행 RPC는 service_role 키로만 호출할 수 있습니다.
+        return None
+
+    with _lock:
+        known = _known.get(category)
+    if known is None:
+        known = database.fetch_feed_snapshot_meta(category)
+        if known is None: return None
+    if not changed and known != (0, None):
+        return None
+
+    news_rows = database.fetch_live_news_feed(category, ARTICLE_LIMIT)
+    ranking_rows = database.fetch_live_rankings(category)
+    if news_rows is None or ranking_rows is None: return None
+
+    payload = build(category, news_rows, ranking_rows)
+    tag = etag(payload)
+    version, current_tag = known
+    if tag == current_tag:
+        with _lock:
+            _known[category] = known
+        print(f"    🧾 [Feed Snapshot] {category} unchanged (v{version}).")
+        return None
+
+    version = database.save_feed_snapshot({
+        "category": category,
+        "etag": tag,
+        "payload": payload,
+        "article_count": len(payload["articles"]),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    })
+    if version is None:
+        # 저장 여부를 알 수 없으므로 다음에는 DB에서 다시 확인합니다.
+        with _lock:
+            _known.pop(category, None)
+        return None
+
+    with _lock:
+        _known[category] = (version, tag)
+    print(f"    🧾 [Feed Snapshot] {category} v{version} published ({len(payload['articles'])} articles, etag {tag}).")
+    return version
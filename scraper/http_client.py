@@ -0,0 +1,62 @@
+import os
+import config
+import threading
+import httpx
+
+# ✅ 외부 API 접속 설정을 한 곳에서 관리합니다.
+# base_url은 환경변수로 덮어쓸 수 있어 로컬 스텁 서버로 대체할 수 있습니다.
+SERVICES = {
+    "perplexity": {
+        "base_url": os.getenv("PERPLEXITY_API_BASE", "https://api.perplexity.ai"),
+        "timeout": httpx.Timeout(60.0, connect=10.0),
+        "max_connections": int(os.getenv("PERPLEXITY_MAX_CONNECTIONS", "5")),
+    },
+    "naver": {
+        "base_url": os.getenv("NAVER_API_BASE", "https://openapi.naver.com"),
+        "timeout": httpx.Timeout(5.0),
+        "max_connections": int(os.getenv("NAVER_MAX_CONNECTIONS", "10")),
+    },
+    # 이미지 후보 확인/원본 다운로드 (여러 외부 호스트, 절대 URL로 호출)
+    "images": {
+        "base_url": "",
+        "timeout": httpx.Timeout(10.0, connect=5.0),
+        "max_connections": int(os.getenv("IMAGE_MAX_CONNECTIONS", "10")),
+        "follow_redirects": True,
+    },
+}
+
+_clients = {}
+_lock = threading.Lock()
+
+def _client_options(service, headers):
+    conf = SERVICES[service]
+    limits = httpx.Limits(
+        max_connections=conf["max_connections"],
+        max_keepalive_connections=conf["max_connections"],
+    )
+    return {
+        "base_url": conf["base_url"],
+        "timeout": conf["timeout"],
+        "limits": limits,
+        "headers": headers or {},
+        "follow_redirects": conf.get("follow_redirects", False),
+    }
+
+def get_client(service, headers=None):
+    """
+    [공용 HTTP 클라이언트] 서비스(호스트)별로 keep-alive 연결을 재사용하는 동기 클라이언트
+    headers는 처음 생성될 때 한 번만 적용됩니다.
+    """
+    with _lock:
+        client = _clients.get(service)
+        if client is None or client.is_closed:
+            client = httpx.Client(**_client_options(service, headers))
+            _clients[service] = client
+        return client
+
+def close_all():
+    """실행 종료 시 열린 연결을 정리합니다."""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,231 @@
+import os
+import config
+import io
+import math
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import http_client
+import metrics
+from lookup_cache import lookup_cache, CACHE_DIR
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow가 없으면 후보 검증만 하고 원본 URL을 사용합니다.
+    Image = None
+
+# 후보 선택 기준
+REQUIRE_HTTPS = os.getenv("IMAGE_REQUIRE_HTTPS", "1") == "1"
+TARGET_ASPECT = float(os.getenv("IMAGE_TARGET_ASPECT", "1.333"))  # 가로/세로 (카드 레이아웃 기준)
+MIN_SIDE = int(os.getenv("IMAGE_MIN_SIDE", "300"))
+GOOD_SIDE = int(os.getenv("IMAGE_GOOD_SIDE", "800"))
+MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+# 점수 순으로 몇 개씩 동시에 HEAD 확인할지 (앞 묶음에서 통과하면 나머지는 확인하지 않음)
+CHECK_BATCH = int(os.getenv("IMAGE_CHECK_BATCH", "3"))
+
+# 썸네일 저장소: off(원본 URL 사용) / local(IMAGE_STORE_DIR + IMAGE_PUBLIC_BASE_URL) / supabase(Storage 버킷)
+# supabase는 service_role 키(SUPABASE_SERVICE_KEY)가 있어야 업로드할 수 있습니다. (저장 실패 시 원본 URL로 대체)
+STORE = os.getenv("IMAGE_STORE", "off")
+STORE_DIR = os.getenv("IMAGE_STORE_DIR", os.path.join(CACHE_DIR, "images"))
+PUBLIC_BASE_URL = os.getenv("IMAGE_PUBLIC_BASE_URL", "").rstrip("/")
+# 첫 번째 폭이 image_url로 쓰이는 대표 썸네일입니다.
+THUMB_WIDTHS = [int(w) for w in os.getenv("IMAGE_THUMB_WIDTHS", "800,320").split(",") if w.strip()]
+WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "78"))
+
+def _client():
+    return http_client.get_client("images")
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def score(item, rank=0):
+    """
+    [후보 점수] 해상도(짧은 변 기준)와 목표 비율과의 차이로 점수를 매깁니다.
+    검색 순위(rank)는 동점일 때만 영향을 주도록 작게 반영합니다. 부적합하면 None
+    """
+    link = item.get("link", "")
+    if not link.startswith("https://") and (REQUIRE_HTTPS or not link.startswith("http://")):
+        return None
+
+    width, height = _to_int(item.get("sizewidth")), _to_int(item.get("sizeheight"))
+    if width and height:
+        if min(width, height) < MIN_SIDE:
+            return None
+        aspect = width / height
+        if aspect > 3 or aspect < 1 / 3:
+            return None
+        size_score = min(1.0, min(width, height) / GOOD_SIDE)
+        aspect_penalty = abs(math.log(aspect / TARGET_ASPECT))
+    else:
+        # 크기 정보가 없으면 중간 점수로 취급합니다.
+        size_score, aspect_penalty = 0.5, 0.5
+    return size_score - 0.5 * aspect_penalty - 0.01 * rank
+
+def rank_candidates(items):
+    """점수가 높은 순으로 정렬한 후보 링크 목록"""
+    scored = []
+    for rank, item in enumerate(items or []):
+        s = score(item, rank)
+        if s is not None:
+            scored.append((s, rank, item["link"]))
+    return [link for _, _, link in sorted(scored, key=lambda t: (-t[0], t[1]))]
+
+def check(url):
+    """
+    [후보 확인] HEAD 요청으로 살아있는 이미지인지 확인합니다.
+    (통과 여부, 확정 여부)를 반환하며, 연결 오류는 확정하지 않습니다. (다음 실행에서 다시 시도)
+    """
+    try:
+        with metrics.span("image.head") as span:
+            resp = _client().head(url)
+            if resp.status_code in (405, 501):
+                # HEAD를 지원하지 않는 서버는 본문을 받지 않고 헤더만 확인합니다.
+                with _client().stream("GET", url) as streamed:
+                    resp = streamed
+            if resp.status_code != 200:
+                span.fail()
+    except Exception as e:
+        print(f"   ⚠️ [Image Check] {url[:80]} unreachable: {e}")
+        return False, False
+
+    content_type = resp.headers.get("Content-Type", "")
+    length = _to_int(resp.headers.get("Content-Length"))
+    ok = resp.status_code == 200 and content_type.startswith("image/") and length <= MAX_BYTES
+    return ok, True
+
+def choose(items):
+    """
+    [이미지 선택] 점수 순으로 CHECK_BATCH개씩 동시에 확인하여 가장 좋은 살아있는 이미지를 고릅니다.
+    (URL, 캐시 가능 여부)를 반환합니다.
+    """
+    links = rank_candidates(items)
+    if not links:
+        return "", True
+
+    category = metrics.current_category()
+    def _check(url):
+        with metrics.category(category):
+            return check(url)
+
+    definitive = True
+    with ThreadPoolExecutor(max_workers=max(1, CHECK_BATCH), thread_name_prefix="image-check") as pool:
+        for start in range(0, len(links), CHECK_BATCH):
+            batch = links[start:start + CHECK_BATCH]
+            for url, (ok, sure) in zip(batch, pool.map(_check, batch)):
+                if ok:
+                    return url, True
+                definitive = definitive and sure
+    return "", definitive
+
+def _download(url):
+    """원본을 한 번만 받아옵니다. MAX_BYTES를 넘으면 중단합니다."""
+    with metrics.span("image.fetch") as span:
+        with _client().stream("GET", url) as resp:
+            if resp.status_code != 200:
+                span.fail()
+                return None
+            chunks, total = [], 0
+            for chunk in resp.iter_bytes():
+                total += len(chunk)
+                if total > MAX_BYTES:
+                    span.fail()
+                    return None
+                chunks.append(chunk)
+            span.add_bytes(total)
+            return b"".join(chunks)
+
+def make_thumbnails(data, widths=None):
+    """원본 바이트로 폭별 WebP 썸네일을 만듭니다. 원본보다 크게 늘리지 않습니다. {폭: bytes}"""
+    with metrics.span("image.thumb"):
+        source = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        source = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+        thumbs = {}
+        for width in widths or THUMB_WIDTHS:
+            img = source.copy()
+            if img.width > width:
+                img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+            buf = io.BytesIO()
+            img.save(buf, "WEBP", quality=WEBP_QUALITY, method=4)
+            thumbs[width] = buf.getvalue()
+        return thumbs
+
+def _save_local(name, data):
+    path = os.path.join(STORE_DIR, name)
+    if not os.path.exists(path):
+        os.makedirs(STORE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return f"{PUBLIC_BASE_URL}/{name}"
+
+# 저장소에 한 번 실패하면 이번 실행 동안은 원본 URL을 사용합니다. (버킷 미설정 등)
+_store_failed = False
+
+def _save(name, data):
+    global _store_failed
+    saved = None
+    if STORE == "local":
+        saved = _save_local(name, data)
+    elif STORE == "supabase":
+        import database
+        saved = database.upload_image(name, data, "image/webp")
+    if not saved and not _store_failed:
+        _store_failed = True
+        print(f"⚠️ [Image] IMAGE_STORE={STORE} upload failed. Using original URLs for the rest of this run.")
+    return saved
+
+def store_enabled():
+    if STORE not in ("local", "supabase") or Image is None or _store_failed:
+        return False
+    if STORE == "supabase":
+        import database
+        return database.service_supabase is not None
+    return bool(PUBLIC_BASE_URL)
+
+if STORE != "off" and not store_enabled():
+    print(f"⚠️ [Image] IMAGE_STORE={STORE} needs Pillow (and IMAGE_PUBLIC_BASE_URL for local, SUPABASE_SERVICE_KEY for supabase). Using original URLs.")
+
+def publish(url):
+    """
+    [썸네일 발행] 선택된 원본을 받아 WebP 썸네일을 내용 주소(sha256) 이름으로 저장하고,
+    대표 썸네일 URL을 반환합니다. 실패하면 원본 URL을 그대로 반환합니다.
+    """
+    if not url or not store_enabled():
+        return url
+
+    hit, cached = lookup_cache.get("thumb", url)
+    if hit and cached:
+        return cached
+
+    try:
+        data = _download(url)
+        if not data:
+            return url
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        public_url = None
+        for width, thumb in make_thumbnails(data).items():
+            saved = _save(f"{digest}_{width}.webp", thumb)
+            if public_url is None:
+                public_url = saved
+        if not public_url:
+            return url
+        lookup_cache.set("thumb", url, public_url)
+        print(f"   🖼️ [Thumbnail] {len(data) // 1024}KB -> {public_url}")
+        return public_url
+    except Exception as e:
+        print(f"   ⚠️ [Thumbnail Error] {url[:80]}: {e}")
+        return url
+
+def process(items):
+    """
+    [이미지 단계] 후보 선택 + 썸네일 발행. (최종 URL, 캐시 가능 여부)
+    썸네일 저장에 실패해 원본 URL로 대체한 결과는 캐시하지 않습니다. (저장소가 복구되면 다시 발행)
+    """
+    url, cacheable = choose(items)
+    if not url or not store_enabled():
+        return url, cacheable
+    published = publish(url)
+    return published, cacheable and published != url
@@ -0,0 +1,114 @@
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+import database
+
+# 영문 성씨의 대표적인 로마자 표기 변형을 하나로 통일합니다.
+SURNAME_VARIANTS = {
+    "yi": "lee", "rhee": "lee", "ri": "lee",
+    "pak": "park", "bak": "park",
+    "gim": "kim",
+    "jung": "jeong", "chung": "jeong", "chong": "jeong",
+    "choe": "choi", "chwe": "choi",
+    "yun": "yoon",
+    "gang": "kang",
+    "jo": "cho",
+    "im": "lim", "yim": "lim",
+    "sin": "shin",
+    "seo": "suh",
+    "o": "oh",
+    "an": "ahn",
+    "ryu": "yoo", "yu": "yoo", "you": "yoo",
+}
+
+# 성씨로 취급할 표기 (이름 순서가 바뀐 경우 성을 앞으로 정렬하기 위함)
+SURNAMES = set(SURNAME_VARIANTS.values()) | {
+    "jang", "han", "kwon", "hwang", "song", "hong", "jeon", "moon",
+    "son", "bae", "baek", "heo", "nam", "ha", "kwak", "sung", "cha", "joo", "woo", "min",
+}
+
+def normalize_keyword(keyword):
+    """
+    [키워드 정규화] 대소문자/공백/하이픈/괄호 표기와 성씨 로마자 변형을 통일한 비교용 키
+    예) 'Lee Ji-eun', 'Jieun Lee', 'YI JI EUN' → 같은 키
+    """
+    if not keyword: return ""
+    text = re.sub(r"\(.*?\)", " ", str(keyword)).lower()
+    text = re.sub(r"[-_.·']", "", text)
+    tokens = re.findall(r"[0-9a-z]+|[^\s0-9a-z]+", text)
+    if len(tokens) > 1:
+        # 성씨 변형은 성 자리의 토큰에만 적용합니다. (이름 음절 'yu', 'ri' 등은 그대로 둠)
+        first, last = (SURNAME_VARIANTS.get(t, t) for t in (tokens[0], tokens[-1]))
+        if first in SURNAMES:
+            tokens = [first] + tokens[1:]
+        elif last in SURNAMES:
+            # 'Jieun Lee' 처럼 성이 뒤에 온 경우 앞으로 옮깁니다.
+            tokens = [last] + tokens[:-1]
+    return "".join(tokens)
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+class RecentKeywordIndex:
+    """
+    [도배 방지 인덱스] 최근 N시간 내 (카테고리, 키워드) 발행 기록을 메모리에 보관합니다.
+    실행 시작 시 한 번만 조회하고, 이후 저장되는 기사는 add()로 반영합니다.
+    """
+
+    def __init__(self, hours=4):
+        self.hours = hours
+        self._entries = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        rows = database.fetch_recent_keywords(self.hours)
+        with self._lock:
+            self._entries = {}
+            for row in rows:
+                try:
+                    self._add(row["category"], row["keyword"], _parse_time(row["created_at"]))
+                except Exception:
+                    continue
+            self._loaded = True
+        print(f"🗂️ [Keyword Index] Loaded {len(rows)} recent keywords (last {self.hours}h).")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _add(self, category, keyword, created_at):
+        key = (category, normalize_keyword(keyword))
+        if not key[1]: return
+        prev = self._entries.get(key)
+        if prev is None or created_at > prev:
+            self._entries[key] = created_at
+
+    def add(self, category, keyword, created_at=None):
+        """새로 저장한 기사의 키워드를 인덱스에 반영합니다."""
+        self._ensure_loaded()
+        with self._lock:
+            self._add(category, keyword, _parse_time(created_at) if created_at else datetime.utcnow())
+
+    def contains(self, category, keyword):
+        """해당 카테고리에서 키워드가 최근 N시간 내에 사용되었는지 확인합니다."""
+        self._ensure_loaded()
+        key = (category, normalize_keyword(keyword))
+        time_limit = datetime.utcnow() - timedelta(hours=self.hours)
+        with self._lock:
+            created_at = self._entries.get(key)
+            if created_at is None:
+                return False
+            if created_at < time_limit:
+                # 시간 창을 벗어난 기록은 정리합니다.
+                del self._entries[key]
+                return False
+            return True
+
+recent_keywords = RecentKeywordIndex()
@@ -0,0 +1,129 @@
+import os
+import config
+import json
+import time
+import sqlite3
+import threading
+
+CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache"))
+
+class LookupCache:
+    """
+    [조회 캐시] 실행 간에 유지되는 SQLite 기반 TTL/LRU 캐시
+    - 빈 결과도 짧은 TTL로 저장하여(negative caching) 같은 실패 조회를 반복하지 않습니다.
+    - namespace로 이미지/뉴스 검색 등 용도를 구분합니다.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, negative_ttl=6 * 3600, max_entries=5000):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS lookup_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS lookup_cache_accessed ON lookup_cache (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _count(self, namespace, field):
+        counter = self.stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        counter[field] += 1
+
+    def get(self, namespace, key):
+        """(적중 여부, 값)을 반환합니다. 만료된 항목은 삭제 후 miss로 처리합니다."""
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._db()
+                row = db.execute(
+                    "SELECT value, expires_at FROM lookup_cache WHERE namespace = ? AND key = ?",
+                    (namespace, key)
+                ).fetchone()
+                if row and row[1] > now:
+                    db.execute(
+                        "UPDATE lookup_cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                        (now, namespace, key)
+                    )
+                    db.commit()
+                    self._count(namespace, "hits")
+                    return True, json.loads(row[0])
+                if row:
+                    db.execute("DELETE FROM lookup_cache WHERE namespace = ? AND key = ?", (namespace, key))
+                    db.commit()
+            except Exception as e:
+                print(f"   ⚠️ [Cache Error] {e}")
+            self._count(namespace, "misses")
+            return False, None
+
+    def set(self, namespace, key, value):
+        """값을 저장합니다. 빈 값은 negative_ttl이 적용됩니다."""
+        now = time.time()
+        ttl = self.ttl if value else self.negative_ttl
+        with self._lock:
+            try:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO lookup_cache VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value, ensure_ascii=False), now + ttl, now)
+                )
+                self._evict(db)
+                db.commit()
+            except Exception as e:
+                print(f"   ⚠️ [Cache Error] {e}")
+
+    def _evict(self, db):
+        # 가장 오래 사용되지 않은 항목부터 max_entries 초과분을 삭제합니다. (LRU)
+        count = db.execute("SELECT COUNT(*) FROM lookup_cache").fetchone()[0]
+        if count > self.max_entries:
+            db.execute(
+                "DELETE FROM lookup_cache WHERE rowid IN "
+                "(SELECT rowid FROM lookup_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def invalidate(self, namespace, key):
+        """특정 항목(예: 이름 하나)을 캐시에서 제거합니다."""
+        with self._lock:
+            try:
+                db = self._db()
+                db.execute("DELETE FROM lookup_cache WHERE namespace = ? AND key = ?", (namespace, key))
+                db.commit()
+            except Exception as e:
+                print(f"   ⚠️ [Cache Error] {e}")
+
+    def report(self):
+        """실행 로그용 적중/미스 요약 문자열"""
+        parts = [
+            f"{ns} {c['hits']} hit / {c['misses']} miss"
+            for ns, c in sorted(self.stats.items())
+        ]
+        return ", ".join(parts) if parts else "no lookups"
+
+
+def normalize_key(text):
+    return " ".join(str(text).split()).lower()
+
+lookup_cache = LookupCache(
+    os.path.join(CACHE_DIR, "lookup_cache.sqlite3"),
+    ttl=float(os.getenv("IMAGE_CACHE_TTL_SEC", str(7 * 24 * 3600))),
+    negative_ttl=float(os.getenv("IMAGE_CACHE_NEGATIVE_TTL_SEC", str(6 * 3600))),
+    max_entries=int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "5000")),
+)
@@ -1,9 +1,41 @@
 import sys
-import time
 import os
-import random 
+import config
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import processor
+import http_client
+import database
+import resilience
+import metrics
+from budget import budget
+from lookup_cache import lookup_cache
+from keyword_index import recent_keywords
+from entity_index import entities
+from rate_limiter import TokenBucket
+
+# 동시에 처리할 카테고리 수 (1이면 기존처럼 순차 실행)
+MAX_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "5"))
+# Perplexity 호출 속도 제한 (분당 요청 수 / 순간 최대 요청 수)
+RATE_LIMIT_PER_MIN = float(os.getenv("SCRAPER_RATE_PER_MIN", "20"))
+RATE_LIMIT_BURST = int(os.getenv("SCRAPER_RATE_BURST", "3"))
+
+CATEGORIES = ["K-Pop", "K-Drama", "K-Movie", "K-Entertain", "K-Culture"]
+
+def process_category(category, run_count, limiter, idx, total):
+    """[작업 단위] 속도 제한 토큰을 받은 뒤 카테고리 하나를 처리합니다."""
+    waited = limiter.acquire()
+    metrics.observe("rate_limit.wait", waited, category)
+    if waited > 0:
+        print(f"💤 [Rate Limit] {category} waited {waited:.2f}s for a slot.")
+
+    # ✅ [보완 1] 현재 처리 중인 카테고리를 명확히 출력하여 추적성을 높입니다.
+    print(f"🏃 [{idx + 1}/{total}] Processing: {category}")
+
+    # [핵심] 해당 카테고리 프로세스 실행
+    # 내부 로직에서 AI 응답의 카테고리 태그보다 이 'category' 변수를 우선하도록 
+    # processor.run_category_process가 설계되어 있어야 합니다.
+    processor.run_category_process(category, run_count)
 
 def main():
     print(f"🤖 GitHub Action Scraper Started at {datetime.now()} (UTC)")
@@ -14,42 +46,60 @@ def main():
         run_count = 0
 
     # 2. 카테고리 설정
-    categories = ["K-Pop", "K-Drama", "K-Movie", "K-Entertain", "K-Culture"]
+    categories = CATEGORIES
     results = {"success": 0, "failed": 0}
 
     print(f"📊 Current Cycle Index: {run_count % 6} (Total Runs: {run_count})")
-    print(f"💡 Perplexity Paid Tier Mode: Optimized waiting times.")
-
-    for idx, category in enumerate(categories):
-        try:
-            print(f"\n" + "="*50)
-            # ✅ [보완 1] 현재 처리 중인 카테고리를 명확히 출력하여 추적성을 높입니다.
-            print(f"🏃 [{idx + 1}/{len(categories)}] Processing: {category}")
-            
-            # [핵심] 해당 카테고리 프로세스 실행
-            # 내부 로직에서 AI 응답의 카테고리 태그보다 이 'category' 변수를 우선하도록 
-            # processor.run_category_process가 설계되어 있어야 합니다.
-            processor.run_category_process(category, run_count)
-            
-            print(f"✅ Success: {category}")
-            results["success"] += 1
-            
-            if idx < len(categories) - 1:
-                # 유료 계정 안정권인 10~20초 유지
-                wait_sec = random.uniform(10, 20)
-                print(f"💤 [Safe Interval] Waiting {wait_sec:.2f}s for next category...")
-                time.sleep(wait_sec)
-            
-        except Exception as e:
-            # ✅ [보완 2] 에러 발생 시 어느 카테고리에서 났는지 더 상세히 출력합니다.
-            print(f"🚨 CRITICAL ERROR in {category}: {str(e)}")
-            results["failed"] += 1
-            # 하나가 실패해도 다음 카테고리는 계속 진행합니다.
-            continue
+    print(f"💡 Perplexity Paid Tier Mode: {MAX_CONCURRENCY} workers, {RATE_LIMIT_PER_MIN:g} req/min.")
+
+    # 최근 발행 키워드와 인물 별칭을 한 번에 불러와 중복 체크를 메모리에서 처리합니다.
+    entities.load()
+    recent_keywords.load()
+    # 지난 실행에서 저장하지 못한 보관/로그 행을 다시 보냅니다.
+    database.replay_pending_writes()
+    # 오늘 AI 지출과 카테고리별 출력 크기를 불러와 호출 전 예산 판단에 사용합니다.
+    budget.load()
+    budget.start_run()
+
+    # 고정 대기(sleep) 대신 모든 카테고리가 공유하는 토큰 버킷으로 호출 속도를 제한합니다.
+    limiter = TokenBucket(rate=RATE_LIMIT_PER_MIN / 60.0, capacity=RATE_LIMIT_BURST)
+    workers = max(1, min(MAX_CONCURRENCY, len(categories)))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="category") as pool:
+        futures = {
+            pool.submit(process_category, category, run_count, limiter, idx, len(categories)): category
+            for idx, category in enumerate(categories)
+        }
+
+        for future in as_completed(futures):
+            category = futures[future]
+            try:
+                future.result()
+                print(f"✅ Success: {category}")
+                results["success"] += 1
+            except Exception as e:
+                # ✅ [보완 2] 에러 발생 시 어느 카테고리에서 났는지 더 상세히 출력합니다.
+                print(f"🚨 CRITICAL ERROR in {category}: {str(e)}")
+                results["failed"] += 1
+                # 하나가 실패해도 나머지 카테고리는 계속 진행됩니다.
+
+    # 카테고리별 30개 유지: 모든 카테고리를 한 번의 호출로 정리합니다.
+    database.cleanup_all_old_data(max_limit=30)
+
+    # 지연 쓰기 버퍼에 남은 보관/로그 행을 모두 저장한 뒤 연결을 정리합니다.
+    database.flush_pending_writes()
+
+    # 재사용하던 keep-alive 연결을 정리합니다.
+    http_client.close_all()
 
     print(f"\n" + "="*50)
     print(f"🎉 Batch Processing Completed.")
     print(f"📊 Summary | Success: {results['success']} | Failed: {results['failed']}")
+    print(f"🗂️ Lookup Cache | {lookup_cache.report()}")
+    print(f"🛡️ Resilience | {resilience.report()}")
+    print(f"📂 Write-Behind | {database.archive_sink.report()}")
+    print(f"💸 AI Budget | {budget.report()}")
+    metrics.emit_report({"run_count": run_count, "results": results, "resilience": resilience.stats(), "budget": budget.stats()})
     print(f"⏰ Finished at: {datetime.now()} (UTC)")
     print(f"="*50)
     
@@ -0,0 +1,182 @@
+import os
+import config
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# SCRAPER_METRICS=0 이면 모든 측정이 아무 일도 하지 않는 객체로 대체됩니다.
+ENABLED = os.getenv("SCRAPER_METRICS", "1") != "0"
+
+# 지연 시간 히스토그램 구간 (ms, 마지막은 그 이상)
+BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_local = threading.local()
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+_started_at = datetime.utcnow()
+
+def _new_stat():
+    return {
+        "count": 0,
+        "errors": 0,
+        "bytes": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "samples": [],
+        "histogram": [0] * (len(BUCKETS_MS) + 1),
+    }
+
+def _record(stage, category, elapsed_ms, error=False, nbytes=0):
+    key = (stage, category or "-")
+    bucket = next((i for i, limit in enumerate(BUCKETS_MS) if elapsed_ms <= limit), len(BUCKETS_MS))
+    with _lock:
+        stat = _stages.setdefault(key, _new_stat())
+        stat["count"] += 1
+        stat["errors"] += int(error)
+        stat["bytes"] += nbytes
+        stat["total_ms"] += elapsed_ms
+        stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+        stat["samples"].append(elapsed_ms)
+        stat["histogram"][bucket] += 1
+
+class _Span:
+    __slots__ = ("stage", "category", "nbytes", "error", "_start")
+
+    def __init__(self, stage, category):
+        self.stage = stage
+        self.category = category
+        self.nbytes = 0
+        self.error = False
+
+    def add_bytes(self, n):
+        self.nbytes += n or 0
+
+    def fail(self):
+        """예외 없이 실패로 끝난 호출(HTTP 오류 응답 등)을 오류로 기록합니다."""
+        self.error = True
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        _record(self.stage, self.category, elapsed_ms, self.error or exc_type is not None, self.nbytes)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def add_bytes(self, n):
+        pass
+
+    def fail(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP = _NoopSpan()
+
+def current_category():
+    return getattr(_local, "category", None)
+
+@contextmanager
+def category(name):
+    """현재 스레드에서 기록되는 span에 카테고리를 붙입니다."""
+    prev = current_category()
+    _local.category = name
+    try:
+        yield
+    finally:
+        _local.category = prev
+
+def span(stage):
+    """[측정 구간] with metrics.span("naver.image") as s: ... 형태로 사용합니다."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(stage, current_category())
+
+def observe(stage, elapsed_sec, category_name=None):
+    """이미 측정된 시간(초)을 기록합니다. (예: 속도 제한 대기)"""
+    if ENABLED:
+        _record(stage, category_name or current_category(), elapsed_sec * 1000)
+
+def increment(name, n=1, category_name=None):
+    """시간이 없는 횟수 지표를 더합니다. (예: 파싱 진단 메시지 수)"""
+    if ENABLED and n:
+        key = (name, category_name or current_category() or "-")
+        with _lock:
+            _counters[key] = _counters.get(key, 0) + n
+
+def _percentile(sorted_samples, pct):
+    if not sorted_samples: return 0.0
+    idx = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[idx]
+
+def build_report(extra=None):
+    """실행 전체의 단계별/카테고리별 통계를 JSON 직렬화 가능한 dict로 반환합니다."""
+    finished_at = datetime.utcnow()
+    stages = []
+    with _lock:
+        items = sorted(_stages.items())
+        for (stage, category_name), stat in items:
+            samples = sorted(stat["samples"])
+            stages.append({
+                "stage": stage,
+                "category": category_name,
+                "count": stat["count"],
+                "errors": stat["errors"],
+                "bytes": stat["bytes"],
+                "total_ms": round(stat["total_ms"], 1),
+                "p50_ms": round(_percentile(samples, 50), 1),
+                "p95_ms": round(_percentile(samples, 95), 1),
+                "max_ms": round(stat["max_ms"], 1),
+                "histogram": stat["histogram"],
+            })
+        counters = [
+            {"name": name, "category": category_name, "count": count}
+            for (name, category_name), count in sorted(_counters.items())
+        ]
+    report = {
+        "started_at": _started_at.isoformat(),
+        "finished_at": finished_at.isoformat(),
+        "duration_sec": round((finished_at - _started_at).total_seconds(), 2),
+        "buckets_ms": list(BUCKETS_MS),
+        "stages": stages,
+        "counters": counters,
+    }
+    if extra:
+        report.update(extra)
+    return report
+
+def emit_report(extra=None):
+    """실행 종료 시 JSON 리포트를 출력하고, 설정된 경우 파일/Supabase에 저장합니다."""
+    if not ENABLED:
+        return None
+
+    report = build_report(extra)
+    print(f"📈 [Metrics] {json.dumps(report, ensure_ascii=False)}")
+
+    path = os.getenv("SCRAPER_METRICS_FILE")
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if os.getenv("SCRAPER_METRICS_PERSIST", "0") == "1":
+        import database
+        database.save_run_metrics(report)
+    return report
+
+def reset():
+    global _started_at
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+    _started_at = datetime.utcnow()
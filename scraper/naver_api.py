@@ -1,12 +1,44 @@
 import os
-import requests
-from dotenv import load_dotenv
+import config
+import http_client
+import image_pipeline
+import resilience
+import metrics
+from lookup_cache import lookup_cache, normalize_key
 
-# .env 로드
-load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
 CLIENT_ID = os.getenv("NAVER_CLIENT_ID")
 CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")
 
+# 인증 헤더는 한 번만 구성하여 공용 클라이언트에 실어 재사용합니다.
+HEADERS = {
+    "X-Naver-Client-Id": CLIENT_ID.strip(),
+    "X-Naver-Client-Secret": CLIENT_SECRET.strip()
+} if CLIENT_ID and CLIENT_SECRET else {}
+
+def _client():
+    return http_client.get_client("naver", headers=HEADERS)
+
+def _image_params(keyword):
+    return {
+        "query": keyword,
+        "display": int(os.getenv("IMAGE_CANDIDATES", "10")),  # 상위 N개 중 크기/비율/응답 확인 후 선택
+        "sort": "sim",    # 유사도순
+        "filter": "large" # 고화질 선호
+    }
+
+def _pick_image(resp):
+    """(이미지 URL, 캐시 가능 여부)를 반환합니다. API 오류는 캐시하지 않습니다."""
+    if resp.status_code == 200:
+        # 후보를 점수순으로 확인해 살아있는 이미지를 고르고, 설정된 경우 썸네일 URL로 바꿉니다.
+        return image_pipeline.process(resp.json().get('items', []))
+    else:
+        print(f"   🚨 [Naver API Fail] Status: {resp.status_code}")
+    return "", False
+
+def invalidate_image(keyword):
+    """특정 인물의 이미지 캐시를 삭제합니다. (잘못된 사진이 저장된 경우 등)"""
+    lookup_cache.invalidate("image", normalize_key(keyword))
+
 def get_target_image(keyword):
     """
     네이버 이미지 검색 API를 사용하여 키워드와 일치하는 가장 적합한 이미지 URL 반환
@@ -15,34 +47,22 @@ def get_target_image(keyword):
         print(f"   🚨 [Naver API Error] Credentials missing.")
         return ""
 
-    # 네이버 이미지 검색 엔드포인트
-    url = "https://openapi.naver.com/v1/search/image"
-    
-    headers = {
-        "X-Naver-Client-Id": CLIENT_ID.strip(),
-        "X-Naver-Client-Secret": CLIENT_SECRET.strip()
-    }
-    
-    params = {
-        "query": keyword,
-        "display": 5,     # 상위 5개 중 적합한 것 선택
-        "sort": "sim",    # 유사도순
-        "filter": "large" # 고화질 선호
-    }
+    cache_key = normalize_key(keyword)
+    hit, cached = lookup_cache.get("image", cache_key)
+    if hit:
+        return cached
 
     try:
-        resp = requests.get(url, headers=headers, params=params, timeout=5)
-        
-        if resp.status_code == 200:
-            items = resp.json().get('items', [])
-            for item in items:
-                img_url = item.get('link', '')
-                # 반드시 https://로 시작하는 원본 이미지만 허용
-                if img_url.startswith("https://"):
-                    return img_url
-        else:
-            print(f"   🚨 [Naver API Fail] Status: {resp.status_code}")
-            
+        with metrics.span("naver.image") as span:
+            resp = resilience.call("naver", _client().get, "/v1/search/image", params=_image_params(keyword),
+                                   timeout=http_client.SERVICES["naver"]["timeout"])
+            span.add_bytes(len(resp.content))
+            if resp.status_code != 200:
+                span.fail()
+        img_url, cacheable = _pick_image(resp)
+        if cacheable:
+            lookup_cache.set("image", cache_key, img_url)
+        return img_url
     except Exception as e:
         print(f"   🚨 [Naver Connection Error] {e}")
         
@@ -53,15 +73,23 @@ def search_news_api(keyword, display=10, sort='sim'):
     (옵션) 혹시 몰라 남겨두는 뉴스 검색 API
     이미지 검색 실패 시 뉴스 기사의 썸네일이라도 가져오기 위함
     """
-    url = "https://openapi.naver.com/v1/search/news.json"
-    headers = {
-        "X-Naver-Client-Id": CLIENT_ID.strip(),
-        "X-Naver-Client-Secret": CLIENT_SECRET.strip()
-    }
     params = {"query": keyword, "display": display, "sort": sort}
+    cache_key = f"{normalize_key(keyword)}|{display}|{sort}"
+    hit, cached = lookup_cache.get("news", cache_key)
+    if hit:
+        return cached
     
     try:
-        resp = requests.get(url, headers=headers, params=params, timeout=5)
-        return resp.json().get('items', []) if resp.status_code == 200 else []
+        with metrics.span("naver.news") as span:
+            resp = resilience.call("naver", _client().get, "/v1/search/news.json", params=params,
+                                   timeout=http_client.SERVICES["naver"]["timeout"])
+            span.add_bytes(len(resp.content))
+            if resp.status_code != 200:
+                span.fail()
+        if resp.status_code != 200:
+            return []
+        items = resp.json().get('items', [])
+        lookup_cache.set("news", cache_key, items)
+        return items
     except:
         return []
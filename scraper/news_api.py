@@ -1,25 +1,39 @@
 import os
-import requests
 import time
 import re
-from dotenv import load_dotenv
+import json
+import httpx
+import config
+import http_client
+import tag_parser
+import resilience
+import metrics
+import response_cache
+from budget import budget, PRIMARY_MODEL
 
-load_dotenv(os.path.join(os.path.dirname(__file__), '../.env'))
 API_KEY = os.getenv("PERPLEXITY_API_KEY")
 
-def ask_news_ai(prompt):
-    """Perplexity API를 사용하여 3개의 기사 리스트를 추출합니다."""
-    if not API_KEY: 
-        return None, "API_KEY_MISSING"
+HEADERS = {
+    "Authorization": f"Bearer {API_KEY.strip()}",
+    "Content-Type": "application/json"
+} if API_KEY else {}
+
+MODEL = PRIMARY_MODEL
+
+SYSTEM_PROMPT = "당신은 한국의 최신 연예/문화 뉴스를 정확하게 전달하는 전문 기자입니다. ##ARTICLE_START##와 ##ARTICLE_END## 태그를 사용하여 반드시 3개의 뉴스 기사 블록을 작성하세요."
+
+ARTICLE_START = "##ARTICLE_START##"
+ARTICLE_END = "##ARTICLE_END##"
+_START_RE = re.compile(re.escape(ARTICLE_START), re.IGNORECASE)
+_END_RE = re.compile(re.escape(ARTICLE_END), re.IGNORECASE)
 
-    url = "https://api.perplexity.ai/chat/completions"
-    
+def _build_payload(prompt, stream=False, plan=None):
     payload = {
-        "model": "sonar-pro", 
+        "model": plan.model if plan else MODEL,
         "messages": [
             {
                 "role": "system", 
-                "content": "당신은 한국의 최신 연예/문화 뉴스를 정확하게 전달하는 전문 기자입니다. ##ARTICLE_START##와 ##ARTICLE_END## 태그를 사용하여 반드시 3개의 뉴스 기사 블록을 작성하세요."
+                "content": SYSTEM_PROMPT
             },
             {"role": "user", "content": prompt}
         ],
@@ -27,54 +41,271 @@ def ask_news_ai(prompt):
         "top_p": 0.9,
         "return_citations": True
     }
+    if plan:
+        payload["max_tokens"] = plan.max_tokens
+    if stream:
+        payload["stream"] = True
+    return payload
 
-    headers = {
-        "Authorization": f"Bearer {API_KEY.strip()}",
-        "Content-Type": "application/json"
-    }
+def _cache_key(prompt, plan=None):
+    # max_tokens는 관측값에 따라 조금씩 바뀌므로 캐시 키에서 제외합니다. (모델은 포함)
+    payload = _build_payload(prompt, plan=plan)
+    payload.pop("max_tokens", None)
+    return response_cache.cache_key(payload)
+
+def parse_article_block(block):
+    """기사 블록 하나를 dict로 변환합니다. 필수 데이터(제목/본문)가 없으면 None"""
+    return tag_parser.parse_block(block)
+
+def _finish(parsed, raw_text):
+    # ✅ 파싱 결과(ParseResult)와 원문을 함께 반환합니다. 기사가 없으면 원문 대신 실패 사유를 돌려줍니다.
+    if len(parsed.articles) > 0:
+        return parsed, raw_text
+        
+    return parsed, f"PARSING_FAILED: 기사 블록을 찾을 수 없습니다. 원문: {raw_text[:200]}"
+
+def ask_news_ai(prompt, plan=None):
+    """
+    Perplexity API를 사용하여 3개의 기사 리스트를 추출합니다.
+    (ParseResult, 원문/에러)를 반환하며, 응답을 받지 못했으면 ParseResult 대신 None입니다.
+    plan(budget.plan의 결과)이 있으면 그 모델/max_tokens로 호출하고 응답 usage를 예산에 기록합니다.
+    """
+    if not API_KEY: 
+        budget.record(plan, None, 0.0)
+        return None, "API_KEY_MISSING"
 
+    usage = None
+    started = time.perf_counter()
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=60)
+        client = http_client.get_client("perplexity", headers=HEADERS)
+        with metrics.span("perplexity.chat") as span:
+            resp = resilience.call("perplexity", client.post, "/chat/completions", json=_build_payload(prompt, plan=plan),
+                                   timeout=http_client.SERVICES["perplexity"]["timeout"])
+            span.add_bytes(len(resp.content))
+            if resp.status_code != 200:
+                span.fail()
         
         if resp.status_code != 200:
             return None, f"HTTP_{resp.status_code}: {resp.text}"
 
         res_json = resp.json()
+        usage = res_json.get("usage")
         raw_text = res_json['choices'][0]['message']['content']
         
-        # ✅ [핵심 수정] ##ARTICLE_START## 블록 단위로 기사 3개를 분리합니다.
-        blocks = re.findall(r"##ARTICLE_START##(.*?)##ARTICLE_END##", raw_text, re.DOTALL | re.IGNORECASE)
-        
-        articles = []
-        
-        # 개별 블록 내에서 태그 정보를 추출하는 함수
-        def extract_tag(tag, text):
-            pattern = rf"##{tag}##\s*(.*?)(?=\s*##|$)"
-            match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            return match.group(1).strip() if match else None
-
-        for block in blocks:
-            article_data = {
-                'target_kr': extract_tag("TARGET_KR", block),
-                'target_en': extract_tag("TARGET_EN", block),
-                'headline': extract_tag("HEADLINE", block),
-                'content': extract_tag("CONTENT", block)
-            }
-            # 필수 데이터가 있는 경우에만 리스트에 추가
-            if article_data['headline'] and article_data['content']:
-                articles.append(article_data)
-
-        # 랭킹 데이터는 전체 원문에서 별도로 추출 (RANKINGS 태그 이후 끝까지)
-        raw_rankings = None
-        rankings_match = re.search(r"##RANKINGS##\s*(.*)", raw_text, re.DOTALL | re.IGNORECASE)
-        if rankings_match:
-            raw_rankings = rankings_match.group(1).strip()
-
-        # ✅ 파싱된 기사 리스트와 원문을 함께 반환합니다.
-        if len(articles) > 0:
-            return articles, raw_text
-            
-        return None, f"PARSING_FAILED: 기사 블록을 찾을 수 없습니다. 원문: {raw_text[:200]}"
+        # ✅ 원문을 한 번만 훑어 기사 블록/순위 섹션/진단을 함께 추출하고 그대로 넘깁니다.
+        with metrics.span("parse"):
+            parsed = tag_parser.parse(raw_text)
+
+        return _finish(parsed, raw_text)
 
     except Exception as e:
         return None, f"EXCEPTION: {str(e)}"
+    finally:
+        budget.record(plan, usage, (time.perf_counter() - started) * 1000)
+
+def ask_news_ai_cached(prompt, plan=None):
+    """
+    ask_news_ai에 응답 캐시를 적용한 버전 (재실행/재시도 시 같은 요청 비용을 다시 내지 않음)
+    (ParseResult 또는 None, 원문/에러, 캐시 적중 여부)를 반환합니다.
+    """
+    key = _cache_key(prompt, plan)
+    fetched = False
+
+    def fetch():
+        nonlocal fetched
+        fetched = True
+        parsed, raw_text = ask_news_ai(prompt, plan)
+        if parsed is None:
+            return {"articles": None, "raw_text": raw_text}
+        return {
+            "articles": parsed.articles,
+            "rankings_text": parsed.rankings_text,
+            "diagnostics": parsed.diagnostics,
+            "raw_text": raw_text,
+        }
+
+    try:
+        value, cache_hit = response_cache.get_or_fetch(key, fetch, lambda v: bool(v["articles"]))
+    finally:
+        # 직접 호출하지 않은 경우(진행 중이던 요청의 실패/예외를 공유받음) 예약만 돌려놓습니다.
+        if not fetched:
+            budget.release(plan)
+    if cache_hit:
+        print(f"♻️ [AI Cache] Reusing cached completion ({key[:24]}...)")
+        budget.record(plan, None, 0.0, cache_hit=True)
+    return _cached_result(value), value["raw_text"], cache_hit
+
+def _cached_result(value):
+    if value["articles"] is None:
+        return None
+    rankings_text = value.get("rankings_text")
+    if "rankings_text" not in value:
+        # 순위 섹션을 따로 저장하기 전의 캐시 항목
+        rankings_text = tag_parser.rankings_section(value["raw_text"])
+    return tag_parser.ParseResult(value["articles"], rankings_text, value.get("diagnostics") or [])
+
+class IncrementalArticleParser:
+    """
+    [스트리밍 파서] 토큰이 도착하는 대로 feed()하면 ##ARTICLE_END##가 닫힐 때마다 기사를 반환합니다.
+    블록 경계 탐색은 re.findall(START(.*?)END, IGNORECASE|DOTALL)과 같은 규칙을 따릅니다.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self.articles = []
+        self.diagnostics = []
+        self._blocks = 0
+        # 처음 나온 ##RANKINGS## 위치 (tag_parser.parse처럼 기사 블록 앞/사이에 있어도 인정)
+        self._rankings_at = None
+
+    @property
+    def text(self):
+        return self._text
+
+    def feed(self, chunk):
+        if not chunk: return []
+        # 조각 경계에 걸친 태그도 찾도록 이전 끝부분과 겹쳐서 검색합니다.
+        search_from = max(0, len(self._text) - len(tag_parser.RANKINGS_MARKER) + 1)
+        self._text += chunk
+        if self._rankings_at is None:
+            pos = self._text.find(tag_parser.RANKINGS_MARKER, search_from)
+            if pos >= 0:
+                self._rankings_at = pos
+
+        completed = []
+        while True:
+            start = _START_RE.search(self._text, self._pos)
+            if not start: break
+            end = _END_RE.search(self._text, start.end())
+            if not end: break
+            self._pos = end.end()
+            self._blocks += 1
+            article_data = parse_article_block(self._text[start.end():end.start()])
+            if article_data:
+                self.articles.append(article_data)
+                completed.append(article_data)
+            else:
+                self.diagnostics.append(f"block {self._blocks}: missing headline/content")
+        return completed
+
+    def result(self):
+        """
+        지금까지 받은 원문의 ParseResult. 기사 블록은 이미 feed()에서 처리했으므로
+        마지막 블록 이후 부분에서 닫히지 않은 블록만 확인합니다.
+        순위 섹션은 tag_parser.parse와 같이 원문 전체에서 처음 나온 ##RANKINGS## 이후입니다.
+        """
+        tail = self._text[self._pos:]
+        diagnostics = list(self.diagnostics)
+        start = _START_RE.search(tail)
+        if start:
+            diagnostics.append(f"unclosed ARTICLE_START at offset {self._pos + start.end()}")
+        if self._rankings_at is not None:
+            rankings_text = self._text[self._rankings_at + len(tag_parser.RANKINGS_MARKER):]
+        else:
+            rankings_text = None
+            diagnostics.append("no RANKINGS section")
+        return tag_parser.ParseResult(list(self.articles), rankings_text, diagnostics)
+
+class NewsAIStream:
+    """
+    [스트리밍 모드] Perplexity SSE 응답을 읽으면서 완성된 기사를 하나씩 yield합니다.
+    반복이 끝나면 result()가 ask_news_ai와 같은 (ParseResult, 원문/에러) 형태를 반환합니다.
+    스트림이 중간에 끊기면 error에 사유를 남기고, 그때까지 완성된 기사와 받은 원문은 그대로 반환합니다.
+    """
+
+    def __init__(self, prompt, plan=None):
+        self.prompt = prompt
+        self.plan = plan
+        self.usage = None
+        self.parser = IncrementalArticleParser()
+        self.error = None
+        self.cache_hit = False
+
+    def __iter__(self):
+        key = _cache_key(self.prompt, self.plan)
+        hit, cached = response_cache.lookup(key)
+        if hit:
+            print(f"♻️ [AI Cache] Reusing cached completion ({key[:24]}...)")
+            self.cache_hit = True
+            budget.record(self.plan, None, 0.0, cache_hit=True)
+            yield from self.parser.feed(cached["raw_text"])
+            return
+
+        started = time.perf_counter()
+        try:
+            yield from self._stream()
+        finally:
+            budget.record(self.plan, self.usage, (time.perf_counter() - started) * 1000)
+
+        parsed, raw_text = self.result()
+        # 중간에 끊긴 응답은 캐시하지 않습니다. (다음 실행에서 다시 요청)
+        if parsed and parsed.articles and not self.error:
+            response_cache.store(key, {
+                "articles": parsed.articles,
+                "rankings_text": parsed.rankings_text,
+                "diagnostics": parsed.diagnostics,
+                "raw_text": raw_text,
+            })
+
+    def _stream(self):
+        if not API_KEY:
+            self.error = "API_KEY_MISSING"
+            return
+
+        # 스트림은 중간 재시도가 불가능하므로 차단기 상태만 공유합니다.
+        cb = resilience.breaker("perplexity")
+        if not cb.allow():
+            self.error = "EXCEPTION: perplexity circuit is open"
+            return
+
+        span = metrics.span("perplexity.stream")
+        with span:
+            try:
+                client = http_client.get_client("perplexity", headers=HEADERS)
+                with client.stream("POST", "/chat/completions", json=_build_payload(self.prompt, stream=True, plan=self.plan)) as resp:
+                    if resp.status_code != 200:
+                        resp.read()
+                        span.fail()
+                        self.error = f"HTTP_{resp.status_code}: {resp.text}"
+                        if resp.status_code in resilience.RETRYABLE_STATUS:
+                            cb.record_failure()
+                        else:
+                            # 요청 자체의 문제(4xx 등)는 장애로 보지 않고 시험 호출 자리만 돌려놓습니다.
+                            cb.release()
+                        return
+
+                    done = False
+                    for line in resp.iter_lines():
+                        span.add_bytes(len(line) + 1)
+                        if not line.startswith("data:"): continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            done = True
+                            break
+
+                        event = json.loads(data)
+                        # usage는 마지막 이벤트에 누적값으로 들어옵니다.
+                        self.usage = event.get("usage") or self.usage
+                        choices = event.get("choices") or [{}]
+                        delta = choices[0].get("delta", {}).get("content")
+                        for article_data in self.parser.feed(delta):
+                            yield article_data
+
+                if not done:
+                    # [DONE] 없이 연결이 닫히면 응답이 잘린 것입니다.
+                    raise httpx.RemoteProtocolError("stream ended before [DONE]")
+                cb.record_success()
+
+            except Exception as e:
+                span.fail()
+                cb.record_failure()
+                self.error = f"EXCEPTION: {str(e)}"
+
+    def result(self):
+        if self.error:
+            if self.parser.articles:
+                # 이미 발행된 기사가 있으므로 부분 결과와 받은 원문을 돌려줍니다.
+                return self.parser.result(), self.parser.text
+            return None, self.error
+        return _finish(self.parser.result(), self.parser.text)
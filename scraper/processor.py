@@ -1,8 +1,17 @@
 import news_api
 import database
 import naver_api
-import re
+import tag_parser
+import rankings_diff
+import feed_snapshot
+import metrics
+from budget import budget
+from keyword_index import recent_keywords
+from entity_index import entities
+import os
+import config
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # ✅ 모든 카테고리를 "3명 선정" 및 "심층 기사"로 최적화 완료
@@ -50,27 +59,168 @@ PROMPT_VERSIONS = {
 }
 
 def parse_rankings(raw_rankings_text, category):
-    if not raw_rankings_text: return []
     parsed = []
-    lines = raw_rankings_text.replace('*', '').strip().split('\n')
-    for i, line in enumerate(lines):
-        if i >= 10: break
-        try:
-            line = re.sub(r'\[\d+\]', '', line).strip()
-            title = re.sub(r'^\d+[\.\)\s-]*', '', line).strip()
-            if title:
-                parsed.append({
-                    "category": category,
-                    "rank": i + 1,
-                    "title_en": title,
-                    "title_kr": title,
-                    "score": 100 - (i * 5),
-                    "created_at": datetime.now().isoformat()
-                })
-        except: continue
+    for rank, title in tag_parser.parse_ranking_lines(raw_rankings_text):
+        parsed.append({
+            "category": category,
+            "rank": rank,
+            "title_en": title,
+            "title_kr": title,
+            "score": rankings_diff.score_for(rank)
+        })
     return parsed
 
+# 스트리밍 모드: 기사가 완성되는 즉시 이미지 수집/저장을 시작하여 AI 생성 시간과 겹치게 합니다.
+STREAM_MODE = os.getenv("NEWS_AI_STREAM", "0") == "1"
+
+def _fetch_image(category, candidate):
+    """
+    이미지 수집 실패가 다른 기사에 영향을 주지 않도록 개별적으로 감쌉니다.
+    같은 인물은 카테고리가 달라도 한 번만 조회하여 결과를 공유합니다.
+    """
+    target_kr = candidate["target_kr"]
+    try:
+        with metrics.category(category):
+            return entities.shared(candidate["entity_id"], "image", lambda: naver_api.get_target_image(target_kr))
+    except Exception as e:
+        print(f"🚨 '{target_kr}' 이미지 수집 오류: {e}")
+        return ""
+
+def _to_candidate(article):
+    try:
+        target_kr = article.get("target_kr", "K-Star").strip()
+        target_en = article.get("target_en", "K-Star").strip()
+        return {
+            "target_kr": target_kr,
+            "target_en": target_en,
+            "entity_id": entities.resolve(target_kr, target_en),
+            "article": article
+        }
+    except Exception as e:
+        print(f"🚨 기사 데이터 오류: {e}")
+        return None
+
+def _accept_target(category, candidate, seen):
+    """
+    중복 체크 (인물 ID 기준)
+    - 같은 응답 안의 중복, 최근 4시간 내 같은 카테고리 발행(별칭 포함), 이번 실행에서 다른 카테고리가 먼저 발행한 인물을 건너뜁니다.
+    - 통과한 인물은 선점(claim)되며, 저장에 실패하면 발행 단계에서 선점을 풉니다.
+    """
+    entity_id = candidate["entity_id"]
+    if entity_id in seen or any(recent_keywords.contains(category, alias) for alias in entities.aliases(entity_id)):
+        print(f"⏭️ '{candidate['target_en']}'은(는) 최근 발행되어 건너뜁니다.")
+        return False
+    owner = entities.claim(entity_id, category)
+    if owner:
+        print(f"⏭️ '{candidate['target_en']}'은(는) 이번 실행에서 {owner}에 이미 발행되어 건너뜁니다.")
+        return False
+    seen.add(entity_id)  # 같은 응답 안의 중복도 제거
+    return True
+
+def _build_news_item(category, candidate, final_image):
+    article = candidate["article"]
+    return {
+        "category": category,
+        "keyword": candidate["target_en"],
+        "target_kr": candidate["target_kr"],
+        "entity_id": candidate["entity_id"],
+        "title": article.get("headline", "Breaking News"),
+        "summary": article.get("content", ""),
+        "image_url": final_image,
+        "score": 100,
+        "created_at": datetime.now().isoformat(),
+        "likes": 0
+    }
+
+def _save_news_batch(news_items):
+    """
+    한 번의 upsert로 저장하고, 실패 시 건별로 재시도하여 문제 기사만 보고합니다.
+    저장에 성공한 기사 목록을 반환합니다.
+    """
+    if not news_items: return []
+    if database.save_news_to_live(news_items):
+        return news_items
+
+    saved_items = []
+    for item in news_items:
+        if database.save_news_to_live([item]):
+            saved_items.append(item)
+        else:
+            print(f"🚨 기사 저장 오류: '{item['keyword']}'")
+    return saved_items
+
+def _publish_batch(category, data_list):
+    """수집된 기사를 일괄 처리 (중복 체크 → 이미지 동시 수집 → 일괄 저장)"""
+    seen = set()
+    targets = []
+    for article in data_list:
+        candidate = _to_candidate(article)
+        if candidate and _accept_target(category, candidate, seen):
+            targets.append(candidate)
+
+    if not targets:
+        return []
+
+    print(f"📸 {len(targets)}명 관련 이미지 동시 수집 중...")
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        images = list(pool.map(lambda c: _fetch_image(category, c), targets))
+
+    news_items = []
+    for candidate, final_image in zip(targets, images):
+        try:
+            news_items.append(_build_news_item(category, candidate, final_image))
+        except Exception as e:
+            print(f"🚨 기사 저장 오류: {e}")
+
+    saved_items = _save_news_batch(news_items)
+    # 저장하지 못한 인물은 선점을 풀어 다른 카테고리가 발행할 수 있게 합니다.
+    saved_ids = {item["entity_id"] for item in saved_items}
+    for candidate in targets:
+        if candidate["entity_id"] not in saved_ids:
+            entities.release(candidate["entity_id"], category)
+    return saved_items
+
+def _publish_one(category, candidate):
+    """[스트리밍 모드] 기사 1개의 이미지 수집과 저장을 처리합니다."""
+    try:
+        final_image = _fetch_image(category, candidate)
+        news_item = _build_news_item(category, candidate, final_image)
+        with metrics.category(category):
+            saved = database.save_news_to_live([news_item])
+        if saved:
+            return news_item
+        print(f"🚨 기사 저장 오류: '{news_item['keyword']}'")
+    except Exception as e:
+        print(f"🚨 기사 저장 오류: {e}")
+    entities.release(candidate["entity_id"], category)
+    return None
+
+def _stream_and_publish(category, final_prompt, plan):
+    """
+    [스트리밍 모드] AI가 기사를 하나 완성할 때마다 바로 이미지 수집/저장 작업을 시작합니다.
+    (ParseResult, 원문/에러, 저장된 기사 목록, 캐시 적중 여부)를 반환합니다.
+    """
+    stream = news_api.NewsAIStream(final_prompt, plan)
+    seen = set()
+    futures = []
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        for article in stream:
+            candidate = _to_candidate(article)
+            if candidate and _accept_target(category, candidate, seen):
+                print(f"📸 '{candidate['target_kr']}' 관련 이미지 수집 중... (스트리밍)")
+                futures.append(pool.submit(_publish_one, category, candidate))
+        saved_items = [f.result() for f in futures]
+
+    parsed, raw_text = stream.result()
+    if stream.error and parsed:
+        print(f"⚠️ {category} 스트림 중단 ({stream.error[:80]}): 완성된 기사 {len(parsed.articles)}개만 처리합니다.")
+    return parsed, raw_text, [item for item in saved_items if item], stream.cache_hit
+
 def run_category_process(category, run_count):
+    with metrics.category(category), metrics.span("category.total"):
+        _run_category_process(category, run_count)
+
+def _run_category_process(category, run_count):
     print(f"\n🚀 [Processing Start] {category} (Run #{run_count})")
 
     v_idx = run_count % 6
@@ -94,8 +244,22 @@ def run_category_process(category, run_count):
     ... 10위까지 작성
     """
 
-    # 1. AI 호출 (news_api.ask_news_ai가 파싱된 리스트와 원문을 반환해야 함)
-    data_list, raw_text = news_api.ask_news_ai(final_prompt)
+    # 0. 예산 확인 (한도 근처에서는 저렴한 모델로 바꾸거나 저우선 버전을 건너뜀)
+    plan = budget.plan(category, v_idx, final_prompt)
+    if plan is None:
+        print(f"💸 {category} Run #{run_count} 건너뜀: AI 예산 한도 도달.")
+        return
+
+    # 1. AI 호출 (news_api가 한 번 파싱한 결과(ParseResult)와 원문을 함께 반환)
+    saved_items = []
+    if STREAM_MODE:
+        parsed, raw_text, saved_items, cache_hit = _stream_and_publish(category, final_prompt, plan)
+    else:
+        parsed, raw_text, cache_hit = news_api.ask_news_ai_cached(final_prompt, plan)
+    data_list = parsed.articles if parsed else None
+    if parsed and parsed.diagnostics:
+        metrics.increment("parse.diagnostics", len(parsed.diagnostics))
+        print(f"🔎 [Parse] {category}: {'; '.join(parsed.diagnostics)}")
 
     # 2. Archive 기록 (원문 보존)
     try:
@@ -104,6 +268,7 @@ def run_category_process(category, run_count):
             "query": task,
             "raw_result": raw_text,
             "run_count": run_count,
+            "cache_hit": cache_hit,
             "created_at": datetime.now().isoformat()
         }
         database.save_search_archive(archive_data)
@@ -116,44 +281,21 @@ def run_category_process(category, run_count):
         return
 
     # 3. 랭킹 데이터 처리
+    rankings_changed = False
     try:
-        rankings_match = re.search(r"##RANKINGS##(.*)", raw_text, re.S)
-        if rankings_match:
-            clean_rankings = parse_rankings(rankings_match.group(1), category)
-            database.save_rankings_to_db(clean_rankings)
+        if parsed.rankings_text is not None:
+            clean_rankings = parse_rankings(parsed.rankings_text, category)
+            rankings_changed = database.save_rankings_to_db(clean_rankings)
     except:
         print(f"⚠️ 랭킹 파싱 오류 발생")
 
-    # 4. 수집된 3개의 기사를 개별적으로 처리 및 저장
-    success_count = 0
-    for article in data_list:
-        try:
-            target_kr = article.get("target_kr", "K-Star").strip()
-            target_en = article.get("target_en", "K-Star").strip()
-            
-            # 중복 체크 (최근 4시간 내 동일 키워드 발행 여부 확인)
-            if database.is_keyword_used_recently(category, target_en):
-                print(f"⏭️ '{target_en}'은(는) 최근 발행되어 건너뜁니다.")
-                continue
-
-            print(f"📸 '{target_kr}' 관련 이미지 수집 중...")
-            final_image = naver_api.get_target_image(target_kr)
-
-            news_item = {
-                "category": category,
-                "keyword": target_en,
-                "title": article.get("headline", "Breaking News"),
-                "summary": article.get("content", ""),
-                "image_url": final_image,
-                "score": 100,
-                "created_at": datetime.now().isoformat(),
-                "likes": 0
-            }
-            
-            database.save_news_to_live([news_item])
-            success_count += 1
-            
-        except Exception as e:
-            print(f"🚨 기사 저장 오류: {e}")
+    # 4. 수집된 기사 처리 (스트리밍 모드에서는 이미 처리됨)
+    if not STREAM_MODE:
+        saved_items = _publish_batch(category, data_list)
+
+    for item in saved_items:
+        recent_keywords.add(category, item["keyword"])
+    print(f"🎉 성공: [{category}] 총 {len(saved_items)}개의 기사 발행 완료.")
 
-    print(f"🎉 성공: [{category}] 총 {success_count}개의 기사 발행 완료.")
+    # 5. 웹용 피드 스냅샷 (기사나 순위가 바뀐 경우에만 다시 생성)
+    feed_snapshot.publish(category, changed=bool(saved_items) or rankings_changed)
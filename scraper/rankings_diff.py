@@ -0,0 +1,89 @@
+import re
+import unicodedata
+
+# 제목 비교에서 무시할 부가 표기: 괄호 속 설명, 따옴표, 구두점
+_BRACKETS_RE = re.compile(r"[\(\[【（][^\)\]】）]*[\)\]】）]")
+_PUNCT_RE = re.compile(r"[\"'`“”‘’«»「」『』<>《》〈〉.,:;!?·•~\-–—_/|]+")
+_SPACE_RE = re.compile(r"\s+")
+
+def normalize_title(title):
+    """
+    [제목 정규화] 전각/반각, 대소문자, 괄호 설명, 따옴표/구두점, 공백 차이를 통일한 비교용 키
+    예) '"Squid Game 2" (Netflix)', 'squid game 2', 'Squid Game-2' → 같은 키
+    괄호를 지우면 빈 문자열이 되는 제목은 괄호 안 내용을 그대로 사용합니다.
+    """
+    if not title: return ""
+    text = unicodedata.normalize("NFKC", str(title)).casefold()
+    stripped = _BRACKETS_RE.sub(" ", text)
+    if _PUNCT_RE.sub("", stripped).strip():
+        text = stripped
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub("", text)
+
+def score_for(rank):
+    return 100 - ((rank - 1) * 5)
+
+def diff(current_rows, new_rows):
+    """
+    [순위 변경 계산] 현재 live_rankings 행과 새 순위를 정규화된 제목으로 맞춰 봅니다.
+    - inserts: 새로 진입한 항목 (행 전체 + title_key)
+    - moves: 순위나 표기가 바뀐 기존 항목 ({"id", "rank", "score", "title_en", "title_kr", "title_key"} 중 바뀐 값)
+    - removals: 차트에서 빠진 기존 행의 id
+    - history: 변동 기록 (new/up/down/out, 변하지 않은 항목은 남기지 않음)
+    새 순위에서 같은 제목이 두 번 나오면 높은 순위 하나만 사용합니다.
+    """
+    current = {}
+    duplicates = []
+    for row in sorted(current_rows, key=lambda r: r.get("rank") or 0):
+        key = normalize_title(row.get("title_en"))
+        if key in current:
+            duplicates.append(row["id"])
+        else:
+            current[key] = row
+
+    inserts, moves, history = [], [], []
+    seen = set()
+    for row in sorted(new_rows, key=lambda r: r["rank"]):
+        key = normalize_title(row.get("title_en"))
+        if not key or key in seen: continue
+        seen.add(key)
+
+        old = current.get(key)
+        if old is None:
+            inserts.append(dict(row, title_key=key))
+            history.append(_history(row, key, row["rank"], None, "new"))
+            continue
+
+        changed = {
+            field: row[field] for field in ("rank", "score", "title_en", "title_kr")
+            if field in row and row[field] != old.get(field)
+        }
+        if old.get("title_key") != key:
+            # title_key가 없던 기존 행도 한 번은 채워 둡니다. (live_rankings_trend 조인 키)
+            changed["title_key"] = key
+        if changed:
+            moves.append(dict(changed, id=old["id"]))
+        if row["rank"] != old.get("rank"):
+            change = "up" if row["rank"] < (old.get("rank") or 0) else "down"
+            history.append(_history(row, key, row["rank"], old.get("rank"), change))
+
+    removals = duplicates[:]
+    for key, old in current.items():
+        if key not in seen:
+            removals.append(old["id"])
+            history.append(_history(old, key, None, old.get("rank"), "out"))
+
+    return {"inserts": inserts, "moves": moves, "removals": removals, "history": history}
+
+def _history(row, key, rank, prev_rank, change):
+    return {
+        "category": row.get("category"),
+        "title_key": key,
+        "title_en": row.get("title_en"),
+        "rank": rank,
+        "prev_rank": prev_rank,
+        "change": change,
+    }
+
+def is_empty(changes):
+    return not (changes["inserts"] or changes["moves"] or changes["removals"])
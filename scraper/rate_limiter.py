@@ -0,0 +1,36 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    [요청 속도 제한] 여러 카테고리 작업이 공유하는 토큰 버킷
+    - rate: 초당 충전되는 토큰 수
+    - capacity: 한 번에 몰아서 쓸 수 있는 최대 토큰 수 (burst)
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def acquire(self, tokens=1):
+        """토큰이 생길 때까지 대기한 뒤 소비합니다. 대기한 시간(초)을 반환합니다."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait_sec = (tokens - self._tokens) / self.rate
+            time.sleep(wait_sec)
+            waited += wait_sec
@@ -0,0 +1,209 @@
+import os
+import config
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import httpx
+
+# 서비스별 재시도/차단 정책 (deadline: 재시도를 포함한 호출 1건의 전체 제한 시간, 초)
+POLICIES = {
+    "perplexity": {"retries": 2, "base_delay": 2.0, "max_delay": 30.0, "deadline": 180.0},
+    "naver": {"retries": 2, "base_delay": 0.5, "max_delay": 5.0, "deadline": 15.0},
+    "supabase": {"retries": 3, "base_delay": 0.5, "max_delay": 8.0, "deadline": 30.0},
+}
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SEC = float(os.getenv("BREAKER_RESET_SEC", "60"))
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# Postgres SQLSTATE 중 일시적인 오류 분류 (연결/자원 부족/운영 중단/교착 상태)
+RETRYABLE_SQLSTATE_PREFIXES = ("08", "40", "53", "57")
+
+class CircuitOpenError(Exception):
+    """차단기가 열려 있어 호출을 보내지 않았을 때 발생합니다."""
+
+class CircuitBreaker:
+    """
+    [서비스 차단기] 연속 실패가 threshold에 도달하면 reset_timeout 동안 호출을 막고,
+    이후 한 번의 시험 호출(half-open)이 성공하면 다시 닫힙니다.
+    """
+
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET_SEC):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def release(self):
+        """성공/실패 어느 쪽으로도 보지 않는 결과. 진행 중이던 시험 호출 자리만 돌려놓습니다."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        """실패를 기록하고, 이번 실패로 차단기가 열렸으면 True를 반환합니다."""
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self._trial = False
+                return True
+            return False
+
+_breakers = {}
+_stats = {}
+_lock = threading.Lock()
+
+def breaker(service):
+    with _lock:
+        if service not in _breakers:
+            _breakers[service] = CircuitBreaker(service)
+        return _breakers[service]
+
+def _count(service, field, n=1):
+    with _lock:
+        counter = _stats.setdefault(service, {"calls": 0, "retries": 0, "failures": 0, "breaker_trips": 0, "short_circuits": 0})
+        counter[field] += n
+
+def stats():
+    with _lock:
+        return {service: dict(counter) for service, counter in _stats.items()}
+
+def report():
+    """실행 로그용 서비스별 카운터 요약 문자열"""
+    parts = [
+        f"{service} calls={c['calls']} retries={c['retries']} failures={c['failures']} "
+        f"trips={c['breaker_trips']} blocked={c['short_circuits']}"
+        for service, c in sorted(stats().items())
+    ]
+    return " | ".join(parts) if parts else "no outbound calls"
+
+def _retry_after(resp):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 변환합니다."""
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    if not value: return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+# 요청이 서버에 도달하기 전에 실패한 오류 (비멱등 요청도 안전하게 다시 보낼 수 있음)
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# 비멱등 요청도 재시도할 수 있는 응답 (서버가 요청을 처리하지 않았음이 분명한 경우)
+_NOT_PROCESSED_STATUS = {429, 503}
+
+def is_transient_error(e, idempotent=True):
+    """
+    다시 보내면 성공할 수 있는 일시적인 오류인지 판단합니다.
+    idempotent=False이면 서버가 요청을 처리하지 않았음이 분명한 경우만 참입니다.
+    (읽기 시간 초과 등은 이미 처리되었을 수 있어 다시 보내면 중복이 생깁니다.)
+    """
+    if isinstance(e, (CircuitOpenError,) + _NOT_SENT_ERRORS):
+        return True
+    code = str(getattr(e, "code", "") or "")
+    if code.isdigit():
+        return int(code) in (RETRYABLE_STATUS if idempotent else _NOT_PROCESSED_STATUS)
+    if code.startswith(RETRYABLE_SQLSTATE_PREFIXES):
+        # DB가 오류를 돌려준 경우 해당 문장은 반영되지 않았습니다.
+        return True
+    return idempotent and isinstance(e, (httpx.TransportError, httpx.TimeoutException))
+
+def _clamp_timeout(timeout, remaining):
+    """시도 1회의 제한 시간을 남은 deadline 이내로 줄입니다. (httpx.Timeout 또는 초)"""
+    remaining = max(0.001, remaining)
+    if isinstance(timeout, httpx.Timeout):
+        def clamp(value):
+            return remaining if value is None else min(value, remaining)
+        return httpx.Timeout(connect=clamp(timeout.connect), read=clamp(timeout.read),
+                             write=clamp(timeout.write), pool=clamp(timeout.pool))
+    return min(timeout, remaining)
+
+def call(service, fn, *args, idempotent=True, **kwargs):
+    """
+    [공용 재시도 래퍼] fn(*args, **kwargs)를 서비스 정책에 따라 실행합니다.
+    - 반환값이 HTTP 응답이면 429/5xx를, 예외면 연결/일시 오류를 재시도합니다.
+    - idempotent=False(insert 등)이면 요청이 서버에 닿지 않았음이 분명한 경우(연결 실패, 429/503)만 재시도합니다.
+    - 지터가 포함된 지수 백오프를 사용하고 Retry-After를 우선합니다.
+    - deadline을 넘기는 대기는 하지 않으며, 재시도가 끝나면 마지막 응답/예외를 그대로 돌려줍니다.
+    - timeout 인자를 넘기면 시도마다 남은 deadline 이내로 줄여서 전달합니다.
+    - 차단기가 열려 있으면 CircuitOpenError를 발생시킵니다.
+    """
+    policy = POLICIES[service]
+    cb = breaker(service)
+    deadline = time.monotonic() + policy["deadline"]
+    timeout = kwargs.pop("timeout", None)
+    retryable_status = RETRYABLE_STATUS if idempotent else _NOT_PROCESSED_STATUS
+
+    attempt = 0
+    while True:
+        if not cb.allow():
+            _count(service, "short_circuits")
+            raise CircuitOpenError(f"{service} circuit is open")
+
+        _count(service, "calls")
+        retry_after = None
+        if timeout is not None:
+            kwargs["timeout"] = _clamp_timeout(timeout, deadline - time.monotonic())
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if not is_transient_error(e, idempotent):
+                # 요청 자체의 문제(4xx 등)나 다시 보낼 수 없는 오류는 차단기 상태에 반영하지 않습니다.
+                cb.release()
+                raise
+            failure, result = e, None
+        else:
+            status = getattr(result, "status_code", None)
+            if status not in retryable_status:
+                if status in RETRYABLE_STATUS:
+                    # 비멱등 요청의 5xx: 재시도는 하지 않지만 서비스 장애로는 기록합니다.
+                    if cb.record_failure():
+                        _count(service, "breaker_trips")
+                    _count(service, "failures")
+                else:
+                    cb.record_success()
+                return result
+            failure, retry_after = None, _retry_after(result)
+
+        if cb.record_failure():
+            _count(service, "breaker_trips")
+            print(f"   🔌 [Breaker] {service} circuit opened after {cb.failures} failures.")
+
+        delay = retry_after
+        if delay is None:
+            delay = min(policy["max_delay"], policy["base_delay"] * (2 ** attempt))
+            delay = random.uniform(0, delay)  # full jitter
+
+        if attempt >= policy["retries"] or time.monotonic() + delay > deadline or not cb.allow():
+            _count(service, "failures")
+            if failure is not None:
+                raise failure
+            return result
+
+        attempt += 1
+        _count(service, "retries")
+        print(f"   🔁 [Retry] {service} attempt {attempt + 1} in {delay:.1f}s")
+        time.sleep(delay)
@@ -0,0 +1,89 @@
+import os
+import config
+import json
+import time
+import hashlib
+import threading
+from lookup_cache import LookupCache, CACHE_DIR
+
+# 같은 요청을 재사용할 수 있는 시간 창 (초). 0이면 캐시를 사용하지 않습니다.
+FRESHNESS_SEC = int(os.getenv("NEWS_AI_CACHE_WINDOW_SEC", "1800"))
+
+# 완료된 AI 응답 보관소 (실행 간 유지, 실패 응답은 저장하지 않음)
+completion_store = LookupCache(
+    os.path.join(CACHE_DIR, "completion_cache.sqlite3"),
+    ttl=max(FRESHNESS_SEC, 1),
+    negative_ttl=0,
+    max_entries=int(os.getenv("NEWS_AI_CACHE_MAX_ENTRIES", "200")),
+)
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.success = False
+
+def cache_key(payload, now=None):
+    """(모델, 프롬프트 해시, 시간 구간)으로 만든 내용 기반 키"""
+    body = {k: v for k, v in payload.items() if k != "stream"}
+    digest = hashlib.sha256(json.dumps(body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    bucket = int((now or time.time()) // FRESHNESS_SEC) if FRESHNESS_SEC > 0 else 0
+    return f"{payload.get('model')}:{digest}:{bucket}"
+
+def lookup(key):
+    """(적중 여부, 저장된 값)을 반환합니다."""
+    if FRESHNESS_SEC <= 0:
+        return False, None
+    return completion_store.get("completion", key)
+
+def store(key, value):
+    if FRESHNESS_SEC > 0 and value:
+        completion_store.set("completion", key, value)
+
+def get_or_fetch(key, fetch, is_success):
+    """
+    [응답 캐시 + 중복 요청 제거]
+    - 캐시에 있으면 바로 반환합니다.
+    - 같은 키로 이미 진행 중인 요청이 있으면 그 결과를 함께 받습니다.
+      진행 중인 요청이 예외로 끝나면 기다리던 쪽에도 같은 예외가 발생합니다.
+    - is_success(value)가 참인 결과만 저장하고, 실패한 결과는 공유받더라도 적중으로 보지 않습니다.
+    (값, 캐시/공유 적중 여부)를 반환합니다.
+    """
+    if FRESHNESS_SEC <= 0:
+        return fetch(), False
+
+    hit, cached = lookup(key)
+    if hit:
+        return cached, True
+
+    with _inflight_lock:
+        waiter = _inflight.get(key)
+        owner = waiter is None
+        if owner:
+            waiter = _InFlight()
+            _inflight[key] = waiter
+
+    if not owner:
+        waiter.done.wait()
+        if waiter.error is not None:
+            raise waiter.error
+        return waiter.value, waiter.success
+
+    try:
+        value = fetch()
+        waiter.value = value
+        waiter.success = bool(is_success(value))
+        if waiter.success:
+            store(key, value)
+        return value, False
+    except Exception as e:
+        waiter.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        waiter.done.set()
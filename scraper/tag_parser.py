@@ -0,0 +1,152 @@
+import re
+
+# AI 응답에서 사용하는 태그 (##TAG## 형식, 대소문자 무시)
+ARTICLE_START = "ARTICLE_START"
+ARTICLE_END = "ARTICLE_END"
+FIELD_TAGS = {
+    "TARGET_KR": "target_kr",
+    "TARGET_EN": "target_en",
+    "HEADLINE": "headline",
+    "CONTENT": "content",
+}
+# 순위 섹션은 기존 processor 동작과 같이 대소문자를 구분합니다.
+RANKINGS_MARKER = "##RANKINGS##"
+
+_MARKERS = (ARTICLE_START, ARTICLE_END) + tuple(FIELD_TAGS)
+_MARKERS_BY_INITIAL = {}
+for _name in _MARKERS:
+    _MARKERS_BY_INITIAL.setdefault(_name[0], []).append(_name)
+
+_CITATION_RE = re.compile(r'\[\d+\]')
+_RANK_PREFIX_RE = re.compile(r'^\d+[\.\)\s-]*')
+
+class ParseResult:
+    """[파싱 결과] 기사 리스트, 순위 섹션 원문, 진단 메시지"""
+
+    def __init__(self, articles, rankings_text, diagnostics):
+        self.articles = articles
+        self.rankings_text = rankings_text
+        self.diagnostics = diagnostics
+
+    @property
+    def rankings(self):
+        """순위 섹션을 (순위, 제목) 리스트로 변환합니다."""
+        return parse_ranking_lines(self.rankings_text)
+
+def _marker_at(text, i):
+    """text[i]에서 시작하는 ##NAME## 태그 이름을 반환합니다. (없으면 None)"""
+    if not text.startswith("##", i): return None
+    candidates = _MARKERS_BY_INITIAL.get(text[i + 2:i + 3].upper())
+    if not candidates: return None
+    for name in candidates:
+        if text[i + 2:i + 4 + len(name)].upper() == name + "##":
+            return name
+    return None
+
+def _scan(text, whole_block=False):
+    """
+    '##' 위치만 한 번 훑으면서 기사 블록, 필드 값, 순위 섹션 위치를 모두 찾습니다.
+    기존 정규식 경로(findall + extract_tag)와 같은 경계 규칙을 따릅니다.
+    - 블록: ARTICLE_START 이후 처음 나오는 ARTICLE_END까지
+    - 필드: 블록 안에서 처음 나온 ##TAG## 뒤부터 다음 '##' 직전까지 (strip)
+    whole_block=True이면 text 전체를 하나의 블록 본문으로 취급합니다.
+    """
+    articles = []
+    diagnostics = []
+    rankings_start = None
+
+    block_start = 0 if whole_block else None
+    block_index = 0
+    fields = {}
+    pending = []  # 값의 끝('##')을 기다리는 (필드명, 값 시작 위치)
+    resume = 0
+
+    def close_block(end):
+        nonlocal fields, pending, block_index
+        for field, value_start in pending:
+            fields[field] = text[value_start:end].strip()
+        pending = []
+        article = {field: fields.get(field) for field in FIELD_TAGS.values()}
+        block_index += 1
+        if article['headline'] and article['content']:
+            articles.append(article)
+        else:
+            diagnostics.append(f"block {block_index}: missing headline/content")
+        fields = {}
+
+    i = text.find("##")
+    while i >= 0:
+        name = _marker_at(text, i)
+        in_block = block_start is not None
+
+        if pending:
+            # 블록 끝 태그에 걸친 '##'(예: '###ARTICLE_END##')는 값의 끝으로 보지 않습니다.
+            crosses_end = in_block and not whole_block and i + 1 >= block_start \
+                and _marker_at(text, i + 1) == ARTICLE_END
+            if not crosses_end:
+                still_pending = []
+                for field, value_start in pending:
+                    if i >= value_start:
+                        fields[field] = text[value_start:i].strip()
+                    else:
+                        still_pending.append((field, value_start))
+                pending = still_pending
+
+        if rankings_start is None and text.startswith(RANKINGS_MARKER, i):
+            rankings_start = i + len(RANKINGS_MARKER)
+
+        if not in_block:
+            if name == ARTICLE_START and i >= resume:
+                block_start = i + len(ARTICLE_START) + 4
+        elif name == ARTICLE_END and not whole_block and i >= block_start:
+            close_block(i)
+            block_start = None
+            resume = i + len(ARTICLE_END) + 4
+        elif name in FIELD_TAGS and i >= block_start:
+            field = FIELD_TAGS[name]
+            marker_end = i + len(name) + 4
+            already = field in fields or any(f == field for f, _ in pending)
+            # 태그의 닫는 '##'에서 블록 끝 태그가 시작되면 블록 밖으로 걸친 태그입니다.
+            overlaps_end = not whole_block and ARTICLE_END in (
+                _marker_at(text, marker_end - 2), _marker_at(text, marker_end - 1))
+            if not already and not overlaps_end:
+                pending.append((field, marker_end))
+
+        i = text.find("##", i + 1)
+
+    if whole_block:
+        close_block(len(text))
+    elif block_start is not None:
+        diagnostics.append(f"unclosed ARTICLE_START at offset {block_start}")
+
+    if rankings_start is None:
+        diagnostics.append("no RANKINGS section")
+    rankings_text = text[rankings_start:] if rankings_start is not None else None
+    return ParseResult(articles, rankings_text, diagnostics)
+
+def parse(text):
+    """[단일 패스 파서] AI 응답 원문 전체를 기사/순위/진단 결과로 변환합니다."""
+    return _scan(text or "")
+
+def parse_block(block):
+    """기사 블록 본문 하나를 dict로 변환합니다. 필수 데이터(제목/본문)가 없으면 None"""
+    result = _scan(block or "", whole_block=True)
+    return result.articles[0] if result.articles else None
+
+def rankings_section(text):
+    """원문에서 ##RANKINGS## 이후 부분만 반환합니다. (없으면 None)"""
+    if not text: return None
+    pos = text.find(RANKINGS_MARKER)
+    return text[pos + len(RANKINGS_MARKER):] if pos >= 0 else None
+
+def parse_ranking_lines(rankings_text, limit=10):
+    """순위 섹션 원문을 (순위, 제목) 리스트로 변환합니다. 빈 줄도 순위 번호를 차지합니다."""
+    if not rankings_text: return []
+    parsed = []
+    lines = rankings_text.replace('*', '').strip().split('\n')
+    for i, line in enumerate(lines[:limit]):
+        line = _CITATION_RE.sub('', line).strip()
+        title = _RANK_PREFIX_RE.sub('', line).strip()
+        if title:
+            parsed.append((i + 1, title))
+    return parsed
@@ -0,0 +1,60 @@
+"""
+스크래퍼 단위 테스트 공통 설정
+
+- 스크래퍼 모듈은 import 시점에 환경변수를 읽으므로, 실제 서비스에 접속하지 않도록 먼저 비워 둡니다.
+- 외부 서비스는 benchmarks/mock_servers의 로컬 대역 서버로 대신합니다.
+"""
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRAPER_DIR = os.path.dirname(HERE)
+sys.path.insert(0, SCRAPER_DIR)
+sys.path.insert(0, os.path.join(SCRAPER_DIR, "benchmarks"))
+
+# load_dotenv는 이미 있는 값을 덮어쓰지 않으므로 .env의 실제 키가 섞이지 않습니다.
+os.environ.update({
+    "SUPABASE_URL": "",
+    "SUPABASE_KEY": "",
+    "PERPLEXITY_API_KEY": "",
+    "NAVER_CLIENT_ID": "",
+    "NAVER_CLIENT_SECRET": "",
+    "SCRAPER_CACHE_DIR": tempfile.mkdtemp(prefix="scraper-test-"),
+    "SCRAPER_METRICS": "0",
+})
+
+import pytest
+import http_client
+
+@pytest.fixture
+def start_mock():
+    """mock_servers의 서버를 띄우고 테스트가 끝나면 정리합니다. start_mock(NaverMock, ...)"""
+    servers = []
+
+    def _start(cls, **kwargs):
+        server = cls(**kwargs).start()
+        servers.append(server)
+        return server
+
+    yield _start
+    http_client.close_all()
+    for server in servers:
+        server.stop()
+
+@pytest.fixture
+def service_url(monkeypatch):
+    """공용 클라이언트가 대역 서버를 보도록 서비스 base_url을 바꿉니다."""
+    def _point(service, url):
+        http_client.close_all()
+        monkeypatch.setitem(http_client.SERVICES[service], "base_url", url)
+    return _point
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    """테스트마다 발행 기록(도배 방지/인물 선점)을 비웁니다. (supabase 없이 빈 상태로 로드)"""
+    from keyword_index import recent_keywords
+    from entity_index import entities
+    recent_keywords.load()
+    entities.clear()
+    yield
@@ -0,0 +1,73 @@
+import pytest
+from supabase import create_client
+import archive_store
+import database
+from mock_servers import PostgrestMock, load_completions
+
+def test_round_trip_without_dictionary():
+    text = load_completions()[0]
+    payload = archive_store.compress(text)
+
+    assert archive_store.decompress(payload) == text
+    assert len(payload) < len(text.encode("utf-8"))
+
+def test_trained_dictionary_round_trips_and_shrinks_output():
+    completions = load_completions()
+    dictionary = archive_store.train_dictionary(completions[1:])
+    text = completions[0]
+
+    assert len(dictionary) <= archive_store.MAX_DICT_SIZE
+    assert dictionary.endswith(archive_store.SEED.encode("utf-8"))
+    with_dict = archive_store.compress(text, dictionary)
+    assert archive_store.decompress(with_dict, dictionary) == text
+    assert len(with_dict) < len(archive_store.compress(text))
+    with pytest.raises(Exception):
+        archive_store.decompress(with_dict)
+
+def test_dictionary_encoding_round_trips():
+    dictionary = archive_store.train_dictionary(load_completions())
+    assert archive_store.decode_dictionary(archive_store.encode_dictionary(dictionary)) == dictionary
+
+@pytest.fixture
+def postgrest(start_mock, monkeypatch):
+    mock = start_mock(PostgrestMock)
+    monkeypatch.setattr(database, "supabase", create_client(mock.url, "test-key"))
+    monkeypatch.setattr(database, "ARCHIVE_COMPRESSION", True)
+    monkeypatch.setattr(database, "_archive_dict", {"loaded": False, "id": None, "dictionary": None})
+    monkeypatch.setattr(database, "_archive_dicts", {})
+    monkeypatch.setattr(database, "_archive_hashes", set())
+    yield mock
+    database.archive_sink.close()
+
+def archive(query, raw_result):
+    database.save_search_archive({"category": "IT", "query": query, "raw_result": raw_result})
+
+def test_identical_payloads_are_stored_once(postgrest, monkeypatch):
+    text = load_completions()[0]
+    archive("first", text)
+    archive("second", text)
+    database.archive_sink.close()
+    # 다음 실행(해시 기록 없음)에서 같은 원문을 다시 저장해도 upsert로 한 번만 남습니다.
+    monkeypatch.setattr(database, "_archive_hashes", set())
+    archive("third", text)
+    database.archive_sink.close()
+
+    rows = postgrest.tables["search_archive"]
+    assert [r["raw_result"] for r in rows] == [None, None, None]
+    assert {r["raw_hash"] for r in rows} == {archive_store.content_hash(text)}
+    assert len(postgrest.tables["archive_blobs"]) == 1
+
+def test_compressed_and_legacy_rows_resolve_alike(postgrest, monkeypatch):
+    completions = load_completions()
+    dictionary = archive_store.train_dictionary(completions)
+    dict_id = database.save_archive_dictionary(dictionary, len(completions))
+    archive("compressed", completions[0])
+    database.archive_sink.close()
+    assert postgrest.tables["archive_blobs"][0]["dict_id"] == dict_id
+
+    postgrest.tables["search_archive"].append({"id": 99, "category": "IT", "query": "legacy", "raw_result": completions[1]})
+    # 사전 캐시가 비어 있어도 archive_dictionaries에서 다시 읽어 풉니다.
+    monkeypatch.setattr(database, "_archive_dicts", {})
+    rows = database.resolve_archive_rows(postgrest.tables["search_archive"])
+
+    assert [r["raw_result"] for r in rows] == completions[:2]
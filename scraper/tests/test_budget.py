@@ -0,0 +1,94 @@
+import pytest
+import budget as budget_module
+import news_api
+import response_cache
+from budget import BudgetManager
+
+@pytest.fixture(autouse=True)
+def pricing(monkeypatch):
+    """출력 토큰 1개 = $1(기본 모델) / $0.5(대체 모델)로 단순화하고 max_tokens 기본값을 1로 둡니다."""
+    monkeypatch.setattr(budget_module, "PRICING", {
+        "primary": {"input": 0.0, "output": 1_000_000.0, "request": 0.0},
+        "fallback": {"input": 0.0, "output": 500_000.0, "request": 0.0},
+    })
+    monkeypatch.setattr(budget_module, "PRIMARY_MODEL", "primary")
+    monkeypatch.setattr(budget_module, "FALLBACK_MODEL", "fallback")
+    monkeypatch.setattr(budget_module, "MAX_TOKENS_DEFAULT", 1)
+    monkeypatch.setattr(budget_module, "RUN_CAP_USD", 10.0)
+    monkeypatch.setattr(budget_module, "DAY_CAP_USD", 0.0)
+    monkeypatch.setattr(budget_module, "SOFT_RATIO", 0.8)
+    monkeypatch.setattr(budget_module, "LOW_PRIORITY_VERSIONS", {4})
+
+def spend(manager, tokens):
+    plan = manager.plan("IT", 0, "prompt")
+    manager.record(plan, {"prompt_tokens": 0, "completion_tokens": tokens}, 10.0)
+
+def test_plan_reserves_until_recorded_or_released(monkeypatch):
+    monkeypatch.setattr(budget_module, "RUN_CAP_USD", 1.2)
+    monkeypatch.setattr(budget_module, "SOFT_RATIO", 1.0)
+    manager = BudgetManager()
+
+    first = manager.plan("IT", 0, "prompt")
+    assert (first.model, first.reserved) == ("primary", 1.0)
+    # 남은 $0.2로는 대체 모델($0.5)도 예약할 수 없습니다.
+    assert manager.plan("IT", 1, "prompt") is None
+
+    manager.release(first)
+    second = manager.plan("IT", 1, "prompt")
+    assert second is not None
+    manager.record(second, None, 0.0)
+    assert manager.plan("IT", 2, "prompt") is not None
+    assert manager.stats()["versions"]["IT#1"]["skipped"] == 1
+
+def test_soft_ratio_skips_low_priority_and_downgrades_the_rest():
+    manager = BudgetManager()
+    first = manager.plan("IT", 0, "prompt")
+    assert first.model == "primary"
+    manager.release(first)
+
+    spend(manager, 9)
+    assert manager.plan("IT", 4, "prompt") is None
+    plan = manager.plan("IT", 0, "prompt")
+    assert (plan.model, plan.downgraded) == ("fallback", True)
+    versions = manager.stats()["versions"]
+    assert versions["IT#4"]["skipped"] == 1
+    assert versions["IT#0"]["downgraded"] == 1
+
+def test_max_tokens_follows_observed_p95_with_headroom(monkeypatch):
+    monkeypatch.setattr(budget_module, "MAX_TOKENS_DEFAULT", 2000)
+    monkeypatch.setattr(budget_module, "MAX_TOKENS_MIN", 800)
+    monkeypatch.setattr(budget_module, "MAX_TOKENS_MAX", 3000)
+    monkeypatch.setattr(budget_module, "MAX_TOKENS_HEADROOM", 1.3)
+    monkeypatch.setattr(budget_module, "RUN_CAP_USD", 0.0)
+    manager = BudgetManager()
+
+    for _ in range(budget_module.MIN_SAMPLES - 1):
+        spend(manager, 1000)
+    assert manager.max_tokens_for("IT") == 2000
+    spend(manager, 1000)
+    assert manager.max_tokens_for("IT") == 1300
+
+    manager._output_tokens = {"small": [10] * 5, "large": [5000] * 5}
+    assert manager.max_tokens_for("small") == 800
+    assert manager.max_tokens_for("large") == 3000
+
+@pytest.mark.parametrize("outcome", ["shared_failure", "shared_error"])
+def test_cached_call_releases_reservation_when_fetch_did_not_run(monkeypatch, outcome):
+    manager = BudgetManager()
+    monkeypatch.setattr(news_api, "budget", manager)
+
+    def get_or_fetch(key, fetch, is_success):
+        # 진행 중이던 다른 요청의 결과를 공유받은 경우 (fetch는 호출되지 않음)
+        if outcome == "shared_error":
+            raise RuntimeError("owner failed")
+        return {"articles": None, "raw_text": "HTTP_500"}, False
+    monkeypatch.setattr(response_cache, "get_or_fetch", get_or_fetch)
+
+    plan = manager.plan("IT", 0, "prompt")
+    assert manager._reserved == 1.0
+    if outcome == "shared_error":
+        with pytest.raises(RuntimeError):
+            news_api.ask_news_ai_cached("prompt", plan)
+    else:
+        assert news_api.ask_news_ai_cached("prompt", plan) == (None, "HTTP_500", False)
+    assert manager._reserved == 0.0
@@ -0,0 +1,36 @@
+import daemon
+from main import CATEGORIES
+
+class RecordingPool:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, category, run_count, idx):
+        self.submitted.append(category)
+
+def test_running_category_is_not_skipped_before_its_next_slot(tmp_path):
+    scheduler = daemon.Scheduler(state_path=str(tmp_path / "state.json"))
+    pool = RecordingPool()
+
+    scheduler._submit_due(pool, 1000.0)
+    for tick in range(1, 30):
+        scheduler._submit_due(pool, 1000.0 + tick)
+
+    assert sorted(pool.submitted) == sorted(CATEGORIES)
+    assert scheduler.results["skipped"] == 0
+    assert all(at > 1000.0 for at in scheduler.state["next_runs"].values())
+
+def test_new_slot_while_running_counts_one_skip(tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon, "JITTER_SEC", 0.0)
+    scheduler = daemon.Scheduler(state_path=str(tmp_path / "state.json"))
+    pool = RecordingPool()
+    category = CATEGORIES[0]
+
+    scheduler._submit_due(pool, 1000.0)
+    next_slot = scheduler.state["next_runs"][category]
+    scheduler._submit_due(pool, next_slot)
+    scheduler._submit_due(pool, next_slot + 1)
+
+    assert scheduler.results["skipped"] == len(CATEGORIES)
+    assert pool.submitted.count(category) == 1
+    assert scheduler.state["next_runs"][category] > next_slot
@@ -0,0 +1,91 @@
+import threading
+import pytest
+import processor
+import database
+from entity_index import entities
+
+def article(target_kr, target_en):
+    return {"target_kr": target_kr, "target_en": target_en, "headline": "h", "content": "c"}
+
+def test_claim_blocks_other_categories_until_released():
+    entity_id = entities.resolve("아이유", "IU")
+
+    assert entities.claim(entity_id, "K-Pop") is None
+    assert entities.claim(entity_id, "K-Drama") == "K-Pop"
+    entities.release(entity_id, "K-Drama")
+    assert entities.claim(entity_id, "K-Drama") == "K-Pop"
+
+    entities.release(entity_id, "K-Pop")
+    assert entities.claim(entity_id, "K-Drama") is None
+
+def test_failed_batch_save_releases_claims(monkeypatch):
+    monkeypatch.setattr(processor, "_fetch_image", lambda category, candidate: "")
+    monkeypatch.setattr(database, "save_news_to_live", lambda items: False)
+
+    saved = processor._publish_batch("K-Pop", [article("아이유", "IU"), article("뉴진스", "NewJeans")])
+
+    assert saved == []
+    assert entities.claim(entities.resolve("아이유", "IU"), "K-Drama") is None
+    assert entities.claim(entities.resolve("뉴진스", "NewJeans"), "K-Drama") is None
+
+def test_failed_stream_save_releases_claim(monkeypatch):
+    monkeypatch.setattr(processor, "_fetch_image", lambda category, candidate: "")
+    monkeypatch.setattr(database, "save_news_to_live", lambda items: False)
+    candidate = processor._to_candidate(article("아이유", "IU"))
+    assert processor._accept_target("K-Pop", candidate, set())
+
+    assert processor._publish_one("K-Pop", candidate) is None
+    assert entities.claim(candidate["entity_id"], "K-Drama") is None
+
+def test_saved_items_keep_their_claim(monkeypatch):
+    monkeypatch.setattr(processor, "_fetch_image", lambda category, candidate: "")
+    monkeypatch.setattr(database, "save_news_to_live", lambda items: True)
+
+    saved = processor._publish_batch("K-Pop", [article("아이유", "IU")])
+
+    assert len(saved) == 1
+    assert entities.claim(entities.resolve("아이유", "IU"), "K-Drama") == "K-Pop"
+
+class SignalingEvent(threading.Event):
+    """wait()에 들어가기 직전에 waiting을 알립니다. (기다리는 쪽이 준비된 뒤에 조회를 끝내기 위함)"""
+
+    def __init__(self, waiting):
+        super().__init__()
+        self.waiting = waiting
+
+    def wait(self, timeout=None):
+        self.waiting.set()
+        return super().wait(timeout)
+
+def test_shared_failure_is_raised_to_waiters():
+    entity_id = entities.resolve("뷔", "V")
+    started, finish, waiting = threading.Event(), threading.Event(), threading.Event()
+    results = {}
+
+    def failing_fetch():
+        started.set()
+        finish.wait()
+        raise RuntimeError("naver down")
+
+    def run(name, fetch):
+        try:
+            results[name] = entities.shared(entity_id, "image", fetch)
+        except Exception as e:
+            results[name] = e
+
+    owner = threading.Thread(target=run, args=("owner", failing_fetch))
+    owner.start()
+    started.wait()
+    entry = next(iter(entities._shared.values()))
+    entry.done = SignalingEvent(waiting)
+    waiter = threading.Thread(target=run, args=("waiter", lambda: pytest.fail("waiter must not fetch")))
+    waiter.start()
+    waiting.wait()
+    finish.set()
+    owner.join()
+    waiter.join()
+
+    assert isinstance(results["owner"], RuntimeError)
+    assert results["waiter"] is results["owner"]
+    # 실패한 결과는 남기지 않으므로 다음 요청은 다시 조회합니다.
+    assert entities.shared(entity_id, "image", lambda: "https://img/v.png") == "https://img/v.png"
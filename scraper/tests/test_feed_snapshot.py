@@ -0,0 +1,53 @@
+import pytest
+from supabase import create_client
+import database
+import feed_snapshot
+from mock_servers import PostgrestMock
+
+@pytest.fixture
+def postgrest(start_mock, monkeypatch):
+    mock = start_mock(PostgrestMock)
+    monkeypatch.setattr(database, "supabase", create_client(mock.url, "test-key"))
+    monkeypatch.setattr(database, "service_supabase", create_client(mock.url, "test-service-key"))
+    monkeypatch.setattr(feed_snapshot, "_known", {})
+    return mock
+
+def seed(mock, category="K-Pop"):
+    mock.tables["live_news"] = [
+        {"id": 1, "category": category, "keyword": "IU", "title": "t", "summary": "s",
+         "image_url": "http://img.test/a.png", "score": 100, "likes": 0, "created_at": "2026-10-17T00:00:00"},
+    ]
+    mock.tables["live_rankings"] = [{"id": 1, "category": category, "rank": 1, "title_en": "Song", "title_kr": "노래", "score": 100}]
+
+def test_publish_writes_through_rpc_without_user_fields(postgrest):
+    seed(postgrest)
+
+    assert feed_snapshot.publish("K-Pop") == 1
+    assert postgrest.calls["POST /rest/v1/rpc/publish_feed_snapshot"] == 1
+    article = postgrest.tables["feed_snapshots"][0]["payload"]["articles"][0]
+    assert "likes" not in article
+    assert article["image_url"] == "https://img.test/a.png"
+
+def test_votes_do_not_change_the_snapshot(postgrest):
+    seed(postgrest)
+    feed_snapshot.publish("K-Pop")
+
+    postgrest.tables["live_news"][0]["likes"] = 5
+    assert feed_snapshot.publish("K-Pop") is None
+    assert postgrest.tables["feed_snapshots"][0]["version"] == 1
+
+def test_version_is_assigned_by_the_database(postgrest):
+    seed(postgrest)
+    feed_snapshot.publish("K-Pop")
+    # 다른 실행이 먼저 v2를 올린 상황
+    postgrest.tables["feed_snapshots"][0].update({"version": 2, "etag": "other"})
+    postgrest.tables["live_news"][0]["title"] = "changed"
+
+    assert feed_snapshot.publish("K-Pop") == 3
+
+def test_publish_is_skipped_without_service_key(postgrest, monkeypatch):
+    monkeypatch.setattr(database, "service_supabase", None)
+    seed(postgrest)
+
+    assert feed_snapshot.publish("K-Pop") is None
+    assert "POST /rest/v1/rpc/publish_feed_snapshot" not in postgrest.calls
@@ -0,0 +1,31 @@
+import http_client
+from mock_servers import NaverMock
+
+def test_client_is_shared_per_service(start_mock, service_url):
+    naver = start_mock(NaverMock)
+    service_url("naver", naver.url)
+
+    client = http_client.get_client("naver")
+    assert http_client.get_client("naver") is client
+    assert http_client.get_client("perplexity") is not client
+
+def test_keep_alive_connection_is_reused(start_mock, service_url):
+    naver = start_mock(NaverMock)
+    service_url("naver", naver.url)
+
+    for i in range(5):
+        resp = http_client.get_client("naver").get("/v1/search/image", params={"query": f"q{i}"})
+        assert resp.status_code == 200
+
+    assert naver.calls["GET /v1/search/image"] == 5
+    assert len(naver.peers) == 1
+
+def test_close_all_opens_a_new_connection(start_mock, service_url):
+    naver = start_mock(NaverMock)
+    service_url("naver", naver.url)
+
+    http_client.get_client("naver").get("/v1/search/news.json", params={"query": "a"})
+    http_client.close_all()
+    http_client.get_client("naver").get("/v1/search/news.json", params={"query": "b"})
+
+    assert len(naver.peers) == 2
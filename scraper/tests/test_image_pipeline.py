@@ -0,0 +1,80 @@
+import pytest
+import database
+import image_pipeline
+from mock_servers import ImageMock
+
+def item(link, width=1200, height=900):
+    return {"link": link, "sizewidth": str(width), "sizeheight": str(height)}
+
+def test_score_rejects_insecure_small_and_extreme_images():
+    assert image_pipeline.score(item("http://a.test/x.jpg")) is None
+    assert image_pipeline.score(item("https://a.test/x.jpg", 200, 150)) is None
+    assert image_pipeline.score(item("https://a.test/x.jpg", 3000, 400)) is None
+    assert image_pipeline.score(item("https://a.test/x.jpg")) is not None
+
+def test_rank_candidates_orders_by_score_and_drops_rejected():
+    items = [
+        item("https://a.test/small.jpg", 400, 300),
+        item("https://a.test/portrait.jpg", 900, 1600),
+        item("https://a.test/best.jpg", 1200, 900),
+        item("http://a.test/insecure.jpg", 1200, 900),
+    ]
+    assert image_pipeline.rank_candidates(items) == [
+        "https://a.test/best.jpg", "https://a.test/portrait.jpg", "https://a.test/small.jpg",
+    ]
+
+@pytest.fixture
+def images(start_mock, monkeypatch):
+    # 대역 서버는 http:// 이므로 https 요구를 끕니다.
+    monkeypatch.setattr(image_pipeline, "REQUIRE_HTTPS", False)
+    return start_mock(ImageMock)
+
+def test_check_accepts_live_image_and_rejects_dead_link(images):
+    assert image_pipeline.check(f"{images.url}/abc/0_800x600.png") == (True, True)
+    assert image_pipeline.check(f"{images.url}/missing.png") == (False, True)
+
+def test_check_is_not_definitive_when_unreachable():
+    assert image_pipeline.check("http://127.0.0.1:9/abc/0_800x600.png") == (False, False)
+
+def test_choose_skips_dead_candidates(images):
+    items = [item(f"{images.url}/dead.png", 1600, 1200), item(f"{images.url}/abc/1_1200x900.png")]
+
+    assert image_pipeline.choose(items) == (f"{images.url}/abc/1_1200x900.png", True)
+    assert images.calls["HEAD /<image>"] >= 2
+
+def test_publish_falls_back_to_original_url_when_store_fails(images, monkeypatch):
+    if image_pipeline.Image is None:
+        pytest.skip("Pillow not installed")
+    monkeypatch.setattr(image_pipeline, "STORE", "supabase")
+    monkeypatch.setattr(image_pipeline, "_store_failed", False)
+    monkeypatch.setattr(database, "service_supabase", object())
+    monkeypatch.setattr(database, "upload_image", lambda name, data, content_type: None)
+    url = f"{images.url}/abc/2_800x600.png"
+
+    assert image_pipeline.store_enabled()
+    assert image_pipeline.publish(url) == url
+    assert not image_pipeline.store_enabled()
+
+def test_supabase_store_needs_service_key(monkeypatch):
+    monkeypatch.setattr(image_pipeline, "STORE", "supabase")
+    monkeypatch.setattr(image_pipeline, "_store_failed", False)
+    monkeypatch.setattr(database, "service_supabase", None)
+
+    assert not image_pipeline.store_enabled()
+
+def test_fallback_url_is_not_cacheable(images, monkeypatch):
+    if image_pipeline.Image is None:
+        pytest.skip("Pillow not installed")
+    monkeypatch.setattr(image_pipeline, "STORE", "supabase")
+    monkeypatch.setattr(image_pipeline, "_store_failed", False)
+    monkeypatch.setattr(database, "service_supabase", object())
+    monkeypatch.setattr(database, "upload_image", lambda name, data, content_type: None)
+    link = f"{images.url}/abc/3_1200x900.png"
+
+    assert image_pipeline.process([item(link)]) == (link, False)
+
+def test_original_url_is_cacheable_when_store_is_off(images, monkeypatch):
+    monkeypatch.setattr(image_pipeline, "STORE", "off")
+    link = f"{images.url}/abc/4_1200x900.png"
+
+    assert image_pipeline.process([item(link)]) == (link, True)
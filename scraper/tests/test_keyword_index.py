@@ -0,0 +1,27 @@
+import pytest
+from keyword_index import normalize_keyword
+
+@pytest.mark.parametrize("variant", ["Lee Ji-eun", "Jieun Lee", "YI JI EUN", "Rhee Ji Eun", "Lee Ji-eun (IU)"])
+def test_surname_variants_share_a_key(variant):
+    assert normalize_keyword(variant) == normalize_keyword("Lee Jieun")
+
+def test_surname_variant_moved_to_front():
+    assert normalize_keyword("Minho Choe") == normalize_keyword("Choi Min-ho")
+
+@pytest.mark.parametrize("name, expected", [
+    ("Jo Yu-ri", "choyuri"),
+    ("Kim Yu Jin", "kimyujin"),
+    ("Park Ri An", "parkrian"),
+    ("Han O Im", "hanoim"),
+    ("Kang Sin", "kangsin"),
+])
+def test_given_name_syllables_are_not_rewritten(name, expected):
+    assert normalize_keyword(name) == expected
+
+def test_different_given_names_stay_distinct():
+    assert normalize_keyword("Kim Yu Jin") != normalize_keyword("Kim You Jin")
+    assert normalize_keyword("Choi Ri Na") != normalize_keyword("Choi Lee Na")
+
+def test_single_token_is_not_treated_as_surname():
+    assert normalize_keyword("O") == "o"
+    assert normalize_keyword("IU") == "iu"
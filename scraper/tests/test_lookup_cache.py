@@ -0,0 +1,98 @@
+import pytest
+import image_pipeline
+import lookup_cache as lookup_cache_module
+import naver_api
+import resilience
+from lookup_cache import LookupCache
+from mock_servers import ImageMock, NaverMock
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(lookup_cache_module.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return LookupCache(str(tmp_path / "lookup.sqlite3"), ttl=100, negative_ttl=10, max_entries=3)
+
+def test_entry_expires_after_ttl(cache, clock):
+    cache.set("image", "a", "https://img/a.png")
+
+    clock.now += 99
+    assert cache.get("image", "a") == (True, "https://img/a.png")
+    clock.now += 2
+    assert cache.get("image", "a") == (False, None)
+    assert cache.stats["image"] == {"hits": 1, "misses": 1}
+
+def test_empty_result_uses_shorter_ttl(cache, clock):
+    cache.set("image", "nobody", "")
+
+    clock.now += 9
+    assert cache.get("image", "nobody") == (True, "")
+    clock.now += 2
+    assert cache.get("image", "nobody") == (False, None)
+
+def test_least_recently_used_entry_is_evicted_at_capacity(cache, clock):
+    for key in ("a", "b", "c"):
+        cache.set("image", key, key)
+        clock.now += 1
+    cache.get("image", "a")
+    clock.now += 1
+
+    cache.set("image", "d", "d")
+    assert cache.get("image", "b") == (False, None)
+    for key in ("a", "c", "d"):
+        assert cache.get("image", key) == (True, key)
+
+def test_namespaces_are_separate(cache):
+    cache.set("image", "a", "image")
+    cache.set("news", "a", ["news"])
+
+    assert cache.get("image", "a") == (True, "image")
+    assert cache.get("news", "a") == (True, ["news"])
+
+@pytest.fixture
+def naver(start_mock, service_url, monkeypatch, cache):
+    """이미지 검색은 NaverMock, 이미지 확인은 ImageMock이 받도록 연결합니다."""
+    images = start_mock(ImageMock)
+    mock = start_mock(NaverMock, image_base=images.url)
+    service_url("naver", mock.url)
+    monkeypatch.setattr(naver_api, "CLIENT_ID", "id")
+    monkeypatch.setattr(naver_api, "CLIENT_SECRET", "secret")
+    monkeypatch.setattr(naver_api, "lookup_cache", cache)
+    monkeypatch.setattr(image_pipeline, "REQUIRE_HTTPS", False)
+    monkeypatch.setattr(image_pipeline, "STORE", "off")
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience.time, "sleep", lambda sec: None)
+    return mock
+
+def test_api_errors_are_never_cached(naver):
+    naver.error_rate = 1.0
+    assert naver_api.get_target_image("error case") == ""
+    failed_calls = naver.calls["GET /v1/search/image"]
+    assert failed_calls >= 1
+
+    naver.error_rate = 0.0
+    url = naver_api.get_target_image("error case")
+    assert url
+    assert naver.calls["GET /v1/search/image"] == failed_calls + 1
+
+    assert naver_api.get_target_image("error case") == url
+    assert naver.calls["GET /v1/search/image"] == failed_calls + 1
+
+def test_invalidate_image_forces_a_new_lookup(naver, cache):
+    url = naver_api.get_target_image("Some  Person")
+    assert cache.get("image", "some person") == (True, url)
+
+    naver_api.invalidate_image(" some person ")
+    assert cache.get("image", "some person") == (False, None)
+    assert naver_api.get_target_image("Some  Person") == url
+    assert naver.calls["GET /v1/search/image"] == 2
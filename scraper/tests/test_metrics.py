@@ -0,0 +1,73 @@
+import pytest
+import metrics
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    """span 시간을 직접 정하고, 테스트마다 집계를 비웁니다. (conftest는 SCRAPER_METRICS=0)"""
+    clock = Clock()
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    monkeypatch.setattr(metrics.time, "perf_counter", clock)
+    metrics.reset()
+    yield clock
+    metrics.reset()
+
+def timed(clock, stage, ms, nbytes=0, fail=False, raises=False):
+    clock.now = 0.0
+    with metrics.span(stage) as span:
+        clock.now += ms / 1000
+        span.add_bytes(nbytes)
+        if fail:
+            span.fail()
+        if raises:
+            raise RuntimeError("boom")
+
+def stage_report(stage, category="-"):
+    return next(s for s in metrics.build_report()["stages"] if (s["stage"], s["category"]) == (stage, category))
+
+def test_span_aggregates_counts_bytes_and_percentiles(clock):
+    for ms in range(1, 21):
+        timed(clock, "naver.image", ms * 10, nbytes=100)
+    timed(clock, "naver.image", 5000, fail=True)
+    with pytest.raises(RuntimeError):
+        timed(clock, "naver.image", 40000, raises=True)
+
+    s = stage_report("naver.image")
+    assert (s["count"], s["errors"], s["bytes"]) == (22, 2, 2000)
+    assert s["p50_ms"] == pytest.approx(110.0)
+    assert s["p95_ms"] == pytest.approx(5000.0)
+    assert s["max_ms"] == pytest.approx(40000.0)
+    # 구간: <=10, <=50, <=100, <=250, <=500, ..., <=5000, <=10000, <=30000, <=60000, 그 이상
+    assert s["histogram"] == [1, 4, 5, 10, 0, 0, 0, 1, 0, 0, 1, 0]
+
+def test_category_and_observe_are_recorded_separately(clock):
+    with metrics.category("IT"):
+        timed(clock, "ai.completion", 20)
+        metrics.observe("rate_limit.wait", 0.3)
+        metrics.increment("parse.diagnostics", 2)
+    timed(clock, "ai.completion", 20)
+
+    assert stage_report("ai.completion", "IT")["count"] == 1
+    assert stage_report("ai.completion")["count"] == 1
+    assert stage_report("rate_limit.wait", "IT")["max_ms"] == pytest.approx(300.0)
+    assert metrics.build_report()["counters"] == [{"name": "parse.diagnostics", "category": "IT", "count": 2}]
+
+def test_disabled_metrics_are_no_ops(clock, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+
+    with metrics.span("naver.image") as span:
+        span.add_bytes(10)
+        span.fail()
+    metrics.observe("rate_limit.wait", 1.0)
+    metrics.increment("parse.diagnostics")
+
+    assert span is metrics._NOOP
+    assert metrics.emit_report() is None
+    report = metrics.build_report()
+    assert (report["stages"], report["counters"]) == ([], [])
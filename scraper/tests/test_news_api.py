@@ -0,0 +1,63 @@
+import pytest
+import news_api
+import processor
+import database
+import response_cache
+import tag_parser
+from mock_servers import PerplexityMock, load_completions
+
+@pytest.fixture
+def perplexity(start_mock, service_url, monkeypatch):
+    def _start(**kwargs):
+        mock = start_mock(PerplexityMock, **kwargs)
+        service_url("perplexity", mock.url)
+        return mock
+    monkeypatch.setattr(news_api, "API_KEY", "test-key")
+    monkeypatch.setattr(response_cache, "FRESHNESS_SEC", 0)
+    return _start
+
+def test_ask_news_ai_returns_single_pass_parse_result(perplexity):
+    perplexity()
+    parsed, raw_text = news_api.ask_news_ai("parse result")
+
+    assert isinstance(parsed, tag_parser.ParseResult)
+    assert len(parsed.articles) == 3
+    assert parsed.rankings_text == tag_parser.rankings_section(raw_text)
+
+def test_parse_failure_keeps_diagnostics(perplexity):
+    perplexity(completions=["##ARTICLE_START##\n##HEADLINE## only a title\n##ARTICLE_END##"])
+    parsed, raw_text = news_api.ask_news_ai("broken")
+
+    assert parsed.articles == []
+    assert "block 1: missing headline/content" in parsed.diagnostics
+    assert "no RANKINGS section" in parsed.diagnostics
+    assert raw_text.startswith("PARSING_FAILED")
+
+def test_cached_result_rebuilds_parse_result(perplexity, monkeypatch):
+    perplexity()
+    monkeypatch.setattr(response_cache, "FRESHNESS_SEC", 60)
+    prompt = f"cached {id(object())}"
+
+    first, _, first_hit = news_api.ask_news_ai_cached(prompt)
+    second, _, second_hit = news_api.ask_news_ai_cached(prompt)
+
+    assert (first_hit, second_hit) == (False, True)
+    assert second.articles == first.articles
+    assert second.rankings_text == first.rankings_text
+
+def test_processor_uses_parsed_rankings_without_rescanning(perplexity, monkeypatch):
+    perplexity(completions=[load_completions()[0]])
+    saved_rankings = []
+    monkeypatch.setattr(processor, "STREAM_MODE", False)
+    monkeypatch.setattr(processor, "_fetch_image", lambda category, candidate: "")
+    monkeypatch.setattr(database, "save_news_to_live", lambda rows: True)
+    monkeypatch.setattr(database, "save_search_archive", lambda data: None)
+    monkeypatch.setattr(database, "save_rankings_to_db", lambda rows: saved_rankings.extend(rows) or True)
+
+    def no_rescan(text):
+        raise AssertionError("raw text scanned twice")
+    monkeypatch.setattr(tag_parser, "rankings_section", no_rescan)
+
+    processor.run_category_process("K-Movie", 1)
+
+    assert [row["rank"] for row in saved_rankings] == list(range(1, 11))
@@ -0,0 +1,128 @@
+import json
+import pytest
+import news_api
+import tag_parser
+import processor
+import database
+import response_cache
+from keyword_index import recent_keywords
+from mock_servers import PerplexityMock, load_stream
+
+FIXTURE = "stream_01.sse"
+
+def _cut_after_articles(count):
+    """녹화된 스트림에서 기사 count개가 완성된 직후의 이벤트 수"""
+    text = ""
+    events = [e for e in load_stream(FIXTURE).split("\n\n") if e.strip()]
+    for i, event in enumerate(events, 1):
+        data = event[len("data:"):].strip()
+        if data == "[DONE]": break
+        choices = json.loads(data).get("choices") or [{}]
+        text += choices[0].get("delta", {}).get("content") or ""
+        if text.upper().count("##ARTICLE_END##") >= count:
+            return i
+    raise AssertionError("fixture has fewer articles than requested")
+
+@pytest.fixture
+def perplexity(start_mock, service_url, monkeypatch):
+    def _start(**kwargs):
+        mock = start_mock(PerplexityMock, stream_fixture=FIXTURE, **kwargs)
+        service_url("perplexity", mock.url)
+        return mock
+    monkeypatch.setattr(news_api, "API_KEY", "test-key")
+    monkeypatch.setattr(response_cache, "FRESHNESS_SEC", 0)
+    return _start
+
+def test_full_stream_yields_all_articles(perplexity):
+    perplexity()
+    stream = news_api.NewsAIStream("full stream")
+    articles = list(stream)
+
+    assert stream.error is None
+    assert len(articles) == 3
+    parsed, raw_text = stream.result()
+    assert parsed.articles == articles
+    assert parsed.rankings_text is not None
+    assert len(parsed.rankings) == 10
+    assert parsed.diagnostics == []
+    assert "##RANKINGS##" in raw_text
+
+def test_cut_stream_returns_partial_articles_with_error(perplexity, monkeypatch):
+    perplexity(cut_after=_cut_after_articles(2))
+    stored = []
+    monkeypatch.setattr(response_cache, "store", lambda key, value: stored.append(key))
+
+    stream = news_api.NewsAIStream("cut stream")
+    articles = list(stream)
+
+    assert len(articles) == 2
+    assert "[DONE]" in stream.error
+    parsed, raw_text = stream.result()
+    assert parsed.articles == articles
+    assert "no RANKINGS section" in parsed.diagnostics
+    assert raw_text.upper().count("##ARTICLE_END##") == 2
+    assert stored == []
+
+def test_cut_before_any_article_reports_error(perplexity):
+    perplexity(cut_after=1)
+    stream = news_api.NewsAIStream("cut early")
+    assert list(stream) == []
+    parsed, raw_text = stream.result()
+    assert parsed is None
+    assert raw_text == stream.error
+
+def test_processor_records_partial_stream(perplexity, monkeypatch):
+    perplexity(cut_after=_cut_after_articles(2))
+    archived, saved = [], []
+    monkeypatch.setattr(processor, "STREAM_MODE", True)
+    monkeypatch.setattr(processor, "_fetch_image", lambda category, candidate: "")
+    monkeypatch.setattr(database, "save_news_to_live", lambda rows: saved.extend(rows) or True)
+    monkeypatch.setattr(database, "save_search_archive", archived.append)
+
+    processor.run_category_process("K-Pop", 0)
+
+    assert len(saved) == 2
+    for item in saved:
+        assert recent_keywords.contains("K-Pop", item["keyword"])
+    assert len(archived) == 1
+    assert archived[0]["raw_result"].upper().count("##ARTICLE_END##") == 2
+
+def _block(name):
+    return (f"##ARTICLE_START##\n##TARGET_KR## {name}\n##TARGET_EN## {name}\n"
+            f"##HEADLINE## {name} news\n##CONTENT## {name} body\n##ARTICLE_END##\n")
+
+RANKINGS = "##RANKINGS##\n1. Song A\n2. Song B\n"
+
+@pytest.mark.parametrize("text", [
+    RANKINGS + _block("A") + _block("B"),
+    _block("A") + RANKINGS + _block("B"),
+    _block("A") + _block("B") + RANKINGS,
+    _block("A") + RANKINGS + _block("B") + "##RANKINGS##\n1. Later\n",
+    _block("A") + "##ARTICLE_START## unclosed " + RANKINGS,
+])
+@pytest.mark.parametrize("chunk_size", [1, 5, 64])
+def test_incremental_parser_matches_batch_parser(text, chunk_size):
+    parser = news_api.IncrementalArticleParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+
+    streamed, batch = parser.result(), tag_parser.parse(text)
+    assert streamed.articles == batch.articles
+    assert streamed.rankings_text == batch.rankings_text
+    assert streamed.diagnostics == batch.diagnostics
+
+def test_client_error_releases_half_open_trial(start_mock, service_url, monkeypatch):
+    import resilience
+    mock = start_mock(PerplexityMock)
+    # 존재하지 않는 경로로 보내 404(재시도 대상이 아닌 응답)를 받게 합니다.
+    service_url("perplexity", f"{mock.url}/missing")
+    monkeypatch.setattr(news_api, "API_KEY", "test-key")
+    monkeypatch.setattr(response_cache, "FRESHNESS_SEC", 0)
+    cb = resilience.CircuitBreaker("perplexity", threshold=1, reset_timeout=0)
+    monkeypatch.setitem(resilience._breakers, "perplexity", cb)
+    cb.record_failure()
+
+    stream = news_api.NewsAIStream("half-open 4xx")
+    assert list(stream) == []
+    assert stream.error.startswith("HTTP_404")
+    assert cb.allow()
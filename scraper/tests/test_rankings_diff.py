@@ -0,0 +1,33 @@
+import rankings_diff
+
+def row(rank, title, **extra):
+    return dict({"category": "K-Drama", "rank": rank, "title_en": title, "title_kr": title,
+                 "score": rankings_diff.score_for(rank)}, **extra)
+
+def test_inserts_carry_title_key():
+    changes = rankings_diff.diff([], [row(1, '"Squid Game 2" (Netflix)')])
+
+    assert changes["inserts"][0]["title_key"] == "squidgame2"
+    assert changes["history"][0]["title_key"] == "squidgame2"
+
+def test_spelling_only_move_keeps_key_and_writes_no_history():
+    current = [row(1, "Squid Game 2", id=7, title_key="squidgame2")]
+    changes = rankings_diff.diff(current, [row(1, "Squid Game-2")])
+
+    assert changes["moves"] == [{"id": 7, "title_en": "Squid Game-2", "title_kr": "Squid Game-2"}]
+    assert changes["history"] == []
+
+def test_rows_without_title_key_are_backfilled_once():
+    current = [row(1, "Lovely Runner", id=3)]
+
+    changes = rankings_diff.diff(current, [row(1, "Lovely Runner")])
+    assert changes["moves"] == [{"id": 3, "title_key": "lovelyrunner"}]
+
+    current[0]["title_key"] = "lovelyrunner"
+    assert rankings_diff.is_empty(rankings_diff.diff(current, [row(1, "Lovely Runner")]))
+
+def test_rank_change_is_recorded_under_title_key():
+    current = [row(1, "A", id=1, title_key="a"), row(2, "B", id=2, title_key="b")]
+    changes = rankings_diff.diff(current, [row(1, "B"), row(2, "A")])
+
+    assert {(h["title_key"], h["change"]) for h in changes["history"]} == {("b", "up"), ("a", "down")}
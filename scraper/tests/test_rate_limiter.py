@@ -0,0 +1,73 @@
+import threading
+import pytest
+import rate_limiter
+from rate_limiter import TokenBucket
+
+class Clock:
+    """가짜 시계: sleep은 실제로 기다리지 않고 깨어날 시각까지 시간을 앞당깁니다."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, sec):
+        wake = self.now + sec
+        with self._lock:
+            self.now = max(self.now, wake)
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, "sleep", clock.sleep)
+    return clock
+
+def test_burst_is_served_without_waiting(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(0.5)
+
+def test_tokens_refill_at_rate_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+
+    clock.now += 1.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+
+    # 오래 쉬어도 capacity 이상은 쌓이지 않습니다.
+    clock.now += 60.0
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+
+def test_concurrent_acquire_never_exceeds_rate(clock):
+    # 이진 소수로 정확히 표현되는 속도를 써서 가짜 시계의 반올림 오차를 피합니다.
+    rate, capacity = 4.0, 2
+    bucket = TokenBucket(rate=rate, capacity=capacity)
+    granted = []
+    granted_lock = threading.Lock()
+
+    def worker():
+        for _ in range(10):
+            bucket.acquire()
+            with granted_lock:
+                granted.append(clock.now)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    granted.sort()
+    assert len(granted) == 40
+    # 시각 t까지 받을 수 있는 토큰은 최대 capacity + rate × t 개입니다.
+    for i, t in enumerate(granted):
+        assert i + 1 <= capacity + rate * t + 1e-6
@@ -0,0 +1,100 @@
+import httpx
+import pytest
+import resilience
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    """테스트마다 차단기/카운터를 새로 만들고 백오프 대기는 건너뜁니다."""
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "_stats", {})
+    monkeypatch.setattr(resilience.time, "sleep", lambda sec: None)
+    monkeypatch.setitem(resilience.POLICIES, "test", {"retries": 2, "base_delay": 0.01, "max_delay": 0.01, "deadline": 5.0})
+
+def sequence(*outcomes):
+    """호출될 때마다 outcomes를 차례로 반환(예외면 발생)하는 함수"""
+    calls = []
+
+    def fn(**kwargs):
+        calls.append(kwargs)
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return fn, calls
+
+def test_retries_5xx_then_returns_success():
+    fn, calls = sequence(FakeResponse(503), FakeResponse(502), FakeResponse(200))
+
+    assert resilience.call("test", fn).status_code == 200
+    assert len(calls) == 3
+    assert resilience.stats()["test"]["retries"] == 2
+    assert resilience.breaker("test").failures == 0
+
+def test_gives_up_after_retries_and_returns_last_response():
+    fn, calls = sequence(FakeResponse(500))
+
+    assert resilience.call("test", fn).status_code == 500
+    assert len(calls) == 3
+    assert resilience.stats()["test"]["failures"] == 1
+
+def test_breaker_opens_and_short_circuits(monkeypatch):
+    monkeypatch.setitem(resilience._breakers, "test", resilience.CircuitBreaker("test", threshold=2, reset_timeout=60))
+    fn, calls = sequence(httpx.ConnectError("down"))
+
+    with pytest.raises(httpx.ConnectError):
+        resilience.call("test", fn)
+    with pytest.raises(resilience.CircuitOpenError):
+        resilience.call("test", fn)
+    assert len(calls) == 2
+    assert resilience.stats()["test"]["breaker_trips"] == 1
+
+def test_non_retryable_error_does_not_reset_breaker():
+    cb = resilience.breaker("test")
+    cb.record_failure()
+    cb.record_failure()
+    fn, calls = sequence(ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        resilience.call("test", fn)
+    assert len(calls) == 1
+    assert cb.failures == 2
+
+def test_non_idempotent_call_is_not_retried_after_read_timeout():
+    fn, calls = sequence(httpx.ReadTimeout("slow"), FakeResponse(201))
+
+    with pytest.raises(httpx.ReadTimeout):
+        resilience.call("test", fn, idempotent=False)
+    assert len(calls) == 1
+
+def test_non_idempotent_call_retries_when_request_was_not_sent():
+    fn, calls = sequence(httpx.ConnectError("refused"), FakeResponse(503), FakeResponse(201))
+
+    assert resilience.call("test", fn, idempotent=False).status_code == 201
+    assert len(calls) == 3
+
+def test_non_idempotent_call_does_not_retry_ambiguous_5xx():
+    fn, calls = sequence(FakeResponse(504), FakeResponse(201))
+
+    assert resilience.call("test", fn, idempotent=False).status_code == 504
+    assert len(calls) == 1
+    assert resilience.breaker("test").failures == 1
+
+def test_timeout_is_clamped_to_remaining_deadline():
+    fn, calls = sequence(FakeResponse(200))
+
+    resilience.call("test", fn, timeout=httpx.Timeout(60.0, connect=10.0))
+    timeout = calls[0]["timeout"]
+    assert timeout.read <= 5.0
+    assert timeout.connect <= 5.0
+
+def test_transient_error_classification():
+    assert resilience.is_transient_error(httpx.ReadTimeout("slow"))
+    assert not resilience.is_transient_error(httpx.ReadTimeout("slow"), idempotent=False)
+    assert resilience.is_transient_error(httpx.ConnectError("refused"), idempotent=False)
+    assert resilience.is_transient_error(resilience.CircuitOpenError("open"), idempotent=False)
+    assert not resilience.is_transient_error(ValueError("bad row"))
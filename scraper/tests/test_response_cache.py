@@ -0,0 +1,57 @@
+import time
+import threading
+import pytest
+import response_cache
+
+@pytest.fixture(autouse=True)
+def cache_window(monkeypatch):
+    monkeypatch.setattr(response_cache, "FRESHNESS_SEC", 60)
+
+def _run_concurrently(key, fetch, is_success, waiters=3):
+    """소유자 1개가 fetch 안에서 멈춘 동안 waiters개의 호출을 같은 키로 보냅니다."""
+    started, release = threading.Event(), threading.Event()
+    results = {}
+
+    def owner_fetch():
+        started.set()
+        release.wait(5)
+        return fetch()
+
+    def call(name, fn):
+        try:
+            results[name] = response_cache.get_or_fetch(key, fn, is_success)
+        except Exception as e:
+            results[name] = e
+
+    owner = threading.Thread(target=call, args=("owner", owner_fetch))
+    owner.start()
+    started.wait(5)
+    others = [threading.Thread(target=call, args=(i, lambda: pytest.fail("waiter fetched"))) for i in range(waiters)]
+    for t in others: t.start()
+    time.sleep(0.2)  # 기다리는 쪽이 모두 진행 중 요청에 합류할 시간
+    release.set()
+    for t in [owner] + others: t.join(5)
+    return results
+
+def test_cache_hit_after_successful_fetch():
+    key = "test:success"
+    assert response_cache.get_or_fetch(key, lambda: {"articles": [1]}, bool) == ({"articles": [1]}, False)
+    assert response_cache.get_or_fetch(key, lambda: pytest.fail("refetched"), bool) == ({"articles": [1]}, True)
+
+def test_waiters_share_successful_result():
+    results = _run_concurrently("test:shared", lambda: {"articles": [1]}, bool)
+    assert results["owner"] == ({"articles": [1]}, False)
+    assert all(results[i] == ({"articles": [1]}, True) for i in range(3))
+
+def test_waiters_receive_owner_exception():
+    def boom():
+        raise RuntimeError("upstream down")
+    results = _run_concurrently("test:error", boom, bool)
+    assert all(isinstance(r, RuntimeError) for r in results.values())
+    assert "test:error" not in response_cache._inflight
+
+def test_shared_failure_is_not_a_cache_hit():
+    results = _run_concurrently("test:failed", lambda: {"articles": None}, lambda v: bool(v["articles"]))
+    assert all(results[i] == ({"articles": None}, False) for i in range(3))
+    hit, _ = response_cache.lookup("test:failed")
+    assert not hit
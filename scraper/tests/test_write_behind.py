@@ -0,0 +1,71 @@
+import json
+import httpx
+import pytest
+from write_behind import WriteBehindSink
+
+class FlakyWriter:
+    """error가 있으면 그 예외로 실패하고, 없으면 받은 행을 기록합니다."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.saved = []
+
+    def __call__(self, table, rows):
+        if self.error is not None:
+            raise self.error
+        self.saved.extend((table, row) for row in rows)
+
+def transient_only(table, e):
+    return isinstance(e, httpx.ConnectError)
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / "spill.jsonl")
+
+def make_sink(writer, spill_path, **kwargs):
+    return WriteBehindSink(writer, should_spill=transient_only, spill_path=spill_path, **kwargs)
+
+def test_transient_failure_spills_and_replays(spill_path):
+    writer = FlakyWriter(httpx.ConnectError("down"))
+    sink = make_sink(writer, spill_path)
+    sink.enqueue("search_archive", [{"keyword": "a"}, {"keyword": "b"}])
+    sink.close()
+    assert sink.stats["spilled"] == 2
+
+    writer.error = None
+    assert sink.replay() == 2
+    assert [row["keyword"] for _, row in writer.saved] == ["a", "b"]
+
+def test_permanent_failure_is_dropped_not_spilled(spill_path):
+    sink = make_sink(FlakyWriter(ValueError("column does not exist")), spill_path)
+    sink.enqueue("search_archive", [{"keyword": "a"}])
+    sink.close()
+
+    assert sink.stats["spilled"] == 0
+    assert sink.stats["dropped"] == 1
+    assert sink.replay() == 0
+
+def test_rows_are_dropped_after_max_replays(spill_path):
+    sink = make_sink(FlakyWriter(httpx.ConnectError("down")), spill_path, max_replays=2)
+    sink.enqueue("error_logs", [{"error": "x"}])
+    sink.close()
+
+    sink.replay()
+    with open(spill_path, encoding="utf-8") as f:
+        assert json.loads(f.readline())["failures"] == 2
+    sink.replay()
+
+    assert sink.stats["dropped"] == 1
+    assert sink.replay() == 0
+
+def test_spill_file_size_is_capped(spill_path):
+    sink = make_sink(FlakyWriter(httpx.ConnectError("down")), spill_path, spill_max_bytes=300)
+    for i in range(10):
+        sink.enqueue("search_archive", [{"keyword": f"k{i}", "raw_result": "x" * 50}])
+        sink.flush()
+
+    assert sink.stats["spilled"] + sink.stats["dropped"] == 10
+    assert sink.stats["dropped"] > 0
+    with open(spill_path, encoding="utf-8") as f:
+        assert len(f.read().encode("utf-8")) <= 300
+    sink.close()
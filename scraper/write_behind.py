@@ -0,0 +1,176 @@
+import os
+import config
+import json
+import threading
+from lookup_cache import CACHE_DIR
+
+# 버퍼에 쌓인 행이 이 개수에 도달하면 바로 내보냅니다.
+BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "50"))
+# 개수와 관계없이 내보내는 주기 (초)
+FLUSH_INTERVAL_SEC = float(os.getenv("WRITE_BEHIND_FLUSH_SEC", "2"))
+# DB에 쓰지 못한 행을 보관하는 추가 전용(append-only) 파일
+SPILL_PATH = os.getenv("WRITE_BEHIND_SPILL_PATH", os.path.join(CACHE_DIR, "write_behind.jsonl"))
+# 스필 파일 최대 크기 (바이트). 넘치면 새로 실패한 행은 버립니다.
+SPILL_MAX_BYTES = int(os.getenv("WRITE_BEHIND_SPILL_MAX_BYTES", str(20 * 1024 * 1024)))
+# 한 행을 다시 보내 보는 최대 횟수. 이만큼 replay해도 실패하면 버립니다.
+MAX_REPLAYS = int(os.getenv("WRITE_BEHIND_MAX_REPLAYS", "3"))
+
+class WriteBehindSink:
+    """
+    [지연 쓰기 버퍼] 보관/로그용 행을 메모리에 모았다가 백그라운드 스레드에서 묶어서 저장합니다.
+    - BATCH_SIZE 또는 FLUSH_INTERVAL_SEC 중 먼저 도달하는 조건에서 내보냅니다.
+    - writer(table, rows)가 일시적인 오류(should_spill(table, e)가 참)로 실패하면 행을 SPILL_PATH에 덧붙이고,
+      다음 시작 시 replay()로 다시 보냅니다. 그 밖의 오류는 다시 보내도 실패하므로 버립니다.
+    - MAX_REPLAYS번 replay해도 실패한 행과 SPILL_MAX_BYTES를 넘는 행은 버리고 dropped로 셉니다.
+    - 실행 종료 전에 반드시 close()를 호출해야 버퍼가 비워집니다.
+    """
+
+    def __init__(self, writer, should_spill=None, spill_path=SPILL_PATH, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL_SEC, spill_max_bytes=SPILL_MAX_BYTES, max_replays=MAX_REPLAYS):
+        self.writer = writer
+        self.should_spill = should_spill or (lambda table, e: True)
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_max_bytes = spill_max_bytes
+        self.max_replays = max_replays
+        self.stats = {"queued": 0, "written": 0, "spilled": 0, "replayed": 0, "dropped": 0}
+        self._pending = []
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._thread = None
+        self._closing = False
+
+    def enqueue(self, table, rows):
+        """행(dict) 목록을 버퍼에 넣고 바로 반환합니다."""
+        if not rows: return
+        with self._cond:
+            # (테이블, 행, 지금까지 실패한 횟수)
+            self._pending.extend((table, row, 0) for row in rows)
+            self.stats["queued"] += len(rows)
+            if self._thread is None:
+                self._closing = False
+                self._thread = threading.Thread(target=self._loop, name="write-behind", daemon=True)
+                self._thread.start()
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            batch, self._pending = self._pending, []
+            return batch
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._closing and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                closing = self._closing
+            self._write(self._take())
+            if closing:
+                return
+
+    def flush(self):
+        """버퍼에 남은 행을 지금 바로 저장합니다."""
+        self._write(self._take())
+
+    def close(self):
+        """백그라운드 스레드를 멈추고 남은 행을 모두 저장합니다. 이후 enqueue하면 다시 시작됩니다."""
+        with self._cond:
+            thread = self._thread
+            self._closing = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        with self._cond:
+            self._thread = None
+        self.flush()
+
+    def _write(self, batch):
+        if not batch: return
+        # PostgREST 일괄 insert는 모든 행의 컬럼 구성이 같아야 하므로 (테이블, 컬럼 집합)별로 나눕니다.
+        groups = {}
+        for table, row, failures in batch:
+            groups.setdefault((table, tuple(sorted(row))), []).append((row, failures))
+
+        with self._write_lock:
+            for (table, _), entries in groups.items():
+                rows = [row for row, _ in entries]
+                try:
+                    self.writer(table, rows)
+                    self.stats["written"] += len(rows)
+                    print(f"📂 [Write-Behind] Saved {len(rows)} rows to '{table}'.")
+                except Exception as e:
+                    if not self.should_spill(table, e):
+                        self._drop(table, len(rows), f"not retryable: {e}")
+                        continue
+                    retry = [(row, failures + 1) for row, failures in entries if failures < self.max_replays]
+                    if len(retry) < len(entries):
+                        self._drop(table, len(entries) - len(retry), f"failed {self.max_replays + 1} times: {e}")
+                    if retry:
+                        print(f"⚠️ [Write-Behind] Failed to save {len(retry)} rows to '{table}', spilling to disk: {e}")
+                        self._spill(table, retry)
+
+    def _drop(self, table, count, reason):
+        self.stats["dropped"] += count
+        print(f"🚨 [Write-Behind] Dropped {count} rows for '{table}' ({reason}).")
+
+    def _spill(self, table, entries):
+        try:
+            with self._spill_lock:
+                os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+                lines = [
+                    json.dumps({"table": table, "row": row, "failures": failures}, ensure_ascii=False, default=str) + "\n"
+                    for row, failures in entries
+                ]
+                size = os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0
+                if size + sum(len(line.encode("utf-8")) for line in lines) > self.spill_max_bytes:
+                    self._drop(table, len(entries), f"spill file is full ({size} bytes)")
+                    return
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.stats["spilled"] += len(entries)
+        except Exception as e:
+            print(f"🚨 [Write-Behind] Failed to spill {len(entries)} rows, data lost: {e}")
+
+    def replay(self):
+        """
+        이전 실행에서 저장하지 못한 행을 다시 보냅니다.
+        파일을 옮긴 뒤 읽으므로, 이번에도 실패한 행은 새 스필 파일에 다시 기록됩니다.
+        """
+        replay_path = f"{self.spill_path}.replay"
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                if os.path.exists(replay_path):
+                    # 이전 replay가 중간에 끊겼다면 남은 파일 뒤에 이어 붙입니다.
+                    with open(self.spill_path, "r", encoding="utf-8") as src, open(replay_path, "a", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                    os.remove(self.spill_path)
+                else:
+                    os.replace(self.spill_path, replay_path)
+        if not os.path.exists(replay_path): return 0
+
+        batch = []
+        with open(replay_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    batch.append((entry["table"], entry["row"], int(entry.get("failures", 1))))
+                except Exception:
+                    # 중간에 끊긴 마지막 줄 등은 건너뜁니다.
+                    continue
+
+        print(f"♻️ [Write-Behind] Replaying {len(batch)} spilled rows.")
+        self._write(batch)
+        self.stats["replayed"] += len(batch)
+        os.remove(replay_path)
+        return len(batch)
+
+    def report(self):
+        """실행 로그용 요약 문자열"""
+        s = self.stats
+        return (f"queued={s['queued']} written={s['written']} spilled={s['spilled']} "
+                f"replayed={s['replayed']} dropped={s['dropped']}")
@@ -0,0 +1,61 @@
+-- 스크래퍼 유지보수용 RPC 함수
+-- database.py의 cleanup_old_data / cleanup_all_old_data / save_rankings_to_db에서 호출합니다.
+
+-- [청소] 카테고리별로 최신 N개만 남기고 live_news 삭제 (삭제된 행 수 반환)
+create or replace function public.trim_live_news(p_category text, p_max_rows integer default 30)
+returns integer
+language sql
+as $$
+  with ranked as (
+    select id,
+           row_number() over (order by created_at desc, id desc) as rn
+    from public.live_news
+    where category = p_category
+  ),
+  deleted as (
+    delete from public.live_news n
+    using ranked r
+    where n.id = r.id and r.rn > p_max_rows
+    returning 1
+  )
+  select count(*)::integer from deleted;
+$$;
+
+-- [청소] 모든 카테고리를 한 번의 문장으로 정리
+create or replace function public.trim_all_live_news(p_max_rows integer default 30)
+returns integer
+language sql
+as $$
+  with ranked as (
+    select id,
+           row_number() over (partition by category order by created_at desc, id desc) as rn
+    from public.live_news
+  ),
+  deleted as (
+    delete from public.live_news n
+    using ranked r
+    where n.id = r.id and r.rn > p_max_rows
+    returning 1
+  )
+  select count(*)::integer from deleted;
+$$;
+
+-- [순위표] 한 카테고리의 순위를 하나의 트랜잭션으로 교체 (빈 순위표가 노출되는 구간 없음)
+create or replace function public.replace_live_rankings(p_category text, p_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  inserted integer;
+begin
+  delete from public.live_rankings where category = p_category;
+
+  insert into public.live_rankings (category, rank, title_en, title_kr, score, created_at)
+  select p_category, r.rank, r.title_en, r.title_kr, r.score, coalesce(r.created_at, now())
+  from jsonb_to_recordset(p_rows)
+    as r(rank integer, title_en text, title_kr text, score integer, created_at timestamptz);
+
+  get diagnostics inserted = row_count;
+  return inserted;
+end;
+$$;
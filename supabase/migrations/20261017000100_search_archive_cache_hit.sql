@@ -0,0 +1,3 @@
+-- AI 응답 캐시 적중 여부 기록 (news_api.ask_news_ai_cached)
+alter table public.search_archive
+  add column if not exists cache_hit boolean not null default false;
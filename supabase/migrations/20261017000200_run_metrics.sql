@@ -0,0 +1,10 @@
+-- 스크래퍼 실행별 단계 지표 (metrics.emit_report, SCRAPER_METRICS_PERSIST=1)
+create table if not exists public.run_metrics (
+  id bigint generated always as identity primary key,
+  started_at timestamptz not null,
+  duration_sec numeric,
+  report jsonb not null,
+  created_at timestamptz not null default now()
+);
+
+create index if not exists run_metrics_started_at_idx on public.run_metrics (started_at desc);
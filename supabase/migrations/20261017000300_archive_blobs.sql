@@ -0,0 +1,23 @@
+-- AI 응답 원문 압축/중복 제거 저장소 (scraper/archive_store.py, compact_archive.py)
+-- 같은 원문은 내용 해시(hash) 기준으로 한 번만 저장하고, search_archive는 raw_hash로 참조합니다.
+create table if not exists public.archive_dictionaries (
+  id text primary key,
+  dictionary text not null,
+  sample_count integer not null default 0,
+  created_at timestamptz not null default now()
+);
+
+create table if not exists public.archive_blobs (
+  hash text primary key,
+  codec text not null default 'zlib',
+  dict_id text references public.archive_dictionaries (id),
+  raw_size integer not null,
+  stored_size integer not null,
+  data text not null,
+  created_at timestamptz not null default now()
+);
+
+alter table public.search_archive
+  add column if not exists raw_hash text;
+
+create index if not exists search_archive_raw_hash_idx on public.search_archive (raw_hash);
@@ -0,0 +1,11 @@
+-- 카테고리 간 인물 식별 (scraper/entity_index.py)
+-- entity_id: 한글/영문/로마자 표기를 묶은 인물 ID, target_kr: 별칭 학습용 한글 이름
+alter table public.live_news
+  add column if not exists entity_id text,
+  add column if not exists target_kr text;
+
+alter table public.search_archive
+  add column if not exists entity_id text,
+  add column if not exists target_kr text;
+
+create index if not exists live_news_entity_id_idx on public.live_news (entity_id);
@@ -0,0 +1,16 @@
+-- AI 호출별 토큰 사용량/비용/지연 (budget.BudgetManager.record, 지연 쓰기)
+create table if not exists public.ai_usage (
+  id bigint generated always as identity primary key,
+  category text not null,
+  prompt_version smallint not null,
+  model text not null,
+  max_tokens integer,
+  prompt_tokens integer not null default 0,
+  completion_tokens integer not null default 0,
+  cost_usd numeric(10, 6) not null default 0,
+  latency_ms numeric,
+  created_at timestamptz not null default now()
+);
+
+create index if not exists ai_usage_created_at_idx on public.ai_usage (created_at desc);
+create index if not exists ai_usage_category_idx on public.ai_usage (category, created_at desc);
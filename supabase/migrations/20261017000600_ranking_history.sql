@@ -0,0 +1,80 @@
+-- 순위표 변경분 반영 (database.save_rankings_to_db → apply_live_rankings_diff)
+-- 바뀐 행만 쓰고, 진입/상승/하락/이탈은 ranking_history에 한 줄씩 남깁니다.
+
+alter table public.live_rankings
+  add column if not exists updated_at timestamptz not null default now();
+
+create table if not exists public.ranking_history (
+  id bigint generated always as identity primary key,
+  category text not null,
+  title_key text not null,            -- rankings_diff.normalize_title 결과
+  title_en text,
+  rank smallint,                      -- 이탈(out)이면 null
+  prev_rank smallint,                 -- 신규 진입(new)이면 null
+  change text not null check (change in ('new', 'up', 'down', 'out')),
+  created_at timestamptz not null default now()
+);
+
+create index if not exists ranking_history_title_idx
+  on public.ranking_history (category, title_key, created_at desc);
+
+-- [순위표] 삭제 → 이동 → 삽입 순서로 한 트랜잭션에서 반영 (바뀐 행 수 반환)
+create or replace function public.apply_live_rankings_diff(
+  p_category text,
+  p_inserts jsonb,
+  p_moves jsonb,
+  p_remove_ids bigint[],
+  p_history jsonb
+)
+returns integer
+language plpgsql
+as $$
+declare
+  removed integer;
+  moved integer;
+  inserted integer;
+begin
+  delete from public.live_rankings
+  where category = p_category and id = any(coalesce(p_remove_ids, '{}'));
+  get diagnostics removed = row_count;
+
+  update public.live_rankings l
+  set rank = coalesce(m.rank, l.rank),
+      score = coalesce(m.score, l.score),
+      title_en = coalesce(m.title_en, l.title_en),
+      title_kr = coalesce(m.title_kr, l.title_kr),
+      updated_at = now()
+  from jsonb_to_recordset(coalesce(p_moves, '[]'))
+    as m(id bigint, rank integer, score integer, title_en text, title_kr text)
+  where l.id = m.id and l.category = p_category;
+  get diagnostics moved = row_count;
+
+  insert into public.live_rankings (category, rank, title_en, title_kr, score)
+  select p_category, r.rank, r.title_en, r.title_kr, r.score
+  from jsonb_to_recordset(coalesce(p_inserts, '[]'))
+    as r(rank integer, title_en text, title_kr text, score integer);
+  get diagnostics inserted = row_count;
+
+  insert into public.ranking_history (category, title_key, title_en, rank, prev_rank, change)
+  select p_category, h.title_key, h.title_en, h.rank, h.prev_rank, h.change
+  from jsonb_to_recordset(coalesce(p_history, '[]'))
+    as h(title_key text, title_en text, rank integer, prev_rank integer, change text);
+
+  return removed + moved + inserted;
+end;
+$$;
+
+-- 추세 화살표용: 현재 순위표 + 항목별 마지막 변동
+create or replace view public.live_rankings_trend as
+select l.*, h.prev_rank, coalesce(h.change, 'same') as change
+from public.live_rankings l
+left join lateral (
+  select rh.prev_rank, rh.change
+  from public.ranking_history rh
+  where rh.category = l.category
+    and rh.change <> 'out'
+    and rh.rank = l.rank
+    and rh.title_en = l.title_en
+  order by rh.created_at desc
+  limit 1
+) h on true;
@@ -0,0 +1,17 @@
+-- 카테고리별 웹 피드 스냅샷 (feed_snapshot.publish, 내용이 바뀐 경우에만 갱신)
+-- 웹은 live_news / live_rankings를 정렬·필터링하는 대신 category 키 하나로 조회합니다.
+create table if not exists public.feed_snapshots (
+  category text primary key,
+  version integer not null,
+  etag text not null,
+  payload jsonb not null,          -- {"category", "articles": [...], "rankings": [...]}
+  article_count integer not null default 0,
+  generated_at timestamptz not null default now()
+);
+
+alter table public.feed_snapshots enable row level security;
+
+drop policy if exists "feed_snapshots are readable by everyone" on public.feed_snapshots;
+create policy "feed_snapshots are readable by everyone"
+  on public.feed_snapshots for select
+  using (true);
@@ -0,0 +1,24 @@
+-- 스크래퍼 썸네일(WebP) 공개 버킷 (image_pipeline.publish, IMAGE_STORE=supabase)
+-- 파일 이름이 내용 해시라 같은 이름이면 내용도 같습니다. (upsert 허용)
+insert into storage.buckets (id, name, public)
+values ('thumbnails', 'thumbnails', true)
+on conflict (id) do nothing;
+
+-- 스크래퍼는 anon 키로 업로드하므로 이 버킷에 한해 쓰기를 허용합니다.
+drop policy if exists "thumbnails are uploadable by the scraper" on storage.objects;
+create policy "thumbnails are uploadable by the scraper"
+  on storage.objects for insert
+  to anon, authenticated
+  with check (bucket_id = 'thumbnails');
+
+drop policy if exists "thumbnails are replaceable by the scraper" on storage.objects;
+create policy "thumbnails are replaceable by the scraper"
+  on storage.objects for update
+  to anon, authenticated
+  using (bucket_id = 'thumbnails')
+  with check (bucket_id = 'thumbnails');
+
+drop policy if exists "thumbnails are readable by everyone" on storage.objects;
+create policy "thumbnails are readable by everyone"
+  on storage.objects for select
+  using (bucket_id = 'thumbnails');
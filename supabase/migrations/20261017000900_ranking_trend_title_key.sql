@@ -0,0 +1,92 @@
+-- 추세 화살표를 정규화된 제목(title_key) 기준으로 맞추고, 마지막 반영분의 변동만 표시합니다.
+-- (순위+표기 조인은 표기만 바뀐 이동에서 끊기고, 이후 변동이 없어도 예전 화살표가 남았습니다.)
+
+alter table public.live_rankings
+  add column if not exists title_key text;   -- rankings_diff.normalize_title 결과 (비어 있던 행은 다음 반영 때 채워짐)
+
+create index if not exists live_rankings_title_key_idx
+  on public.live_rankings (category, title_key);
+
+-- 카테고리별 마지막 반영 시각 (변경 사항이 있을 때만 apply_live_rankings_diff가 호출됨)
+create table if not exists public.ranking_applies (
+  category text primary key,
+  applied_at timestamptz not null default now()
+);
+
+alter table public.ranking_applies enable row level security;
+
+drop policy if exists "ranking_applies are readable by everyone" on public.ranking_applies;
+create policy "ranking_applies are readable by everyone"
+  on public.ranking_applies for select
+  using (true);
+
+-- [순위표] 삭제 → 이동 → 삽입 순서로 한 트랜잭션에서 반영 (바뀐 행 수 반환)
+-- 이번 반영의 history 행과 ranking_applies.applied_at은 같은 now() 값을 가집니다.
+create or replace function public.apply_live_rankings_diff(
+  p_category text,
+  p_inserts jsonb,
+  p_moves jsonb,
+  p_remove_ids bigint[],
+  p_history jsonb
+)
+returns integer
+language plpgsql
+as $$
+declare
+  removed integer;
+  moved integer;
+  inserted integer;
+begin
+  delete from public.live_rankings
+  where category = p_category and id = any(coalesce(p_remove_ids, '{}'));
+  get diagnostics removed = row_count;
+
+  update public.live_rankings l
+  set rank = coalesce(m.rank, l.rank),
+      score = coalesce(m.score, l.score),
+      title_en = coalesce(m.title_en, l.title_en),
+      title_kr = coalesce(m.title_kr, l.title_kr),
+      title_key = coalesce(m.title_key, l.title_key),
+      updated_at = now()
+  from jsonb_to_recordset(coalesce(p_moves, '[]'))
+    as m(id bigint, rank integer, score integer, title_en text, title_kr text, title_key text)
+  where l.id = m.id and l.category = p_category;
+  get diagnostics moved = row_count;
+
+  insert into public.live_rankings (category, rank, title_en, title_kr, title_key, score)
+  select p_category, r.rank, r.title_en, r.title_kr, r.title_key, r.score
+  from jsonb_to_recordset(coalesce(p_inserts, '[]'))
+    as r(rank integer, title_en text, title_kr text, title_key text, score integer);
+  get diagnostics inserted = row_count;
+
+  insert into public.ranking_history (category, title_key, title_en, rank, prev_rank, change)
+  select p_category, h.title_key, h.title_en, h.rank, h.prev_rank, h.change
+  from jsonb_to_recordset(coalesce(p_history, '[]'))
+    as h(title_key text, title_en text, rank integer, prev_rank integer, change text);
+
+  insert into public.ranking_applies (category, applied_at)
+  values (p_category, now())
+  on conflict (category) do update set applied_at = excluded.applied_at;
+
+  return removed + moved + inserted;
+end;
+$$;
+
+-- 추세 화살표용: 현재 순위표 + 마지막 반영에서 생긴 변동 (그 밖의 항목은 'same')
+-- live_rankings에 컬럼이 추가되어 l.* 구성이 바뀌므로 다시 만듭니다.
+drop view if exists public.live_rankings_trend;
+create view public.live_rankings_trend as
+select l.*,
+       case when h.created_at >= a.applied_at then h.prev_rank end as prev_rank,
+       case when h.created_at >= a.applied_at then h.change else 'same' end as change
+from public.live_rankings l
+left join public.ranking_applies a on a.category = l.category
+left join lateral (
+  select rh.prev_rank, rh.change, rh.created_at
+  from public.ranking_history rh
+  where rh.category = l.category
+    and rh.title_key = l.title_key
+    and rh.change <> 'out'
+  order by rh.created_at desc
+  limit 1
+) h on true;
@@ -0,0 +1,75 @@
+-- 피드 스냅샷 쓰기/읽기 RPC
+-- - 스크래퍼는 anon 키를 쓰므로 RLS(select만 허용)를 우회하는 security definer 함수로 저장합니다.
+-- - 스냅샷에는 스크래퍼가 만든 내용만 담고, 좋아요 수와 스냅샷 이후 추가된 기사는 읽을 때 live_news에서 합칩니다.
+
+-- [발행] 카테고리당 한 행 upsert. 저장된 버전보다 새 버전일 때만 덮어씁니다. (저장 여부 반환)
+create or replace function public.publish_feed_snapshot(
+  p_category text,
+  p_version integer,
+  p_etag text,
+  p_payload jsonb,
+  p_article_count integer,
+  p_generated_at timestamptz default now()
+)
+returns boolean
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  saved integer;
+begin
+  insert into public.feed_snapshots (category, version, etag, payload, article_count, generated_at)
+  values (p_category, p_version, p_etag, p_payload, coalesce(p_article_count, 0), coalesce(p_generated_at, now()))
+  on conflict (category) do update
+    set version = excluded.version,
+        etag = excluded.etag,
+        payload = excluded.payload,
+        article_count = excluded.article_count,
+        generated_at = excluded.generated_at
+    where public.feed_snapshots.version < excluded.version;
+  get diagnostics saved = row_count;
+  return saved > 0;
+end;
+$$;
+
+revoke all on function public.publish_feed_snapshot(text, integer, text, jsonb, integer, timestamptz) from public;
+grant execute on function public.publish_feed_snapshot(text, integer, text, jsonb, integer, timestamptz) to anon, authenticated, service_role;
+
+-- [조회] 한 번의 요청으로 스냅샷 + 실시간 필드를 돌려줍니다. 스냅샷이 없으면 null
+-- - payload: p_etag와 다를 때만 포함 (같으면 웹이 들고 있는 payload를 그대로 사용)
+-- - likes: 스냅샷 기사 중 아직 live_news에 있는 기사의 현재 좋아요 수 (없어진 기사는 빠짐)
+-- - recent: 스냅샷 생성 이후 이 카테고리에 추가된 기사 (/api/collect 등)
+create or replace function public.get_feed_snapshot(p_category text, p_etag text default null)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'category', s.category,
+    'version', s.version,
+    'etag', s.etag,
+    'generated_at', s.generated_at,
+    'payload', case when s.etag is distinct from p_etag then s.payload end,
+    'likes', coalesce((
+      select jsonb_object_agg(n.id::text, coalesce(n.likes, 0))
+      from public.live_news n
+      where n.category = s.category
+        and n.id::text in (select a->>'id' from jsonb_array_elements(s.payload->'articles') a)
+    ), '{}'::jsonb),
+    'recent', coalesce((
+      select jsonb_agg(to_jsonb(r) order by r.score desc nulls last, r.created_at desc)
+      from (
+        select n.*
+        from public.live_news n
+        where n.category = s.category
+          and n.created_at > s.generated_at
+          and n.id::text not in (select a->>'id' from jsonb_array_elements(s.payload->'articles') a)
+        order by n.created_at desc
+        limit 30
+      ) r
+    ), '[]'::jsonb)
+  )
+  from public.feed_snapshots s
+  where s.category = p_category;
+$$;
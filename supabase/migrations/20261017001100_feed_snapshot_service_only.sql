@@ -0,0 +1,33 @@
+-- 피드 스냅샷 발행을 service_role 전용으로 제한하고 버전을 서버에서 정합니다.
+-- (anon 키는 웹에 배포되므로 anon이 호출할 수 있으면 누구나 피드를 덮어쓸 수 있었고,
+--  호출자가 정한 버전을 믿으면 큰 버전 하나로 이후 발행을 모두 막을 수 있었습니다.)
+
+drop function if exists public.publish_feed_snapshot(text, integer, text, jsonb, integer, timestamptz);
+
+-- [발행] 카테고리당 한 행 upsert. 버전은 기존 값 + 1이며, 저장된 버전을 반환합니다.
+create or replace function public.publish_feed_snapshot(
+  p_category text,
+  p_etag text,
+  p_payload jsonb,
+  p_article_count integer,
+  p_generated_at timestamptz default now()
+)
+returns integer
+language sql
+security definer
+set search_path = public
+as $$
+  insert into public.feed_snapshots (category, version, etag, payload, article_count, generated_at)
+  values (p_category, 1, p_etag, p_payload, coalesce(p_article_count, 0), coalesce(p_generated_at, now()))
+  on conflict (category) do update
+    set version = public.feed_snapshots.version + 1,
+        etag = excluded.etag,
+        payload = excluded.payload,
+        article_count = excluded.article_count,
+        generated_at = excluded.generated_at
+  returning version;
+$$;
+
+-- Supabase는 새 함수에 anon/authenticated 실행 권한을 기본으로 주므로 명시적으로 회수합니다.
+revoke all on function public.publish_feed_snapshot(text, text, jsonb, integer, timestamptz) from public, anon, authenticated;
+grant execute on function public.publish_feed_snapshot(text, text, jsonb, integer, timestamptz) to service_role;
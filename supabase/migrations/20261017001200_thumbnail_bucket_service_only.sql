@@ -0,0 +1,5 @@
+-- 썸네일 버킷 쓰기를 service_role로 제한합니다.
+-- anon 키는 웹에 배포되므로, anon/authenticated에 허용하면 누구나 공개 이미지 호스트에 파일을 올리거나 덮어쓸 수 있었습니다.
+-- service_role은 RLS를 우회하므로 별도 쓰기 정책이 필요 없습니다. (스크래퍼는 SUPABASE_SERVICE_KEY로 업로드)
+drop policy if exists "thumbnails are uploadable by the scraper" on storage.objects;
+drop policy if exists "thumbnails are replaceable by the scraper" on storage.objects;
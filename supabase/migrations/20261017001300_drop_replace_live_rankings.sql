@@ -0,0 +1,2 @@
+-- 순위표 전체 교체 함수는 apply_live_rankings_diff(변경분만 반영)로 대체되어 더 이상 호출하는 곳이 없습니다.
+drop function if exists public.replace_live_rankings(text, jsonb);
@@ -0,0 +1,9 @@
+-- 압축 저장(ARCHIVE_COMPRESSION=1)된 행은 원문을 archive_blobs에 두고 raw_result를 비워 둡니다. (raw_hash로 참조)
+alter table public.search_archive
+  alter column raw_result drop not null;
+
+-- archive_blobs.data / archive_dictionaries.dictionary는 bytea 대신 base64 text로 둡니다.
+-- PostgREST는 bytea를 JSON에서 '\x' + 16진수 문자열로 주고받으므로 원본의 2배가 되지만, base64는 4/3배로 더 작습니다.
+-- 스크래퍼(archive_store.py)와 SQL 모두 같은 표현을 쓰므로 변환 없이 그대로 읽고 씁니다. (SQL에서는 decode(data, 'base64'))
+comment on column public.archive_blobs.data is 'zlib 압축 원문 (base64)';
+comment on column public.archive_dictionaries.dictionary is 'zlib 사전 zdict (base64)';
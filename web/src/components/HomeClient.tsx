@@ -2,6 +2,7 @@
 
 import { useEffect, useState, useCallback } from 'react';
 import { supabase } from '@/lib/supabase';
+import { fetchFeedSnapshot } from '@/lib/feedSnapshot';
 import { Lock, Zap, Globe, Menu, X } from 'lucide-react';
 import { User } from '@supabase/supabase-js';
 
@@ -65,6 +66,15 @@ export default function HomeClient({ initialNews }: HomeClientProps) {
     setLoading(true);
 
     try {
+      // 카테고리별 화면은 스크래퍼가 미리 만든 스냅샷을 우선 사용합니다.
+      if (newCategory !== 'All') {
+        const snapshot = await fetchFeedSnapshot(newCategory);
+        if (snapshot) {
+          setNews(filterSecureNews(snapshot.articles));
+          return;
+        }
+      }
+
       let query = supabase.from('live_news').select('*');
 
       if (newCategory === 'All') {
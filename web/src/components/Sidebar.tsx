@@ -2,6 +2,7 @@
 
 import { useEffect, useState, useMemo } from 'react';
 import { supabase } from '@/lib/supabase';
+import { fetchFeedSnapshot } from '@/lib/feedSnapshot';
 import KeywordTicker from './KeywordTicker';
 import VibeCheck from './VibeCheck';
 import RankingItem from './RankingItem';
@@ -43,6 +44,13 @@ export default function Sidebar({ news, category }: SidebarProps) {
             })) as RankingItemData[];
           }
         } else {
+          // 스냅샷이 있으면 키 조회 한 번으로 끝내고, 없을 때만 테이블을 조회합니다.
+          const snapshot = await fetchFeedSnapshot(category);
+          if (snapshot) {
+            setRankings(snapshot.rankings);
+            return;
+          }
+
           const { data: categoryData, error } = await supabase
             .from('live_rankings')
             .select('*')
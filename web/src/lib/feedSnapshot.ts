@@ -0,0 +1,60 @@
+import { supabase } from '@/lib/supabase';
+import { FeedSnapshot, LiveNewsItem, RankingItemData } from '@/types';
+
+// 스냅샷 본문(스크래퍼가 만든 내용)은 etag가 바뀐 경우에만 새로 받습니다.
+const snapshotCache = new Map<string, FeedSnapshot>();
+
+const ARTICLE_LIMIT = 30;
+
+interface FeedSnapshotResponse {
+  category: string;
+  version: number;
+  etag: string;
+  generated_at: string;
+  payload: { articles?: LiveNewsItem[]; rankings?: RankingItemData[] } | null;
+  likes: Record<string, number>;
+  recent: LiveNewsItem[];
+}
+
+/**
+ * 카테고리 피드 스냅샷을 get_feed_snapshot RPC 한 번으로 조회합니다.
+ * 스냅샷에는 좋아요 수가 없으므로 응답의 실시간 좋아요 수와 스냅샷 이후 추가된 기사를 합쳐서 돌려줍니다.
+ * 스냅샷이 아직 없거나 조회에 실패하면 null (호출하는 쪽에서 기존 테이블 조회로 대체)
+ */
+export async function fetchFeedSnapshot(category: string): Promise<FeedSnapshot | null> {
+  const cached = snapshotCache.get(category);
+
+  const { data, error } = await supabase.rpc('get_feed_snapshot', {
+    p_category: category,
+    p_etag: cached?.etag ?? null,
+  });
+  if (error || !data) return null;
+
+  const res = data as FeedSnapshotResponse;
+  let base = cached;
+  if (res.payload) {
+    base = {
+      category: res.category,
+      version: res.version,
+      etag: res.etag,
+      generated_at: res.generated_at,
+      articles: (res.payload.articles || []).map((item) => ({ ...item, category })),
+      rankings: (res.payload.rankings || []).map((item) => ({ ...item, category })),
+    };
+    snapshotCache.set(category, base);
+  } else if (!base || base.etag !== res.etag) {
+    return null;
+  }
+
+  // 이미 지워진 기사는 likes에 없으므로 빼고, 나머지는 현재 좋아요 수로 채웁니다.
+  const live = base.articles
+    .filter((item) => String(item.id) in res.likes)
+    .map((item) => ({ ...item, likes: res.likes[String(item.id)] ?? 0 }));
+  const recent = (res.recent || []).map((item) => ({ ...item, category }));
+
+  const articles = [...recent, ...live]
+    .sort((a, b) => (b.score ?? 0) - (a.score ?? 0) || b.created_at.localeCompare(a.created_at))
+    .slice(0, ARTICLE_LIMIT);
+
+  return { ...base, articles };
+}
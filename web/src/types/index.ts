@@ -25,3 +25,13 @@ export interface InsightData {
   summary: string;
   generated_at: string;
 }
+
+// 스크래퍼가 카테고리별로 미리 만들어 두는 피드 (feed_snapshots 테이블)
+export interface FeedSnapshot {
+  category: string;
+  version: number;
+  etag: string;
+  articles: LiveNewsItem[];
+  rankings: RankingItemData[];
+  generated_at: string;
+}